@@ -12,18 +12,30 @@ Uus formaat sisaldab:
   - tags, languages
 
 Kasutamine:
-  python3 scripts/1-1_consolidate_data.py
+  python3 scripts/1-1_consolidate_data.py                  # Täisehitus ühes protsessis
+  python3 scripts/1-1_consolidate_data.py -j 0             # Täisehitus kõigil tuumadel
+  python3 scripts/1-1_consolidate_data.py --incremental -j 0  # Ainult muutunud teosed
+
+Inkrementaalne režiim hoiab manifesti (teose failide suurused/mtime'id ja
+teose ridade asukoht väljundfailis). Muutmata teoste read kopeeritakse
+eelmisest väljundfailist, uuesti koostatakse ainult muutunud teosed.
 """
 
 import os
 import json
 import re
+import hashlib
+import argparse
 import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 
 # --- SEADISTUS ---
 DATA_ROOT_DIR = os.getenv('VUTT_DATA_DIR', 'data')
 OUTPUT_FILE = 'output/meilisearch_data_per_page.jsonl'
+MANIFEST_FILE = 'output/meilisearch_data_per_page.manifest.json'
+# Muuda, kui dokumendi formaat muutub (sunnib inkrementaalses režiimis täisehitust)
+MANIFEST_VERSION = '3'
 STATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'state')
 COLLECTIONS_FILE = os.path.join(STATE_DIR, 'collections.json')
 PEOPLE_FILE = os.path.join(STATE_DIR, 'people.json')
@@ -391,8 +403,286 @@ def get_work_metadata(doc_path, dir_name, collections):
     return teose_id, result
 
 
-def create_meilisearch_data_per_page():
-    """Loob Meilisearchi andmefaili."""
+def build_work_documents(dir_name, collections, people_data):
+    """Koostab ühe teose kõigi lehekülgede Meilisearchi dokumendid.
+
+    Tagastab (teose_id, pages) või None, kui teosel pole pilte.
+    """
+    doc_path = os.path.join(DATA_ROOT_DIR, dir_name)
+
+    # Hangi metaandmed (v2 formaat)
+    teose_id, doc_metadata = get_work_metadata(doc_path, dir_name, collections)
+
+    # Isikud ja aliased
+    creators = doc_metadata.get('creators', [])
+    aliases = get_creator_aliases(creators, people_data)
+    authors_text = doc_metadata.get('authors_text', []) + aliases
+
+    # Leia pildifailid (v.a. thumbnailid)
+    jpg_files = sorted([f for f in os.listdir(doc_path)
+                       if f.lower().endswith(('.jpg', '.jpeg', '.png')) and not f.startswith('_thumb_')])
+    if not jpg_files:
+        return None
+
+    teose_lehekylgede_arv = len(jpg_files)
+
+    pages = []
+    # Kasuta nanoid't page ID-s (kui olemas), muidu fallback slugile
+    work_id = doc_metadata.get('id') or teose_id
+    for page_index, jpg_filename in enumerate(jpg_files):
+        page_id = f"{work_id}-{page_index + 1}"
+        base_name = os.path.splitext(jpg_filename)[0]
+
+        # Loe tekst
+        txt_path = os.path.join(doc_path, base_name + '.txt')
+        page_text = ""
+        if os.path.exists(txt_path):
+            try:
+                with open(txt_path, 'r', encoding='utf-8') as f:
+                    page_text = f.read()
+            except Exception:
+                pass
+
+        # Loe lehekülje metaandmed (annotatsioonid, staatus)
+        json_path = os.path.join(doc_path, base_name + '.json')
+        page_meta = {
+            'tags': [],
+            'comments': [],
+            'status': 'Toores',
+            'history': []
+        }
+
+        if os.path.exists(json_path):
+            try:
+                with open(json_path, 'r', encoding='utf-8') as jf:
+                    file_json = json.load(jf)
+                    source = file_json.get('meta_content', file_json)
+                    page_meta['tags'] = source.get('page_tags', source.get('tags', []))
+                    page_meta['comments'] = source.get('comments', [])
+                    page_meta['status'] = source.get('status', 'Toores')
+                    page_meta['history'] = source.get('history', [])
+
+                    if 'text_content' in file_json and file_json['text_content']:
+                        page_text = file_json['text_content']
+            except Exception as e:
+                print(f"Viga JSON lugemisel {json_path}: {e}")
+
+        # Last modified
+        if os.path.exists(txt_path):
+            last_mod = int(os.path.getmtime(txt_path) * 1000)
+        else:
+            last_mod = int(os.path.getmtime(os.path.join(doc_path, jpg_filename)) * 1000)
+
+        image_path = os.path.join(dir_name, jpg_filename)
+
+        # Meilisearch dokument (v2/v3 formaat)
+        meili_doc = {
+            # Identifikaatorid
+            'id': page_id,
+            'work_id': doc_metadata.get('id'),  # Püsiv lühikood
+            'teose_id': teose_id,               # Slug (tagasiühilduvus)
+
+            # Teose andmed (lamedaks lüüdud otsinguks ja kuvamiseks)
+            'title': doc_metadata.get('title', ''),
+            'year': doc_metadata.get('year'),
+            'location': get_label(doc_metadata.get('location')),
+            'location_id': get_id(doc_metadata.get('location')),
+            'publisher': get_label(doc_metadata.get('publisher')),
+            'publisher_id': get_id(doc_metadata.get('publisher')),
+
+            # Taksonoomia
+            'type': get_label(doc_metadata.get('type', 'impressum')), # Vaikimisi (et)
+            'type_et': get_labels_by_lang(doc_metadata.get('type', 'impressum'), 'et'),
+            'type_en': get_labels_by_lang(doc_metadata.get('type', 'impressum'), 'en'),
+            'type_object': doc_metadata.get('type'),
+            
+            'genre': get_label(doc_metadata.get('genre')), # Vaikimisi (et)
+            'genre_et': get_labels_by_lang(doc_metadata.get('genre'), 'et'),
+            'genre_en': get_labels_by_lang(doc_metadata.get('genre'), 'en'),
+            'genre_object': doc_metadata.get('genre'),
+            'genre_search': get_all_labels(doc_metadata.get('genre')),
+            'genre_ids': get_all_ids(doc_metadata.get('genre')),
+            
+            'collection': doc_metadata.get('collection'),
+            'collections_hierarchy': doc_metadata.get('collections_hierarchy', []),
+
+            # Isikud
+            'creators': creators,
+            'authors_text': authors_text,
+            'author_names': [c['name'] for c in creators if c.get('name') and c.get('role') != 'respondens'],
+            'respondens_names': [c['name'] for c in creators if c.get('name') and c.get('role') == 'respondens'],
+            'creator_ids': [c.get('id') for c in creators if c.get('id')],
+
+            # Täiendav klassifikatsioon (märksõnad)
+            'tags': get_primary_labels(doc_metadata.get('tags', [])), # Vaikimisi (et)
+            'tags_et': get_labels_by_lang(doc_metadata.get('tags', []), 'et'),
+            'tags_en': get_labels_by_lang(doc_metadata.get('tags', []), 'en'),
+            'tags_object': doc_metadata.get('tags', []),
+            'tags_search': get_all_labels(doc_metadata.get('tags')),
+            'tags_ids': get_all_ids(doc_metadata.get('tags')),
+            'languages': doc_metadata.get('languages', ['lat']),
+
+            # Lehekülje andmed
+            'teose_lehekylgede_arv': teose_lehekylgede_arv,
+            'lehekylje_number': page_index + 1,
+            'lehekylje_tekst': clean_text_for_search(page_text), # OTSINGU JAOKS (puhastatud märkidest ja poolitustest)
+            'text_content': page_text,                          # REDAKTORI JAOKS (algne tekst koos kõigi märkidega)
+            'lehekylje_pilt': image_path,
+            'originaal_kataloog': dir_name,
+
+            # Annotatsioonid ja staatus
+            'page_tags': [l.lower() for l in get_primary_labels(page_meta.get('tags', []))],
+            'page_tags_et': [l.lower() for l in get_labels_by_lang(page_meta.get('tags', []), 'et')],
+            'page_tags_en': [l.lower() for l in get_labels_by_lang(page_meta.get('tags', []), 'en')],
+            'page_tags_suggest_et': [
+                f"{get_label(t, 'et')}|||{t.get('id') if isinstance(t, dict) else ''}" 
+                for t in page_meta.get('tags', [])
+            ],
+            'page_tags_suggest_en': [
+                f"{get_label(t, 'en')}|||{t.get('id') if isinstance(t, dict) else ''}" 
+                for t in page_meta.get('tags', [])
+            ],
+            'page_tags_object': page_meta.get('tags', []),
+            'comments': page_meta['comments'],
+            'status': page_meta['status'],
+            'history': page_meta['history'],
+            'last_modified': last_mod,
+        }
+
+        # Valikulised väljad
+        if doc_metadata.get('ester_id'):
+            meili_doc['ester_id'] = doc_metadata['ester_id']
+        if doc_metadata.get('external_url'):
+            meili_doc['external_url'] = doc_metadata['external_url']
+        if doc_metadata.get('series'):
+            meili_doc['series'] = doc_metadata['series']
+            meili_doc['series_title'] = doc_metadata.get('series_title', '')
+        if doc_metadata.get('relations'):
+            meili_doc['relations'] = doc_metadata['relations']
+
+        # Tagasiühilduvus (ajutine - eemaldada hiljem)
+        meili_doc['pealkiri'] = doc_metadata.get('title', '')
+        meili_doc['aasta'] = doc_metadata.get('year')
+        meili_doc['koht'] = get_label(doc_metadata.get('location'))
+        meili_doc['trükkal'] = get_label(doc_metadata.get('publisher'))
+        
+        # V3 bibliograafia (täisobjektid dünaamilise UI jaoks)
+        meili_doc['location'] = doc_metadata.get('location')
+        meili_doc['publisher'] = doc_metadata.get('publisher')
+        meili_doc['location_search'] = get_all_labels(doc_metadata.get('location'))
+        meili_doc['publisher_search'] = get_all_labels(doc_metadata.get('publisher'))
+
+        # Autor ja respondens (denormaliseeritud tagasiühilduvuseks)
+        creators = doc_metadata.get('creators', [])
+        
+        # Autor: praeses > auctor > esimene mitterespondent
+        autor_name = ''
+        praeses = next((c for c in creators if c.get('role') == 'praeses'), None)
+        auctor = next((c for c in creators if c.get('role') == 'auctor'), None)
+        
+        if praeses:
+            autor_name = praeses.get('name', '')
+        elif auctor:
+            autor_name = auctor.get('name', '')
+        elif creators:
+            # Fallback: esimene isik, kes pole respondens
+            first = next((c for c in creators if c.get('role') not in ['respondens', 'gratulator', 'dedicator']), None)
+            if first:
+                autor_name = first.get('name', '')
+        
+        meili_doc['autor'] = autor_name
+        
+        respondents = [c for c in creators if c.get('role') == 'respondens']
+        meili_doc['respondens'] = respondents[0]['name'] if respondents else ''
+
+        pages.append(meili_doc)
+
+    # Teose koondstaatus
+    teose_staatus = calculate_work_status([p['status'] for p in pages])
+    for meili_doc in pages:
+        meili_doc['teose_staatus'] = teose_staatus
+    # content_hash'i ei lisata: dokumendid erinevad serveri omadest (teose_id,
+    # pealkiri, koht, trükkal, vaikeväärtused), serveri räsi ei klapiks nendega
+
+    return teose_id, pages
+
+
+# =========================================================
+# PARALLEELNE JA INKREMENTAALNE KOOSTAMINE
+# =========================================================
+
+# Protsessi globaalid (seatakse _init_worker'is, et neid ei peaks iga teose jaoks kopeerima)
+_worker_collections = {}
+_worker_people = {}
+
+
+def _init_worker(collections, people_data):
+    global _worker_collections, _worker_people
+    _worker_collections = collections
+    _worker_people = people_data
+
+
+def _build_work_lines(dir_name):
+    """Koostab teose JSONL read (jookseb töötajaprotsessis).
+
+    Tagastab (dir_name, teose_id, lines) - teose_id ja lines on None, kui teosel pole pilte.
+    """
+    built = build_work_documents(dir_name, _worker_collections, _worker_people)
+    if not built:
+        return dir_name, None, None
+    teose_id, pages = built
+    lines = ''.join(json.dumps(doc, ensure_ascii=False) + '\n' for doc in pages)
+    return dir_name, teose_id, lines
+
+
+def work_signature(doc_path):
+    """Teose kausta failide (nimi, suurus, mtime) räsi - muutub iga faili muutmisel."""
+    entries = []
+    with os.scandir(doc_path) as it:
+        for entry in it:
+            if entry.is_file():
+                st = entry.stat()
+                entries.append(f"{entry.name}\t{st.st_size}\t{st.st_mtime_ns}")
+    entries.sort()
+    return hashlib.blake2b('\n'.join(entries).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def global_signature():
+    """collections.json ja people.json sisu räsi (mõjutavad kõiki teoseid)."""
+    h = hashlib.blake2b(MANIFEST_VERSION.encode('utf-8'), digest_size=16)
+    for path in (COLLECTIONS_FILE, PEOPLE_FILE):
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def load_manifest():
+    """Laeb eelmise käivituse manifesti (või None, kui see puudub/ei sobi)."""
+    if not os.path.exists(MANIFEST_FILE) or not os.path.exists(OUTPUT_FILE):
+        return None
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Manifesti lugemine ebaõnnestus ({e}), teen täisehituse")
+        return None
+    # Väljundfail on vahepeal muutunud (nt käsitsi) - nihked ei kehti
+    if manifest.get('output_size') != os.path.getsize(OUTPUT_FILE):
+        print("Väljundfail ei vasta manifestile, teen täisehituse")
+        return None
+    return manifest
+
+
+def create_meilisearch_data_per_page(workers=1, incremental=False):
+    """Loob Meilisearchi andmefaili.
+
+    Args:
+        workers: Protsesside arv (1 = kõik ühes protsessis)
+        incremental: Koosta uuesti ainult muutunud teosed (manifesti järgi),
+            muutmata teoste read kopeeritakse eelmisest väljundfailist
+    """
     if not os.path.exists(DATA_ROOT_DIR):
         print(f"VIGA: Andmete juurkausta '{DATA_ROOT_DIR}' ei leitud!")
         return
@@ -406,221 +696,120 @@ def create_meilisearch_data_per_page():
     people_data = load_people_aliases()
     print(f"Laetud {len(collections)} kollektsiooni ja {len(people_data)} isiku andmed")
 
-    # Kogu andmed teose kaupa
-    works_data = {}
-
     doc_dirs = sorted([d for d in os.listdir(DATA_ROOT_DIR)
                        if os.path.isdir(os.path.join(DATA_ROOT_DIR, d)) and not d.startswith('.')])
 
-    for dir_name in tqdm(doc_dirs, desc="Teoste töötlemine"):
-        doc_path = os.path.join(DATA_ROOT_DIR, dir_name)
-
-        # Hangi metaandmed (v2 formaat)
-        teose_id, doc_metadata = get_work_metadata(doc_path, dir_name, collections)
-
-        # Isikud ja aliased
-        creators = doc_metadata.get('creators', [])
-        aliases = get_creator_aliases(creators, people_data)
-        authors_text = doc_metadata.get('authors_text', []) + aliases
-
-        # Leia pildifailid (v.a. thumbnailid)
-        jpg_files = sorted([f for f in os.listdir(doc_path)
-                           if f.lower().endswith(('.jpg', '.jpeg', '.png')) and not f.startswith('_thumb_')])
-        if not jpg_files:
-            continue
-
-        teose_lehekylgede_arv = len(jpg_files)
-
-        pages = []
-        # Kasuta nanoid't page ID-s (kui olemas), muidu fallback slugile
-        work_id = doc_metadata.get('id') or teose_id
-        for page_index, jpg_filename in enumerate(jpg_files):
-            page_id = f"{work_id}-{page_index + 1}"
-            base_name = os.path.splitext(jpg_filename)[0]
-
-            # Loe tekst
-            txt_path = os.path.join(doc_path, base_name + '.txt')
-            page_text = ""
-            if os.path.exists(txt_path):
-                try:
-                    with open(txt_path, 'r', encoding='utf-8') as f:
-                        page_text = f.read()
-                except Exception:
-                    pass
-
-            # Loe lehekülje metaandmed (annotatsioonid, staatus)
-            json_path = os.path.join(doc_path, base_name + '.json')
-            page_meta = {
-                'tags': [],
-                'comments': [],
-                'status': 'Toores',
-                'history': []
-            }
-
-            if os.path.exists(json_path):
-                try:
-                    with open(json_path, 'r', encoding='utf-8') as jf:
-                        file_json = json.load(jf)
-                        source = file_json.get('meta_content', file_json)
-                        page_meta['tags'] = source.get('page_tags', source.get('tags', []))
-                        page_meta['comments'] = source.get('comments', [])
-                        page_meta['status'] = source.get('status', 'Toores')
-                        page_meta['history'] = source.get('history', [])
-
-                        if 'text_content' in file_json and file_json['text_content']:
-                            page_text = file_json['text_content']
-                except Exception as e:
-                    print(f"Viga JSON lugemisel {json_path}: {e}")
-
-            # Last modified
-            if os.path.exists(txt_path):
-                last_mod = int(os.path.getmtime(txt_path) * 1000)
-            else:
-                last_mod = int(os.path.getmtime(os.path.join(doc_path, jpg_filename)) * 1000)
-
-            image_path = os.path.join(dir_name, jpg_filename)
-
-            # Meilisearch dokument (v2/v3 formaat)
-            meili_doc = {
-                # Identifikaatorid
-                'id': page_id,
-                'work_id': doc_metadata.get('id'),  # Püsiv lühikood
-                'teose_id': teose_id,               # Slug (tagasiühilduvus)
-
-                # Teose andmed (lamedaks lüüdud otsinguks ja kuvamiseks)
-                'title': doc_metadata.get('title', ''),
-                'year': doc_metadata.get('year'),
-                'location': get_label(doc_metadata.get('location')),
-                'location_id': get_id(doc_metadata.get('location')),
-                'publisher': get_label(doc_metadata.get('publisher')),
-                'publisher_id': get_id(doc_metadata.get('publisher')),
-
-                # Taksonoomia
-                'type': get_label(doc_metadata.get('type', 'impressum')), # Vaikimisi (et)
-                'type_et': get_labels_by_lang(doc_metadata.get('type', 'impressum'), 'et'),
-                'type_en': get_labels_by_lang(doc_metadata.get('type', 'impressum'), 'en'),
-                'type_object': doc_metadata.get('type'),
-                
-                'genre': get_label(doc_metadata.get('genre')), # Vaikimisi (et)
-                'genre_et': get_labels_by_lang(doc_metadata.get('genre'), 'et'),
-                'genre_en': get_labels_by_lang(doc_metadata.get('genre'), 'en'),
-                'genre_object': doc_metadata.get('genre'),
-                'genre_search': get_all_labels(doc_metadata.get('genre')),
-                'genre_ids': get_all_ids(doc_metadata.get('genre')),
-                
-                'collection': doc_metadata.get('collection'),
-                'collections_hierarchy': doc_metadata.get('collections_hierarchy', []),
-
-                # Isikud
-                'creators': creators,
-                'authors_text': authors_text,
-                'author_names': [c['name'] for c in creators if c.get('name') and c.get('role') != 'respondens'],
-                'respondens_names': [c['name'] for c in creators if c.get('name') and c.get('role') == 'respondens'],
-                'creator_ids': [c.get('id') for c in creators if c.get('id')],
-
-                # Täiendav klassifikatsioon (märksõnad)
-                'tags': get_primary_labels(doc_metadata.get('tags', [])), # Vaikimisi (et)
-                'tags_et': get_labels_by_lang(doc_metadata.get('tags', []), 'et'),
-                'tags_en': get_labels_by_lang(doc_metadata.get('tags', []), 'en'),
-                'tags_object': doc_metadata.get('tags', []),
-                'tags_search': get_all_labels(doc_metadata.get('tags')),
-                'tags_ids': get_all_ids(doc_metadata.get('tags')),
-                'languages': doc_metadata.get('languages', ['lat']),
-
-                # Lehekülje andmed
-                'teose_lehekylgede_arv': teose_lehekylgede_arv,
-                'lehekylje_number': page_index + 1,
-                'lehekylje_tekst': clean_text_for_search(page_text), # OTSINGU JAOKS (puhastatud märkidest ja poolitustest)
-                'text_content': page_text,                          # REDAKTORI JAOKS (algne tekst koos kõigi märkidega)
-                'lehekylje_pilt': image_path,
-                'originaal_kataloog': dir_name,
-
-                # Annotatsioonid ja staatus
-                'page_tags': [l.lower() for l in get_primary_labels(page_meta.get('tags', []))],
-                'page_tags_et': [l.lower() for l in get_labels_by_lang(page_meta.get('tags', []), 'et')],
-                'page_tags_en': [l.lower() for l in get_labels_by_lang(page_meta.get('tags', []), 'en')],
-                'page_tags_suggest_et': [
-                    f"{get_label(t, 'et')}|||{t.get('id') if isinstance(t, dict) else ''}" 
-                    for t in page_meta.get('tags', [])
-                ],
-                'page_tags_suggest_en': [
-                    f"{get_label(t, 'en')}|||{t.get('id') if isinstance(t, dict) else ''}" 
-                    for t in page_meta.get('tags', [])
-                ],
-                'page_tags_object': page_meta.get('tags', []),
-                'comments': page_meta['comments'],
-                'status': page_meta['status'],
-                'history': page_meta['history'],
-                'last_modified': last_mod,
-            }
-
-            # Valikulised väljad
-            if doc_metadata.get('ester_id'):
-                meili_doc['ester_id'] = doc_metadata['ester_id']
-            if doc_metadata.get('external_url'):
-                meili_doc['external_url'] = doc_metadata['external_url']
-            if doc_metadata.get('series'):
-                meili_doc['series'] = doc_metadata['series']
-                meili_doc['series_title'] = doc_metadata.get('series_title', '')
-            if doc_metadata.get('relations'):
-                meili_doc['relations'] = doc_metadata['relations']
-
-            # Tagasiühilduvus (ajutine - eemaldada hiljem)
-            meili_doc['pealkiri'] = doc_metadata.get('title', '')
-            meili_doc['aasta'] = doc_metadata.get('year')
-            meili_doc['koht'] = get_label(doc_metadata.get('location'))
-            meili_doc['trükkal'] = get_label(doc_metadata.get('publisher'))
-            
-            # V3 bibliograafia (täisobjektid dünaamilise UI jaoks)
-            meili_doc['location'] = doc_metadata.get('location')
-            meili_doc['publisher'] = doc_metadata.get('publisher')
-            meili_doc['location_search'] = get_all_labels(doc_metadata.get('location'))
-            meili_doc['publisher_search'] = get_all_labels(doc_metadata.get('publisher'))
-
-            # Autor ja respondens (denormaliseeritud tagasiühilduvuseks)
-            creators = doc_metadata.get('creators', [])
-            
-            # Autor: praeses > auctor > esimene mitterespondent
-            autor_name = ''
-            praeses = next((c for c in creators if c.get('role') == 'praeses'), None)
-            auctor = next((c for c in creators if c.get('role') == 'auctor'), None)
-            
-            if praeses:
-                autor_name = praeses.get('name', '')
-            elif auctor:
-                autor_name = auctor.get('name', '')
-            elif creators:
-                # Fallback: esimene isik, kes pole respondens
-                first = next((c for c in creators if c.get('role') not in ['respondens', 'gratulator', 'dedicator']), None)
-                if first:
-                    autor_name = first.get('name', '')
-            
-            meili_doc['autor'] = autor_name
-            
-            respondents = [c for c in creators if c.get('role') == 'respondens']
-            meili_doc['respondens'] = respondents[0]['name'] if respondents else ''
-
-            pages.append(meili_doc)
-
-        works_data[teose_id] = pages
-
-    # Kirjuta väljundfail teose staatustega
-    print(f"\nArvutan teose staatused ja kirjutan väljundfaili...")
+    # Inkrementaalne: leia teosed, mille failid pole muutunud
+    current_global = global_signature()
+    signatures = {d: work_signature(os.path.join(DATA_ROOT_DIR, d)) for d in doc_dirs}
+    previous = {}
+    manifest = load_manifest() if incremental else None
+    if manifest and manifest.get('global') == current_global:
+        previous = manifest.get('works', {})
+    elif incremental and manifest:
+        print("collections.json/people.json muutus, teen täisehituse")
+
+    unchanged = {d for d in doc_dirs if d in previous and previous[d]['signature'] == signatures[d]}
+    to_build = [d for d in doc_dirs if d not in unchanged]
+    if incremental:
+        print(f"Muutmata teoseid: {len(unchanged)}, uuesti koostada: {len(to_build)}")
+
+    # Ka põhiprotsessis: varem topelt teose_id tõttu vahele jäetud teosed koostatakse siin
+    _init_worker(collections, people_data)
+    if workers > 1 and to_build:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(collections, people_data))
+        # map() tagastab tulemused sisendi järjekorras - väljund on deterministlik
+        built_iter = pool.map(_build_work_lines, to_build, chunksize=4)
+    else:
+        pool = None
+        built_iter = map(_build_work_lines, to_build)
+
+    new_works = {}
+    written_ids = set()
     total_pages = 0
+    offset = 0
+    tmp_output = OUTPUT_FILE + '.tmp'
+
+    try:
+        old_output = open(OUTPUT_FILE, 'rb') if unchanged else None
+        with open(tmp_output, 'wb') as outfile, tqdm(total=len(doc_dirs), desc="Teoste töötlemine") as progress:
+            for dir_name in doc_dirs:
+                progress.update(1)
+                entry = previous.get(dir_name) if dir_name in unchanged else None
+                if entry and entry.get('skipped') == 'no_pages':
+                    new_works[dir_name] = entry
+                    continue
+                if entry and not entry.get('skipped'):
+                    old_output.seek(entry['offset'])
+                    data = old_output.read(entry['length'])
+                    teose_id, pages = entry['teose_id'], entry['pages']
+                else:
+                    if entry and entry['teose_id'] in written_ids:
+                        # Topelt teose_id - esimene sama ID-ga teos on endiselt kirjutatud
+                        teose_id, lines = entry['teose_id'], ''
+                    elif entry:
+                        # Varem topelt, aga sama ID-ga teost enam pole - koosta nüüd
+                        _, teose_id, lines = _build_work_lines(dir_name)
+                    else:
+                        built_dir, teose_id, lines = next(built_iter)
+                        if built_dir != dir_name:
+                            raise RuntimeError(f"Koostatud teos {built_dir} ei vasta oodatule ({dir_name})")
+                    if teose_id is None:
+                        # Pilte pole - jäetakse manifesti, et muutmata kausta uuesti ei loetaks
+                        new_works[dir_name] = {'signature': signatures[dir_name], 'teose_id': None,
+                                               'skipped': 'no_pages'}
+                        continue
+                    data = lines.encode('utf-8')
+                    pages = lines.count('\n')
+
+                if teose_id in written_ids:
+                    print(f"\n⚠️  Topelt teose_id '{teose_id}' ({dir_name}) - jätan vahele")
+                    new_works[dir_name] = {'signature': signatures[dir_name], 'teose_id': teose_id,
+                                           'skipped': 'duplicate'}
+                    continue
+                written_ids.add(teose_id)
+
+                outfile.write(data)
+                new_works[dir_name] = {
+                    'signature': signatures[dir_name],
+                    'teose_id': teose_id,
+                    'pages': pages,
+                    'offset': offset,
+                    'length': len(data),
+                }
+                offset += len(data)
+                total_pages += pages
+    finally:
+        if unchanged and old_output:
+            old_output.close()
+        if pool:
+            pool.shutdown()
+
+    os.replace(tmp_output, OUTPUT_FILE)
+    with open(MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'version': MANIFEST_VERSION,
+            'global': current_global,
+            'output_size': offset,
+            'works': new_works,
+        }, f, ensure_ascii=False)
+
+    print(f"\nValmis! Loodud {total_pages} lehekülge {len(written_ids)} teosest.")
+    print(f"Väljundfail: {OUTPUT_FILE}")
 
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as outfile:
-        for teose_id, pages in works_data.items():
-            page_statuses = [p['status'] for p in pages]
-            teose_staatus = calculate_work_status(page_statuses)
 
-            for meili_doc in pages:
-                meili_doc['teose_staatus'] = teose_staatus
-                outfile.write(json.dumps(meili_doc, ensure_ascii=False) + '\n')
-                total_pages += 1
+def main():
+    parser = argparse.ArgumentParser(description='Koosta Meilisearchi JSONL fail teoste kaustadest')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='Protsesside arv (0 = protsessori tuumade arv)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Koosta uuesti ainult muutunud teosed (vt manifest)')
+    args = parser.parse_args()
 
-    print(f"\nValmis! Loodud {total_pages} lehekülge {len(works_data)} teosest.")
-    print(f"Väljundfail: {OUTPUT_FILE}")
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    create_meilisearch_data_per_page(workers=workers, incremental=args.incremental)
 
 
 if __name__ == '__main__':
-    create_meilisearch_data_per_page()
+    main()
@@ -1,7 +1,23 @@
+"""
+Laeb scripts/1-1_consolidate_data.py loodud JSONL faili Meilisearchi.
+
+Fail loetakse voona ja saadetakse fikseeritud suurusega NDJSON pakkidena
+(application/x-ndjson). Korraga on ootel kuni --max-inflight taski; iga
+kinnitatud paki järel salvestatakse kontrollpunkti viimane kinnitatud
+baidinihe. Katkenud üleslaadimine jätkub järgmisel käivitamisel sealt,
+kus see pooleli jäi (kui JSONL fail pole vahepeal muutunud).
+
+Kasutamine:
+  python3 scripts/2-1_upload_to_meili.py
+  python3 scripts/2-1_upload_to_meili.py --chunk-size 2000 --max-inflight 8
+  python3 scripts/2-1_upload_to_meili.py --restart   # Ignoreeri kontrollpunkti
+"""
 import meilisearch
 import os
+import sys
 import json
-import time
+import argparse
+from collections import deque
 from dotenv import load_dotenv
 
 # --- SEADISTUS ---
@@ -12,168 +28,284 @@ ENV_PATH = os.path.join(BASE_DIR, '.env')
 # Lae .env fail kindlast asukohast
 load_dotenv(dotenv_path=ENV_PATH)
 
+# Indeksi seaded on serveriga jagatud (admin /admin/search-reindex kasutab samu).
+# Moodulid laetakse otse server/ kaustast: need ei impordi server paketti,
+# nii et server/__init__.py (logid, taustalõimed, olekufailid) ei käivitu.
+sys.path.insert(0, os.path.join(BASE_DIR, 'server'))
+from search_documents import INDEX_SETTINGS
+from doc_fingerprints import FingerprintStore
+
 MEILI_URL = os.getenv("MEILISEARCH_URL") or os.getenv("MEILI_URL") or "http://127.0.0.1:7700"
 MEILI_MASTER_KEY = os.getenv("MEILISEARCH_MASTER_KEY") or os.getenv("MEILI_MASTER_KEY") or os.getenv("MEILI_SEARCH_API_KEY")
-JSONL_FILE_PATH = 'output/meilisearch_data_per_page.jsonl' 
+JSONL_FILE_PATH = 'output/meilisearch_data_per_page.jsonl'
+CHECKPOINT_PATH = 'output/meilisearch_upload.checkpoint.json'
+# Serveri dokumentide räsid (vt server/config.py DOC_FINGERPRINTS_FILE)
+FINGERPRINTS_PATH = os.path.join(BASE_DIR, 'state', 'doc_fingerprints.sqlite')
 INDEX_NAME = 'teosed'
+CHUNK_SIZE = 1000       # Dokumente ühes NDJSON pakis
+MAX_INFLIGHT = 4        # Mitu pakki võib korraga Meilisearchis ootel olla
+TASK_TIMEOUT_MS = 10 * 60 * 1000
 # --- LÕPP ---
 
+def file_identity(path):
+    """JSONL faili identiteet - kontrollpunkt kehtib ainult sama faili kohta."""
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def load_checkpoint(identity):
+    """Tagastab kehtiva kontrollpunkti või None."""
+    if not os.path.exists(CHECKPOINT_PATH):
+        return None
+    try:
+        with open(CHECKPOINT_PATH, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Kontrollpunkti lugemine ebaõnnestus ({e}), alustan algusest")
+        return None
+    if checkpoint.get('file') != identity:
+        print("JSONL fail on pärast katkestust muutunud, alustan algusest")
+        return None
+    return checkpoint
+
+
+def save_checkpoint(checkpoint):
+    """Kirjutab kontrollpunkti atomaarselt (tmp + fsync + rename)."""
+    tmp_path = CHECKPOINT_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+
+def clear_checkpoint():
+    if os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+
+
+def read_chunks(path, offset, chunk_size):
+    """Loeb faili alates baidinihkest ja annab (NDJSON baidid, dokumentide arv, lõpunihe).
+
+    Faili ei laeta tervikuna mällu - korraga on mälus üks pakk.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        lines = []
+        for line in f:
+            offset += len(line)
+            if not line.strip():
+                continue
+            lines.append(line if line.endswith(b'\n') else line + b'\n')
+            if len(lines) >= chunk_size:
+                yield b''.join(lines), len(lines), offset
+                lines = []
+        if lines:
+            yield b''.join(lines), len(lines), offset
+
+
+def wait_task(client, task_uid):
+    """Ootab taski lõppu. Tagastab (õnnestus, veateade)."""
+    task = client.wait_for_task(task_uid, timeout_in_ms=TASK_TIMEOUT_MS, interval_in_ms=200)
+    if task.status == 'succeeded':
+        return True, None
+    return False, task.error
+
+
+def latest_task_uid(client):
+    """Viimase Meilisearchi taski uid (-1, kui taske pole)."""
+    results = client.get_tasks({'limit': 1}).results
+    return results[0].uid if results else -1
+
+
+def find_swap_task(client, new_index, after_uid):
+    """Leiab new_index'it puudutava vahetuse taski, mis on lisatud pärast after_uid'i.
+
+    Ebaõnnestunud ja tühistatud vahetusi ei arvestata (None, kui pole).
+    """
+    for task in client.get_tasks({'types': 'indexSwap', 'limit': 20}).results:
+        if task.uid <= after_uid or task.status in ('failed', 'canceled'):
+            continue
+        for swap in (task.details or {}).get('swaps', []):
+            if new_index in swap.get('indexes', []):
+                return task
+    return None
+
+
+def swap_into_live(client, new_index, checkpoint, live_exists):
+    """Vahetab new_index'i live-indeksiks (katkestuse järel jätkatav).
+
+    Enne vahetust märgitakse kontrollpunkti viimane task: kui skript katkeb
+    pärast vahetuse saatmist, ei laeta järgmisel käivitamisel vanaks
+    muutunud indeksisse edasi ega vahetata uuesti (see paneks vana indeksi
+    tagasi), vaid leitakse märgist hilisem vahetuse task.
+
+    Returns:
+        bool: kas vahetus õnnestus
+    """
+    if checkpoint.get('swap_after_task') is None:
+        checkpoint['swap_after_task'] = latest_task_uid(client)
+        save_checkpoint(checkpoint)
+
+    task = find_swap_task(client, new_index, checkpoint['swap_after_task'])
+    if task:
+        print(f"Indeksite vahetus on juba tehtud või järjekorras (Task ID: {task.uid})")
+        task_uid = task.uid
+    else:
+        # Kui live-indeksit pole, loome tühja
+        if not live_exists:
+            task = client.create_index(INDEX_NAME, {'primaryKey': 'id'})
+            client.wait_for_task(task.task_uid)
+        task_uid = client.swap_indexes([{'indexes': [INDEX_NAME, new_index]}]).task_uid
+
+    ok, error = wait_task(client, task_uid)
+    if not ok:
+        print(f"Indeksite vahetus ebaõnnestus (Task ID: {task_uid}): {error}")
+        return False
+    print(f"Indeksid vahetatud: '{new_index}' on nüüd '{INDEX_NAME}'.")
+    return True
+
+
+def create_index(client, existing):
+    """Loob uue versioonitud indeksi (teosed_v{n}) ja rakendab seaded."""
+    versions = [int(uid[len(INDEX_NAME) + 2:]) for uid in existing
+                if uid.startswith(INDEX_NAME + '_v') and uid[len(INDEX_NAME) + 2:].isdigit()]
+    new_index = f"{INDEX_NAME}_v{max(versions, default=0) + 1}"
+
+    print(f"Loon indeksi '{new_index}' ja seadistan parameetrid...")
+    task = client.create_index(new_index, {'primaryKey': 'id'})
+    client.wait_for_task(task.task_uid)
+
+    # Seaded enne dokumente (vt server/search_reindex.py INDEX_SETTINGS)
+    task = client.index(new_index).update_settings(INDEX_SETTINGS)
+
+    print(f"Indeksi seadistused saadetud (Task ID: {task.task_uid}). Ootan rakendumist...")
+    client.wait_for_task(task.task_uid, timeout_in_ms=TASK_TIMEOUT_MS)
+    print("Indeksi seadistused on rakendatud.")
+    return new_index
+
+
+def upload(client, new_index, checkpoint, chunk_size, max_inflight):
+    """Saadab faili pakkidena alates kontrollpunktist.
+
+    Kontrollpunkti nihe liigub edasi ainult siis, kui pakk ja kõik eelmised
+    on edukalt töödeldud (sama indeksi taskid töödeldakse järjekorras).
+
+    Returns:
+        bool: kas kõik pakid õnnestusid
+    """
+    index = client.index(new_index)
+    inflight = deque()  # (task_uid, lõpunihe, dokumentide arv)
+    sent = checkpoint['documents']
+
+    def ack_oldest():
+        task_uid, end_offset, count = inflight.popleft()
+        ok, error = wait_task(client, task_uid)
+        if not ok:
+            print(f"Viga paketis (Task ID: {task_uid}): {error}")
+            return False
+        checkpoint['offset'] = end_offset
+        checkpoint['documents'] += count
+        save_checkpoint(checkpoint)
+        return True
+
+    for payload, count, end_offset in read_chunks(JSONL_FILE_PATH, checkpoint['offset'], chunk_size):
+        task = index.add_documents_ndjson(payload, primary_key='id')
+        inflight.append((task.task_uid, end_offset, count))
+        sent += count
+        print(f"Saatsin paki ({sent} dokumenti, {end_offset / checkpoint['file']['size']:.0%}). Task ID: {task.task_uid}")
+        # Tagasisurve: ära loe faili edasi, kui liiga palju on ootel
+        while len(inflight) > max_inflight:
+            if not ack_oldest():
+                return False
+
+    print("\nKõik andmed saadetud. Ootan Meilisearchi töötlemist...")
+    while inflight:
+        if not ack_oldest():
+            return False
+    return True
+
+
 def main():
+    parser = argparse.ArgumentParser(description='Lae JSONL fail Meilisearchi (jätkatav)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Dokumente ühes pakis')
+    parser.add_argument('--max-inflight', type=int, default=MAX_INFLIGHT, help='Ootel pakkide arv')
+    parser.add_argument('--restart', action='store_true', help='Ignoreeri kontrollpunkti ja alusta algusest')
+    args = parser.parse_args()
+
     print("--- Alustan andmete üleslaadimist Meilisearchi ---")
 
     if not MEILI_URL or not MEILI_MASTER_KEY:
         print("VIGA: .env failist puuduvad andmed.")
         return
 
+    if not os.path.exists(JSONL_FILE_PATH):
+        print(f"Faili ei leitud: {JSONL_FILE_PATH}")
+        return
+
     try:
         client = meilisearch.Client(MEILI_URL, MEILI_MASTER_KEY)
+        existing = {idx.uid for idx in client.get_indexes({'limit': 1000})['results']}
     except Exception as e:
         print(f"VIGA: Ühendus ebaõnnestus: {e}")
         return
 
-    # Kustutame vana indeksi, et tagada puhas struktuur
+    # Ehitame uue indeksi kõrvale (teosed_v{n}) ja vahetame lõpus välja,
+    # et otsing töötaks kogu üleslaadimise aja vana indeksiga
+    identity = file_identity(JSONL_FILE_PATH)
+    checkpoint = None if args.restart else load_checkpoint(identity)
+    if checkpoint and checkpoint.get('index') not in existing:
+        print(f"Kontrollpunkti indeksit '{checkpoint.get('index')}' pole enam, alustan algusest")
+        checkpoint = None
+
+    if checkpoint and checkpoint.get('swap_after_task') is not None:
+        # Üleslaadimine oli lõppenud ja vahetus võis olla juba saadetud -
+        # indeksisse (võib-olla juba vana live-indeks) enam ei laeta
+        new_index = checkpoint['index']
+        print(f"Üleslaadimine indeksisse '{new_index}' oli lõppenud, jätkan indeksite vahetusega")
+    elif checkpoint:
+        new_index = checkpoint['index']
+        print(f"Jätkan indeksisse '{new_index}' alates baidist {checkpoint['offset']} "
+              f"({checkpoint['documents']} dokumenti juba kinnitatud)")
+    else:
+        new_index = create_index(client, existing)
+        checkpoint = {'index': new_index, 'file': identity, 'offset': 0, 'documents': 0}
+        save_checkpoint(checkpoint)
+
     try:
-        client.delete_index(INDEX_NAME)
-        time.sleep(1) # Väike paus
-    except Exception:
-        pass
-
-    print(f"Loon indeksi '{INDEX_NAME}' ja seadistan parameetrid...")
-    
-    # UUENDUS: Lisasime V3 väljad ja täiendavad seaded
-    task = client.index(INDEX_NAME).update_settings({
-        'searchableAttributes': [
-            # V2/V3 väljad
-            'title',
-            'authors_text',
-            'year',
-            'location_search',
-            'publisher_search',
-            'genre_search',
-            'tags_search',
-            'series_title',
-            # Tagasiühilduvus
-            'pealkiri',
-            'autor',
-            'respondens',
-            'aasta',
-            'teose_id',
-            'originaal_kataloog',
-            'lehekylje_tekst',
-            'page_tags',
-            'page_tags_et',
-            'page_tags_en',
-            'comments.text'
-        ],
-        'filterableAttributes': [
-            # V2/V3 väljad
-            'work_id',
-            'year',
-            'title',
-            'location_id',
-            'publisher_id',
-            'publisher',
-            'genre_ids',
-            'tags_ids',
-            'creator_ids',
-            'creators',
-            'type',
-            'type_et', 'type_en', # Keeltepõhised filtrid
-            'genre',
-            'genre_et', 'genre_en',
-            'collection',
-            'collections_hierarchy',
-            'authors_text',
-            'author_names',
-            'respondens_names',
-            'languages',
-            # Tagasiühilduvus
-            'aasta',
-            'autor',
-            'respondens',
-            'trükkal',
-            'teose_id',
-            'lehekylje_number',
-            'originaal_kataloog',
-            'page_tags',
-            'page_tags_et',
-            'page_tags_en',
-            'page_tags_suggest_et',
-            'page_tags_suggest_en',
-            'status',
-            'teose_staatus',
-            'tags',
-            'tags_et', 'tags_en'
-        ],
-        'sortableAttributes': [
-            'aasta', 
-            'lehekylje_number',
-            'last_modified',
-            'pealkiri'
-        ],
-        'rankingRules': [
-            "exactness",
-            "words",
-            "typo",
-            "proximity",
-            "attribute",
-            "sort"
-        ],
-        'faceting': {
-            'maxValuesPerFacet': 5000
-        },
-        'pagination': {
-            'maxTotalHits': 10000
-        },
-        'typoTolerance': {
-            'minWordSizeForTypos': {
-                'oneTypo': 5,
-                'twoTypos': 9
-            }
-        }
-    })
-    
-    print(f"Indeksi seadistused saadetud (Task ID: {task.task_uid}). Ootan rakendumist...")
-    client.wait_for_task(task.task_uid)
-    print("Indeksi seadistused on rakendatud.")
+        if checkpoint.get('swap_after_task') is None and \
+                not upload(client, new_index, checkpoint, args.chunk_size, args.max_inflight):
+            print(f"Vana indeks '{INDEX_NAME}' jääb kasutusse, kustutan '{new_index}'.")
+            client.delete_index(new_index)
+            clear_checkpoint()
+            return
+    except (Exception, KeyboardInterrupt) as e:
+        # Võrgu- vms viga: indeks ja kontrollpunkt jäävad alles
+        print(f"\nViga: {str(e) or type(e).__name__}")
+        print(f"Üleslaadimine katkes baidil {checkpoint['offset']}. Käivita skript uuesti, et jätkata.")
+        return
 
     try:
-        print(f"Laen andmed failist '{JSONL_FILE_PATH}'...")
-        documents_to_upload = []
-        with open(JSONL_FILE_PATH, 'r', encoding='utf-8') as f:
-            for line in f:
-                documents_to_upload.append(json.loads(line))
-        
-        print(f"Dokumente kokku: {len(documents_to_upload)}")
-        
-        # Laeme üles pakkidena (chunks), et vältida liiga suuri päringuid
-        chunk_size = 500
-        for i in range(0, len(documents_to_upload), chunk_size):
-            chunk = documents_to_upload[i:i + chunk_size]
-            task = client.index(INDEX_NAME).add_documents(chunk, primary_key='id')
-            print(f"Saatsin paki {i}-{i+len(chunk)}. Task ID: {task.task_uid}")
-        
-        print("\nKõik andmed saadetud. Ootan Meilisearchi töötlemist...")
-        
-        # Ootame viimast taski
-        while True:
-            task_status = client.get_task(task.task_uid)
-            if task_status.status == 'succeeded':
-                break
-            elif task_status.status == 'failed':
-                print(f"Viga viimases paketis: {task_status.error}")
-                break
-            time.sleep(2)
-            
+        # Vahetame indeksid atomaarselt
+        if not swap_into_live(client, new_index, checkpoint, INDEX_NAME in existing):
+            print("Käivita skript uuesti, et vahetust korrata.")
+            return
+
+        # Serveri dokumentide räsid ei vasta enam indeksile
+        FingerprintStore(FINGERPRINTS_PATH).clear()
+        clear_checkpoint()
+
+        # Vana indeks on nüüd new_index nime all
+        task = client.delete_index(new_index)
+        client.wait_for_task(task.task_uid)
+
         # Küsi lõplikku statistikat
         stats = client.index(INDEX_NAME).get_stats()
         print(f"Valmis! Indeksis on kokku {stats.number_of_documents} dokumenti.")
         print(f"Indekseerimine on lõppenud: {stats.is_indexing}")
 
-    except FileNotFoundError:
-        print(f"Faili ei leitud: {JSONL_FILE_PATH}")
     except Exception as e:
         print(f"Viga: {e}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Meilisearchi dokumentide koostamise mikrovõrdlus.
+
+Loob ajutisse kausta 10-, 100- ja 1000-leheküljelised teosed ning mõõdab:
+- per-page: teose väljad (isikute aliased, märksõnade/žanri/koha/trükkali
+  sildid) arvutatakse iga lehekülje jaoks uuesti (vana viis)
+- template: teose väljad arvutatakse üks kord sünki kohta (build_documents)
+
+Mõlemad pooled koostavad samad valmis dokumendid (teose_staatus ja
+content_hash kaasa arvatud); tulemuste võrdsust kontrollitakse enne mõõtmist.
+Isikute aliased tulevad benchmarki enda people.json andmetest.
+Failide lugemise mõju vähendamiseks loetakse iga teost enne mõõtmist üks kord.
+
+Kasutamine:
+    python3 scripts/benchmark_document_build.py
+    python3 scripts/benchmark_document_build.py --sizes 10 100 1000 --repeat 5
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Moodulid laetakse otse server/ kaustast (server paketti ei impordita)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'server'))
+from search_documents import (
+    load_work_context, build_documents, calculate_work_status,
+    _read_page_files, _build_work_template, _build_page_document
+)
+from doc_fingerprints import stamp_content_hash
+
+CREATOR_COUNT = 6
+
+
+def create_people_data():
+    """people.json sisu teose isikute ja trükkali jaoks (aliased, kanoonilised nimed)."""
+    people = {}
+    for i in list(range(CREATOR_COUNT)) + [400]:
+        people[f"Q{i}"] = {
+            "primary_name": f"Kanooniline nimi {i}",
+            "aliases": [f"Alias {i}-{j}" for j in range(5)],
+            "ids": {"wikidata": f"Q{i}"},
+        }
+    return people
+
+
+def create_work(data_dir, page_count):
+    """Loob teose kausta, millel on page_count lehekülge ja mitme autori/märksõnaga metaandmed."""
+    dir_name = f"1650-bench-{page_count}"
+    dir_path = os.path.join(data_dir, dir_name)
+    os.makedirs(dir_path, exist_ok=True)
+
+    metadata = {
+        "id": f"bench{page_count}",
+        "title": f"Disputatio de benchmark ({page_count} lk)",
+        "year": 1650,
+        "creators": [
+            {"name": f"Autor {i}", "role": "praeses" if i == 0 else "respondens", "id": f"Q{i}"}
+            for i in range(CREATOR_COUNT)
+        ],
+        "tags": [
+            {"id": f"Q1{i}", "label": f"märksõna {i}", "labels": {"et": f"märksõna {i}", "en": f"keyword {i}"}}
+            for i in range(8)
+        ],
+        "genre": {"id": "Q100", "label": "disputatsioon", "labels": {"et": "disputatsioon", "en": "disputation"}},
+        "type": {"id": "Q200", "label": "trükis", "labels": {"et": "trükis", "en": "print"}},
+        "location": {"id": "Q300", "label": "Tartu", "labels": {"et": "Tartu", "en": "Dorpat"}},
+        "publisher": {"id": "Q400", "label": "Jacob Becker"},
+        "languages": ["lat"],
+        "collection": None,
+    }
+    with open(os.path.join(dir_path, '_metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False)
+
+    text = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40
+    for i in range(page_count):
+        base = f"{i + 1:04d}"
+        with open(os.path.join(dir_path, base + '.jpg'), 'wb') as f:
+            f.write(b'\xff\xd8\xff')
+        with open(os.path.join(dir_path, base + '.txt'), 'w', encoding='utf-8') as f:
+            f.write(text)
+    return dir_name
+
+
+def build_per_page(data_dir, dir_name, people_data):
+    """Vana viis: teose väljad (aliased, sildid) arvutatakse iga lehekülje jaoks uuesti."""
+    ctx = load_work_context(data_dir, dir_name, people_data, {})
+    documents = []
+    statuses = {}
+    for i, img_name in enumerate(ctx['images']):
+        base_name = os.path.splitext(img_name)[0]
+        page_text, page_meta = _read_page_files(ctx['dir_path'], base_name)
+        statuses[base_name] = page_meta['status']
+        template = _build_work_template(ctx)
+        documents.append(_build_page_document(ctx, template, i + 1, img_name, page_text, page_meta))
+
+    # Sama lõpetus nagu build_documents()
+    teose_staatus = calculate_work_status(list(statuses.values()))
+    for doc in documents:
+        doc['teose_staatus'] = teose_staatus
+    stamp_content_hash(documents)
+    return documents
+
+
+def build_template(data_dir, dir_name, people_data):
+    """Uus viis: sama mis serveri täissünk (teose väljad üks kord)."""
+    return build_documents(data_dir, dir_name, people_data, {})[1]
+
+
+def measure(func, repeat):
+    """Tagastab parima aja millisekundites."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mõõda Meilisearchi dokumentide koostamise aega')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='Teoste lehekülgede arvud')
+    parser.add_argument('--repeat', type=int, default=5, help='Korduste arv (võetakse parim)')
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='vutt_bench_')
+    people_data = create_people_data()
+    try:
+        print(f"{'lk':>6} {'per-page ms':>12} {'template ms':>12} {'kiirendus':>10} {'µs/lk':>8}")
+        for size in args.sizes:
+            dir_name = create_work(data_dir, size)
+            # Soojendus (failisüsteemi cache) ja kontroll, et mõlemad teevad sama töö
+            if build_per_page(data_dir, dir_name, people_data) != build_template(data_dir, dir_name, people_data):
+                sys.exit(f"VIGA: per-page ja template dokumendid erinevad ({size} lk)")
+
+            per_page = measure(lambda: build_per_page(data_dir, dir_name, people_data), args.repeat)
+            template = measure(lambda: build_template(data_dir, dir_name, people_data), args.repeat)
+            speedup = per_page / template if template else 0
+            print(f"{size:>6} {per_page:>12.1f} {template:>12.1f} {speedup:>9.2f}x {template * 1000 / size:>8.0f}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
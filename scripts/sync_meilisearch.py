@@ -7,9 +7,18 @@ Võrdleb Meilisearchi andmeid failisüsteemiga ja:
 - Lisab uued leheküljed, mis failisüsteemis on aga Meilisearchis puuduvad
 - Uuendab lehekülgede arvu (teose_lehekylgede_arv) kui see on muutunud
 
+Sisurežiimis (--content) koostatakse kõigi teoste dokumendid sama
+loogikaga mis serveri sünkil (server.meilisearch_ops, failid loetakse
+paralleelselt) ja võrreldakse nende räsi indeksis oleva content_hash
+väljaga. Saadetakse ainult erinevad dokumendid (ka need, mille tekst või
+metaandmed on indeksis failisüsteemist maha jäänud). Kohalik räside fail
+(state/doc_fingerprints.sqlite) uuendatakse indeksi järgi.
+
 Kasutamine:
-    python3 scripts/sync_meilisearch.py          # Näita muudatusi (dry-run)
-    python3 scripts/sync_meilisearch.py --apply  # Rakenda muudatused
+    python3 scripts/sync_meilisearch.py                    # Näita muudatusi (dry-run)
+    python3 scripts/sync_meilisearch.py --apply            # Rakenda muudatused
+    python3 scripts/sync_meilisearch.py --content --apply  # Saada muutunud dokumentide sisu
+    python3 scripts/sync_meilisearch.py --content --workers 16
 """
 
 import os
@@ -18,6 +27,7 @@ import json
 import argparse
 import re
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 
 # Lisa parent directory path'i, et importida mooduleid
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -43,9 +53,30 @@ MEILI_URL = _env_url.replace('http://meilisearch:', 'http://localhost:')
 MEILI_KEY = os.environ.get('MEILI_MASTER_KEY', '')
 MEILI_INDEX = 'teosed'
 DATA_ROOT_DIR = os.environ.get('VUTT_DATA_DIR', 'data/')
+# Mitu dokumenti sisurežiimis ühe päringuga saadetakse
+CONTENT_BATCH_SIZE = 1000
+# Mitu teost sisurežiimis korraga failisüsteemist loetakse
+CONTENT_READ_WORKERS = 8
 # --- LÕPP ---
 
 
+def load_server_modules(data_dir):
+    """Impordib serveri dokumentide koostamise ja räside loogika.
+
+    NB: server.config loeb VUTT_DATA_DIR impordi ajal, seega peab see olema
+    enne importi seatud.
+    """
+    os.environ['VUTT_DATA_DIR'] = data_dir
+    from server.meilisearch_ops import build_work_documents, get_fingerprint_store
+    return build_work_documents, get_fingerprint_store
+
+
+def load_content_hash_field():
+    """Indeksi välja nimi, kus server hoiab dokumendi sisu räsi."""
+    from server.doc_fingerprints import CONTENT_HASH_FIELD
+    return CONTENT_HASH_FIELD
+
+
 def sanitize_id(text):
     """Puhastab teksti Meilisearchi ID-ks."""
     normalized = unicodedata.normalize('NFD', text)
@@ -71,7 +102,7 @@ def get_meilisearch_pages(client):
             'offset': offset,
             'limit': limit,
             'fields': ['id', 'work_id', 'teose_id', 'lehekylje_number', 'lehekylje_pilt',
-                       'teose_lehekylgede_arv', 'originaal_kataloog']
+                       'teose_lehekylgede_arv', 'originaal_kataloog', 'content_hash']
         })
 
         docs = result.results if hasattr(result, 'results') else result.get('results', [])
@@ -105,6 +136,7 @@ def get_meilisearch_pages(client):
                     'lehekylje_pilt': doc_dict.get('lehekylje_pilt') or getattr(doc, 'lehekylje_pilt', None),
                     'teose_lehekylgede_arv': doc_dict.get('teose_lehekylgede_arv') or getattr(doc, 'teose_lehekylgede_arv', None),
                     'originaal_kataloog': doc_dict.get('originaal_kataloog') or getattr(doc, 'originaal_kataloog', None),
+                    'content_hash': doc_dict.get('content_hash') or getattr(doc, 'content_hash', None),
                 }
 
         offset += limit
@@ -125,7 +157,7 @@ def get_filesystem_pages(data_dir):
 
     if not os.path.exists(data_dir):
         print(f"Hoiatus: Andmekaust '{data_dir}' ei eksisteeri")
-        return pages, works, unreadable_metadata
+        return pages, works
 
     for dir_name in sorted(os.listdir(data_dir)):
         dir_path = os.path.join(data_dir, dir_name)
@@ -195,7 +227,7 @@ def get_filesystem_pages(data_dir):
     return pages, works
 
 
-def compare_and_sync(meili_pages, fs_pages, fs_works, apply_changes=False):
+def compare_and_sync(meili_pages, fs_pages, fs_works, apply_changes=False, data_dir=DATA_ROOT_DIR):
     """Võrdleb Meilisearchi ja failisüsteemi ning sünkroniseerib."""
 
     meili_ids = set(meili_pages.keys())
@@ -305,13 +337,16 @@ def compare_and_sync(meili_pages, fs_pages, fs_works, apply_changes=False):
                 batch = delete_ids[i:i + batch_size]
                 task = index.delete_documents(batch)
                 index.wait_for_task(task.task_uid)
+            # Serveri räsid kustutatud dokumentide kohta ei kehti enam
+            _, get_fingerprint_store = load_server_modules(data_dir)
+            get_fingerprint_store().invalidate(doc_ids=delete_ids)
             print(f"   ✅ Kustutatud")
 
-        # Lisa uued (vajab täielikku dokumenti - kasutame consolidate skripti)
+        # Lisa uued (vajab täielikku dokumenti - kasutame sisurežiimi)
         if to_add:
             print(f"\n⚠️  {len(to_add)} uut lehekülge tuleb lisada.")
-            print("   Käivita täielik re-indekseerimine:")
-            print("   python3 1-1_consolidate_data.py && python3 2-1_upload_to_meili.py")
+            print("   Käivita sisurežiimis (saadab ainult muutunud dokumendid):")
+            print("   python3 scripts/sync_meilisearch.py --content --apply")
 
         # Uuenda lehekülgede arvu
         if to_update_count:
@@ -335,6 +370,9 @@ def compare_and_sync(meili_pages, fs_pages, fs_works, apply_changes=False):
                 if updates:
                     task = index.update_documents(updates)
                     index.wait_for_task(task.task_uid)
+                    # Osaline uuendus - serveri räsid nende dokumentide kohta ei kehti
+                    _, get_fingerprint_store = load_server_modules(data_dir)
+                    get_fingerprint_store().invalidate(doc_ids=[u['id'] for u in updates])
 
             print(f"   ✅ Uuendatud")
 
@@ -351,10 +389,133 @@ def compare_and_sync(meili_pages, fs_pages, fs_works, apply_changes=False):
     return len(to_delete), len(to_add), len(to_update_count)
 
 
+def sync_content(fs_works, meili_pages, apply_changes=False, data_dir=DATA_ROOT_DIR,
+                 workers=CONTENT_READ_WORKERS):
+    """Koostab kõigi teoste dokumendid ja saadab ainult need, mis indeksis erinevad.
+
+    Dokumendid koostatakse sama funktsiooniga mis serveri sünkil ning nende
+    räsi võrreldakse indeksis oleva content_hash väljaga. Indeksis olevad
+    teose dokumendid, mida failisüsteemis enam pole, kustutatakse.
+    """
+    build_work_documents, get_fingerprint_store = load_server_modules(data_dir)
+    hash_field = load_content_hash_field()
+    store = get_fingerprint_store()
+    index = Client(MEILI_URL, MEILI_KEY).index(MEILI_INDEX) if apply_changes else None
+
+    # Indeksi pool: dokumendi ID -> räsi ja teose kaust -> ID-d
+    index_hashes = {}
+    indexed_by_dir = {}
+    for page in meili_pages.values():
+        if not page.get('id'):
+            continue
+        index_hashes[page['id']] = page.get('content_hash')
+        if page.get('originaal_kataloog'):
+            indexed_by_dir.setdefault(page['originaal_kataloog'], set()).add(page['id'])
+
+    totals = {'works': 0, 'documents': 0, 'changed': 0, 'missing_hash': 0, 'deleted': 0, 'failed': 0}
+    batch_docs = []
+    batch_deletes = []
+    batch_commits = []  # (dir_name, hashes, stale_ids) - salvestatakse pärast edukat taski
+
+    def flush():
+        if not batch_docs and not batch_deletes:
+            return
+        ok = True
+        try:
+            tasks = []
+            if batch_docs:
+                tasks.append(index.add_documents(batch_docs))
+            if batch_deletes:
+                tasks.append(index.delete_documents(batch_deletes))
+            for task in tasks:
+                result = index.wait_for_task(task.task_uid, timeout_in_ms=600000)
+                if getattr(result, 'status', None) != 'succeeded':
+                    ok = False
+                    print(f"\n   ❌ Task {task.task_uid} ebaõnnestus: {getattr(result, 'error', None)}")
+        except Exception as e:
+            ok = False
+            print(f"\n   ❌ Saatmine ebaõnnestus: {e}")
+
+        if ok:
+            for dir_name, hashes, stale_ids in batch_commits:
+                store.commit(dir_name, hashes, removed_ids=stale_ids)
+        else:
+            totals['failed'] += len(batch_docs) + len(batch_deletes)
+        batch_docs.clear()
+        batch_deletes.clear()
+        batch_commits.clear()
+
+    def build(dir_name):
+        try:
+            return dir_name, build_work_documents(dir_name)
+        except Exception as e:
+            print(f"\n   ❌ {dir_name}: dokumentide koostamine ebaõnnestus: {e}")
+            return dir_name, None
+
+    dir_names = sorted(work['dir_name'] for work in fs_works.values())
+    # Failide lugemine on I/O-seotud - lõimed loevad teoseid paralleelselt,
+    # map() tagastab tulemused järjekorras
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for dir_name, built in pool.map(build, dir_names):
+            if not built:
+                continue
+            _, documents, _, _ = built
+
+            hashes = {doc['id']: doc[hash_field] for doc in documents}
+            changed = [doc for doc in documents if index_hashes.get(doc['id']) != hashes[doc['id']]]
+            missing_hash = sum(1 for doc in changed if doc['id'] in index_hashes and not index_hashes[doc['id']])
+            stale_ids = sorted(indexed_by_dir.get(dir_name, set()) - set(hashes))
+
+            totals['works'] += 1
+            totals['documents'] += len(documents)
+            totals['changed'] += len(changed)
+            totals['missing_hash'] += missing_hash
+            totals['deleted'] += len(stale_ids)
+
+            if changed or stale_ids:
+                print(f"   {dir_name}: {len(changed)}/{len(documents)} erineb"
+                      + (f", {len(stale_ids)} kustutamiseks" if stale_ids else ""))
+
+            if apply_changes and (changed or stale_ids):
+                batch_docs.extend(changed)
+                batch_deletes.extend(stale_ids)
+                # Pärast edukat saatmist vastab indeks kõigile teose dokumentidele
+                batch_commits.append((dir_name, hashes, stale_ids))
+                if len(batch_docs) >= CONTENT_BATCH_SIZE:
+                    flush()
+
+    if apply_changes:
+        flush()
+
+    skipped = totals['documents'] - totals['changed']
+    skip_rate = skipped / totals['documents'] * 100 if totals['documents'] else 0
+    print("\n" + "=" * 60)
+    print("SISU SÜNKRONISEERIMINE")
+    print("=" * 60)
+    print(f"Teoseid: {totals['works']}, dokumente: {totals['documents']}")
+    print(f"Erinevad: {totals['changed']} (neist ilma räsita indeksis: {totals['missing_hash']}), "
+          f"samad (vahele jäetud): {skipped} ({skip_rate:.1f}%)")
+    print(f"Kustutamiseks: {totals['deleted']}")
+    if apply_changes:
+        if totals['failed']:
+            print(f"❌ Ebaõnnestus: {totals['failed']} (proovitakse järgmisel käivitusel uuesti)")
+        else:
+            print("✅ Sisu sünkroniseeritud!")
+    elif totals['changed'] or totals['deleted']:
+        print("\nSee oli DRY-RUN. Muudatuste rakendamiseks käivita:")
+        print("   python3 scripts/sync_meilisearch.py --content --apply")
+
+    return totals
+
+
 def main():
     parser = argparse.ArgumentParser(description='Sünkroniseeri Meilisearch failisüsteemiga')
     parser.add_argument('--apply', action='store_true', help='Rakenda muudatused (vaikimisi dry-run)')
     parser.add_argument('--data-dir', default=DATA_ROOT_DIR, help='Andmete kataloog')
+    parser.add_argument('--content', action='store_true',
+                        help='Koosta dokumendid serveri loogikaga ja saada ainult indeksis erinevad (räside järgi)')
+    parser.add_argument('--workers', type=int, default=CONTENT_READ_WORKERS,
+                        help='Sisurežiimis paralleelselt loetavate teoste arv')
     args = parser.parse_args()
 
     print(f"Meilisearch: {MEILI_URL}")
@@ -382,7 +543,12 @@ def main():
     fs_pages, fs_works = get_filesystem_pages(args.data_dir)
 
     # Võrdle ja sünkroniseeri
-    compare_and_sync(meili_pages, fs_pages, fs_works, apply_changes=args.apply)
+    compare_and_sync(meili_pages, fs_pages, fs_works, apply_changes=args.apply, data_dir=args.data_dir)
+
+    if args.content:
+        print("\nKoostan dokumendid ja võrdlen indeksi räsidega...")
+        sync_content(fs_works, meili_pages, apply_changes=args.apply, data_dir=args.data_dir,
+                     workers=args.workers)
 
 
 if __name__ == '__main__':
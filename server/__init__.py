@@ -8,7 +8,10 @@ from .config import (
     BASE_DIR, PORT, USERS_FILE, PENDING_REGISTRATIONS_FILE,
     INVITE_TOKENS_FILE, PENDING_EDITS_FILE, ALLOWED_ORIGINS,
     RATE_LIMITS, SESSION_DURATION, MEILI_URL, MEILI_KEY, INDEX_NAME,
-    COLLECTIONS_FILE, VOCABULARIES_FILE,
+    MEILI_SYNC_DEBOUNCE_SECONDS, MEILI_POOL_SIZE,
+    RECONCILE_ENABLED, RECONCILE_IO_BUDGET_BYTES, RECONCILE_PASS_INTERVAL_SECONDS,
+    COLLECTIONS_FILE, VOCABULARIES_FILE, INDEX_OUTBOX_FILE, DOC_FINGERPRINTS_FILE,
+    WORK_SNAPSHOTS_FILE, GIT_MAINTENANCE_ENABLED,
     get_logger
 )
 
@@ -52,15 +55,42 @@ from .pending_edits_handlers import (
 from .git_ops import (
     get_or_init_repo, save_with_git, get_file_git_history,
     get_file_at_commit, get_file_diff, get_commit_diff, commit_new_work_to_git,
-    get_recent_commits, get_git_failures, clear_git_failures, run_git_fsck
+    get_recent_commits, get_git_failures, clear_git_failures, run_git_fsck,
+    commit_out_of_band_changes, get_dirty_work_dirs, commit_new_works_to_git,
+    start_git_writer, get_commit_status, get_commit_writer_stats,
+    load_tracked_paths, get_tracked_paths_stats,
+    get_recent_activity, begin_activity_backfill, backfill_activity_log, get_activity_log_stats,
+    get_work_cache_stats, get_cat_file_stats, get_diff_cache_stats,
+    get_file_history_page, write_commit_graph, ensure_commit_graph,
+    run_git_repack, run_git_prune
 )
+from .git_writer import GitCommitWriter
+
+# Meilisearchi HTTP klient
+from .meili_client import MeiliClient, MeiliError, MeiliUnavailableError, get_meili_client
+
+# Meilisearchi taskide jälgija
+from .meili_tasks import track_task, wait_for_task_result, get_task_tracker_stats
 
 # Meilisearch operatsioonid
 from .meilisearch_ops import (
     send_to_meilisearch, sync_work_to_meilisearch,
-    sync_work_to_meilisearch_async,
-    index_new_work, metadata_watcher_loop
+    sync_work_to_meilisearch_async, sync_work_metadata_to_meilisearch,
+    sync_work_metadata_to_meilisearch_async, sync_page_to_meilisearch,
+    sync_page_to_meilisearch_async, sync_pages_to_meilisearch_async, get_sync_queue_stats, get_meili_client_stats,
+    submit_documents, submit_delete, build_work_documents, wait_for_task, wait_for_sync,
+    replay_index_outbox, outbox_replay_loop, get_outbox_stats, get_fingerprint_stats,
+    get_fingerprint_store, begin_sync_capture, end_sync_capture,
+    index_new_work, index_new_works
+)
+
+# Teoste kaustade jälgija: uued teosed ja välised muudatused (inotify, varuvariandina skannimine)
+from .work_watcher import (
+    metadata_watcher_loop, create_metadata_for_new_work, process_work_changes,
+    sweep_all_works, get_watcher_stats, get_ingest_stats
 )
+from .ingest_pipeline import IngestPipeline
+from .work_snapshots import WorkSnapshotStore, scan_work_files, diff_snapshots
 
 # Inimeste/autorite andmed
 from .people_ops import (
@@ -85,7 +115,7 @@ from .utils import (
 # Git HTTP handlerid
 from .git_handlers import (
     handle_backups, handle_restore, handle_git_history,
-    handle_git_restore, handle_git_diff, handle_commit_diff
+    handle_git_restore, handle_git_diff, handle_commit_diff, handle_git_commit_status
 )
 
 # Admin HTTP handlerid
@@ -94,8 +124,30 @@ from .admin_handlers import (
     handle_admin_registrations_reject, handle_admin_users,
     handle_admin_users_update_role, handle_admin_users_delete,
     handle_invite_set_password,
-    handle_admin_git_failures, handle_admin_git_health,
-    handle_admin_people_refresh, handle_admin_people_refresh_status
+    handle_admin_git_failures, handle_admin_git_health, handle_admin_git_writer_status,
+    handle_admin_people_refresh, handle_admin_people_refresh_status,
+    handle_admin_search_index_status, handle_admin_search_reindex,
+    handle_admin_search_reindex_status, handle_admin_index_reconcile_status,
+    handle_admin_ingest_status
+)
+
+# Otsinguindeksi dokumendid ja seaded (ainult standardteek, vt search_documents.py)
+from .search_documents import INDEX_SETTINGS, build_documents, load_work_context
+
+# Otsinguindeksi täielik ümberehitus (blue/green)
+from .search_reindex import (
+    ReindexError, rebuild_search_index, rebuild_search_index_safe,
+    get_reindex_status, is_reindex_running
+)
+
+# Indeksi ja failisüsteemi taustavõrdlus
+from .index_reconciler import (
+    reconcile_work, run_reconcile_pass, reconcile_loop, get_reconciler_stats
+)
+
+# Giti taustahooldus (fsck, repack, prune, commit-graph)
+from .git_maintenance import (
+    maintenance_loop, request_maintenance, get_git_maintenance_stats
 )
 
 # Bulk operatsioonide HTTP handlerid
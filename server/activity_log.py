@@ -0,0 +1,361 @@
+"""
+Kasutajate muudatuste logi (state/activity_log.sqlite).
+
+Iga kasutaja commiti kohta lisatakse rida iga muudetud lehekülje (.txt) ja
+teose metaandmete (_metadata.json) kohta: autor, teos, lehekülg,
+muudatuse tüüp, commiti räsi ja aeg. Logi ainult täieneb; esimesel
+käivitusel täidetakse see ühe korra Giti ajaloost (taustal - täitmise ajal
+tehtud commitide read lisatakse pärast ajaloo ridu, et järjekord säiliks).
+
+/recent-edits loeb muudatused siit indeksi abil (autori ja teose järgi)
+ega käi enam iga päringu juures Giti ajalugu ja commitide diffe läbi.
+Lehitsemine käib kursori (rea id) järgi.
+Automaatseid commiteid (originaal-OCR, välised muudatused) ei logita.
+
+Lisaks hoitakse iga faili esimest commitit (ka automaatsetest commitidest),
+et ajaloo vaade leiaks originaal-OCR commiti ilma kogu faili ajalugu läbimata.
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from .config import ACTIVITY_LOG_FILE, get_logger
+from .git_log import iter_git_log
+
+logger = get_logger(__name__)
+
+# Autor, kelle commiteid ei logita (uued teosed, välised muudatused)
+AUTOMATIC_AUTHOR = "Automaatne"
+
+_COLUMNS = ("id", "ts", "author", "dir_name", "work_id", "filepath", "page", "change_type",
+            "commit_hash", "message")
+
+
+def change_type_for_path(filepath):
+    """Tagastab muudatuse tüübi ("page"/"metadata") või None, kui faili ei logita."""
+    parts = filepath.split('/')
+    if len(parts) < 2:
+        return None
+    if parts[-1].endswith('.txt'):
+        return "page"
+    if parts[-1] == '_metadata.json':
+        return "metadata"
+    return None
+
+
+class ActivityLog:
+    """Append-only muudatuste logi.
+
+    Tabel `activity` ainult täieneb. Lisaks hoitakse iga faili viimase
+    muudatuse viidet (kõigi ja iga autori kohta eraldi), nii et lehekülg
+    "viimased muudatused" loetakse indeksist ja kursori järgi lehitsemine
+    ei sõltu ajaloo pikkusest.
+    """
+
+    def __init__(self, path=ACTIVITY_LOG_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._backfill_until = None  # Giti HEAD täitmise alguses (None = täitmine ei käi)
+        self._deferred = []          # Täitmise ajal lisatud read
+        self._deferred_first = []    # Täitmise ajal lisatud esimesed commitid
+        self._first_commits_ready = False
+
+    def _connect(self):
+        """Avab ühenduse esimesel kasutamisel (eeldab et lukk on võetud)."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS activity (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts TEXT NOT NULL,
+                    author TEXT NOT NULL,
+                    dir_name TEXT NOT NULL,
+                    work_id TEXT,
+                    filepath TEXT NOT NULL,
+                    page INTEGER,
+                    change_type TEXT NOT NULL,
+                    commit_hash TEXT NOT NULL,
+                    message TEXT
+                );
+                CREATE TABLE IF NOT EXISTS activity_latest (
+                    dir_name TEXT NOT NULL,
+                    filepath TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    PRIMARY KEY (dir_name, filepath)
+                );
+                CREATE INDEX IF NOT EXISTS activity_latest_by_id ON activity_latest (id);
+                CREATE TABLE IF NOT EXISTS activity_latest_by_author (
+                    author TEXT NOT NULL,
+                    dir_name TEXT NOT NULL,
+                    filepath TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    PRIMARY KEY (author, dir_name, filepath)
+                );
+                CREATE INDEX IF NOT EXISTS activity_latest_author_id ON activity_latest_by_author (author, id);
+                CREATE TABLE IF NOT EXISTS first_commits (
+                    filepath TEXT PRIMARY KEY,
+                    commit_hash TEXT NOT NULL,
+                    ts TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS activity_meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def append(self, rows):
+        """Lisab read: [{"ts", "author", "dir_name", "work_id", "filepath", "page",
+        "change_type", "commit_hash", "message"}].
+
+        Ajaloost täitmise ajal hoitakse read mälus ja lisatakse täitmise lõpus.
+        """
+        if not rows:
+            return
+        with self._lock:
+            if self._backfill_until is not None:
+                self._deferred.extend(rows)
+                return
+        self._insert(rows)
+
+    def _insert(self, rows):
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    for row in rows:
+                        cursor = conn.execute(
+                            "INSERT INTO activity (ts, author, dir_name, work_id, filepath, page, "
+                            "change_type, commit_hash, message) VALUES "
+                            "(:ts, :author, :dir_name, :work_id, :filepath, :page, :change_type, "
+                            ":commit_hash, :message)",
+                            row
+                        )
+                        row_id = cursor.lastrowid
+                        conn.execute(
+                            "INSERT OR REPLACE INTO activity_latest (dir_name, filepath, id) VALUES (?, ?, ?)",
+                            (row["dir_name"], row["filepath"], row_id)
+                        )
+                        conn.execute(
+                            "INSERT OR REPLACE INTO activity_latest_by_author (author, dir_name, filepath, id) "
+                            "VALUES (?, ?, ?, ?)",
+                            (row["author"], row["dir_name"], row["filepath"], row_id)
+                        )
+        except sqlite3.Error as e:
+            logger.error(f"Muudatuste logi kirjutamine ebaõnnestus: {e}")
+
+    def record_first_commits(self, commit_hash, ts, paths):
+        """Salvestab failide esimese commiti (juba salvestatud faile ei muudeta)."""
+        rows = [(path, commit_hash, ts) for path in paths]
+        if not rows:
+            return
+        with self._lock:
+            if self._backfill_until is not None:
+                self._deferred_first.extend(rows)
+                return
+        self._insert_first_commits(rows)
+
+    def _insert_first_commits(self, rows):
+        if not rows:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO first_commits (filepath, commit_hash, ts) VALUES (?, ?, ?)", rows
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Esimeste commitide kirjutamine ebaõnnestus: {e}")
+
+    def first_commits_ready(self):
+        """Kas esimeste commitide tabel on Giti ajaloost täidetud (ja täitmine ei käi)."""
+        if self._first_commits_ready:
+            return True
+        if self.is_backfilling():
+            return False
+        try:
+            self._first_commits_ready = bool(self._get_meta("first_commits_at"))
+        except sqlite3.Error as e:
+            logger.error(f"Muudatuste logi lugemine ebaõnnestus: {e}")
+        return self._first_commits_ready
+
+    def first_commit(self, paths):
+        """Tagastab failide vanima esimese commiti räsi (None, kui ühtki faili pole commititud)."""
+        paths = list(paths)
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    f"SELECT commit_hash, ts FROM first_commits WHERE filepath IN ({', '.join('?' * len(paths))})",
+                    paths
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Esimeste commitide lugemine ebaõnnestus: {e}")
+            return None
+        if not rows:
+            return None
+        return min(rows, key=lambda row: datetime.fromisoformat(row[1]))[0]
+
+    def query(self, author=None, dir_name=None, before=None, limit=50):
+        """Tagastab iga faili viimase muudatuse, uuemad eespool.
+
+        Args:
+            author: Ainult selle kasutaja muudatused
+            dir_name: Ainult selle teose kausta muudatused
+            before: Kursor - ainult read, mille id on sellest väiksem
+            limit: Maksimaalne ridade arv
+
+        Returns:
+            list of dict (veerud nagu _COLUMNS)
+        """
+        if author:
+            conditions = ["l.author = :author"]
+            table = "activity_latest_by_author"
+        else:
+            conditions = []
+            table = "activity_latest"
+        if dir_name:
+            conditions.append("l.dir_name = :dir_name")
+        if before:
+            conditions.append("l.id < :before")
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+        sql = (
+            f"SELECT {', '.join('a.' + column for column in _COLUMNS)} "
+            f"FROM {table} l JOIN activity a ON a.id = l.id {where} "
+            f"ORDER BY l.id DESC LIMIT :limit"
+        )
+        params = {"author": author, "dir_name": dir_name, "before": before, "limit": limit}
+        try:
+            with self._lock:
+                rows = self._connect().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Muudatuste logi lugemine ebaõnnestus: {e}")
+            return []
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def get_stats(self):
+        """Tagastab logi suuruse ja täitmise aja."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                rows = conn.execute("SELECT COUNT(*) FROM activity").fetchone()[0]
+                files = conn.execute("SELECT COUNT(*) FROM activity_latest").fetchone()[0]
+                first_commits = conn.execute("SELECT COUNT(*) FROM first_commits").fetchone()[0]
+        except sqlite3.Error as e:
+            return {"error": str(e)}
+        return {"rows": rows, "files": files, "first_commits": first_commits,
+                "backfilled_at": self._get_meta("backfilled_at"),
+                "backfilling": self.is_backfilling()}
+
+    def is_backfilling(self):
+        """Kas logi täidetakse parasjagu Giti ajaloost."""
+        with self._lock:
+            return self._backfill_until is not None
+
+    def _get_meta(self, key):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value FROM activity_meta WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO activity_meta (key, value) VALUES (?, ?)", (key, value))
+
+    def begin_backfill(self, head):
+        """Märgib logi täitmiseks, kui seda pole veel tehtud (enne commitide kirjutaja starti).
+
+        Args:
+            head: Giti HEAD commit, milleni ajalugu loetakse (hilisemad commitid
+                lisatakse append() kaudu)
+
+        Returns:
+            bool: Kas täitmine on vajalik (siis tuleb kutsuda backfill_from_git)
+        """
+        try:
+            if self._get_meta("backfilled_at") and self._get_meta("first_commits_at"):
+                return False
+        except sqlite3.Error as e:
+            logger.error(f"Muudatuste logi lugemine ebaõnnestus: {e}")
+            return False
+        with self._lock:
+            self._backfill_until = head
+        return True
+
+    def backfill_from_git(self, repo_dir, row_builder):
+        """Täidab logi ja failide esimesed commitid Giti ajaloost (vanimad enne)
+        kuni begin_backfill() HEAD-ini.
+
+        Args:
+            repo_dir: Giti repo kaust
+            row_builder: Funktsioon row_builder(commit_hash, author, ts, message, paths) -> [rida]
+
+        Returns:
+            int: Lisatud ridade arv
+        """
+        started = time.monotonic()
+        total = 0
+        try:
+            # Katkenud täitmise read eemaldatakse (täitmise ajal uusi ridu ei kirjutata)
+            with self._lock:
+                head = self._backfill_until
+                conn = self._connect()
+                with conn:
+                    conn.execute("DELETE FROM activity")
+                    conn.execute("DELETE FROM activity_latest")
+                    conn.execute("DELETE FROM activity_latest_by_author")
+                    conn.execute("DELETE FROM first_commits")
+
+            batch = []
+            first_batch = []
+            seen_paths = set()
+            # Tühi repo (HEAD puudub) - ajalugu pole
+            for entry in (iter_git_log(repo_dir, ["--reverse", head], name_only=True) if head else ()):
+                for path in entry["paths"]:
+                    if path not in seen_paths:
+                        seen_paths.add(path)
+                        first_batch.append((path, entry["hash"], entry["date"]))
+                if len(first_batch) >= 1000:
+                    self._insert_first_commits(first_batch)
+                    first_batch = []
+                if entry["author"] == AUTOMATIC_AUTHOR:
+                    continue
+                batch.extend(row_builder(entry["hash"], entry["author"], entry["date"],
+                                         entry["message"], entry["paths"]))
+                if len(batch) >= 1000:
+                    self._insert(batch)
+                    total += len(batch)
+                    batch = []
+            self._insert(batch)
+            self._insert_first_commits(first_batch)
+            total += len(batch)
+            finished_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+            self._set_meta("backfilled_at", finished_at)
+            self._set_meta("first_commits_at", finished_at)
+            logger.info(f"Muudatuste logi täidetud Giti ajaloost: {total} rida "
+                        f"({time.monotonic() - started:.1f}s)")
+        except Exception as e:
+            logger.error(f"Muudatuste logi täitmine ebaõnnestus: {e}")
+        finally:
+            # Täitmise ajal tehtud commitid (uuemad kui HEAD) lisatakse lõppu;
+            # lisamise ajal tulnud read ootavad järgmist ringi, et järjekord säiliks
+            while True:
+                with self._lock:
+                    deferred, self._deferred = self._deferred, []
+                    deferred_first, self._deferred_first = self._deferred_first, []
+                    if not deferred and not deferred_first:
+                        self._backfill_until = None
+                        break
+                self._insert(deferred)
+                self._insert_first_commits(deferred_first)
+        return total
@@ -9,8 +9,12 @@ Eraldatud file_server.py-st. Sisaldab:
 - /admin/users/update-role - rolli muutmine
 - /admin/users/delete - kasutaja kustutamine
 - /invite/set-password - parooli seadmine invite tokeniga
-- /admin/git-health - git repo tervislikkuse kontroll
+- /admin/git-health - git repo tervislikkus ja taustahoolduse tulemused
 - /admin/git-failures - git commit ebaõnnestumised
+- /admin/search-index-status - otsinguindeksi sünkroonimise statistika
+- /admin/search-reindex - otsinguindeksi ümberehitus (blue/green)
+- /admin/search-reindex-status - ümberehituse edenemine
+- /admin/index-reconcile-status - indeksi ja failisüsteemi võrdluse statistika
 """
 import json
 
@@ -23,8 +27,21 @@ from .registration import (
     validate_invite_token, create_user_from_invite
 )
 from .auth import get_all_users, update_user_role, delete_user
-from .git_ops import get_git_failures, clear_git_failures, run_git_fsck
+from .git_ops import (
+    get_git_failures, clear_git_failures, run_git_fsck, get_commit_writer_stats,
+    get_tracked_paths_stats, get_activity_log_stats, get_work_cache_stats,
+    get_cat_file_stats, get_diff_cache_stats
+)
 from .people_ops import refresh_all_people_safe, get_refresh_status
+from .meilisearch_ops import (
+    get_sync_queue_stats, get_meili_client_stats, get_outbox_stats, get_fingerprint_stats
+)
+from .meili_tasks import get_task_tracker_stats
+from .search_reindex import rebuild_search_index_safe, get_reindex_status, is_reindex_running
+from .index_reconciler import get_reconciler_stats
+from .git_maintenance import get_git_maintenance_stats, request_maintenance
+from .config import GIT_MAINTENANCE_ENABLED
+from .work_watcher import get_watcher_stats, get_ingest_stats
 
 
 def handle_admin_registrations(handler):
@@ -307,7 +324,11 @@ def handle_admin_git_failures(handler):
 
 
 def handle_admin_git_health(handler):
-    """Käivitab git fsck ja tagastab tulemuse (admin)."""
+    """Tagastab viimase fsck ja taustahoolduse tulemused (admin).
+
+    action='run' + task (fsck/repack/prune/commit_graph) käivitab ülesande taustal.
+    Kui hooldus on välja lülitatud, käivitatakse fsck kohe (nagu varem).
+    """
     try:
         data = read_request_data(handler)
 
@@ -315,13 +336,31 @@ def handle_admin_git_health(handler):
         if not user:
             return
 
-        result = run_git_fsck()
+        if not GIT_MAINTENANCE_ENABLED:
+            result = run_git_fsck()
+            send_json_response(handler, 200, {
+                "status": "success",
+                "git_ok": result["ok"],
+                "output": result["output"],
+                "errors": result["errors"]
+            })
+            return
+
+        if data.get('action') == 'run':
+            task = data.get('task', 'fsck')
+            if not request_maintenance(task):
+                send_json_response(handler, 400, {"status": "error", "message": f"Tundmatu ülesanne: {task}"})
+                return
 
+        maintenance = get_git_maintenance_stats()
+        fsck = maintenance["tasks"]["fsck"]
         send_json_response(handler, 200, {
             "status": "success",
-            "git_ok": result["ok"],
-            "output": result["output"],
-            "errors": result["errors"]
+            "git_ok": fsck["last_ok"],  # None - stardijärgne kontroll pole veel lõppenud
+            "output": fsck["last_output"],
+            "errors": fsck["last_errors"],
+            "checked_at": fsck["last_started_at"],
+            "maintenance": maintenance
         })
 
     except Exception as e:
@@ -329,6 +368,30 @@ def handle_admin_git_health(handler):
         handler.send_error(500, str(e))
 
 
+def handle_admin_git_writer_status(handler):
+    """Tagastab Giti commitide kirjutaja statistika: järjekord, latentsus, läbilaskevõime (admin)."""
+    try:
+        data = read_request_data(handler)
+
+        user = require_auth(handler, data, min_role='admin')
+        if not user:
+            return
+
+        send_json_response(handler, 200, {
+            "status": "success",
+            **get_commit_writer_stats(),
+            "tracked_paths": get_tracked_paths_stats(),
+            "activity_log": get_activity_log_stats(),
+            "work_caches": get_work_cache_stats(),
+            "cat_file": get_cat_file_stats(),
+            "diff_cache": get_diff_cache_stats()
+        })
+
+    except Exception as e:
+        print(f"GIT WRITER STATUS VIGA: {e}")
+        handler.send_error(500, str(e))
+
+
 def handle_admin_people_refresh(handler):
     """Käivitab isikute aliaste uuendamise taustalõimes (admin)."""
     try:
@@ -372,3 +435,122 @@ def handle_admin_people_refresh_status(handler):
     except Exception as e:
         print(f"PEOPLE REFRESH STATUS VIGA: {e}")
         handler.send_error(500, str(e))
+
+
+def handle_admin_search_index_status(handler):
+    """Tagastab otsinguindeksi sünkroonimise ja Meilisearchi kliendi statistika (admin)."""
+    try:
+        data = read_request_data(handler)
+
+        user = require_auth(handler, data, min_role='admin')
+        if not user:
+            return
+
+        send_json_response(handler, 200, {
+            "status": "success",
+            "sync_queue": get_sync_queue_stats(),
+            "client": get_meili_client_stats(),
+            "tasks": get_task_tracker_stats(),
+            "outbox": get_outbox_stats(),
+            "fingerprints": get_fingerprint_stats(),
+            "reindex": get_reindex_status(),
+            "reconciler": get_reconciler_stats(),
+            "watcher": get_watcher_stats()
+        })
+
+    except Exception as e:
+        print(f"SEARCH INDEX STATUS VIGA: {e}")
+        handler.send_error(500, str(e))
+
+
+def handle_admin_search_reindex(handler):
+    """Käivitab otsinguindeksi täieliku ümberehituse taustalõimes (admin).
+
+    Uus indeks ehitatakse kõrvale ja vahetatakse välja, otsing töötab kogu aja.
+    """
+    try:
+        data = read_request_data(handler)
+
+        user = require_auth(handler, data, min_role='admin')
+        if not user:
+            return
+
+        if is_reindex_running():
+            send_json_response(handler, 409, {
+                "status": "error",
+                "message": "Indeksi ümberehitus juba käib",
+                **get_reindex_status()
+            })
+            return
+
+        import threading
+        thread = threading.Thread(target=rebuild_search_index_safe, daemon=True, name="search_reindex")
+        thread.start()
+
+        print(f"Admin '{user['username']}' käivitas otsinguindeksi ümberehituse")
+
+        send_json_response(handler, 200, {
+            "status": "success",
+            "message": "Indeksi ümberehitus käivitatud"
+        })
+
+    except Exception as e:
+        print(f"SEARCH REINDEX VIGA: {e}")
+        handler.send_error(500, str(e))
+
+
+def handle_admin_search_reindex_status(handler):
+    """Tagastab otsinguindeksi ümberehituse staatuse ja edenemise (admin)."""
+    try:
+        data = read_request_data(handler)
+
+        user = require_auth(handler, data, min_role='admin')
+        if not user:
+            return
+
+        send_json_response(handler, 200, {
+            "status": "success",
+            **get_reindex_status()
+        })
+
+    except Exception as e:
+        print(f"SEARCH REINDEX STATUS VIGA: {e}")
+        handler.send_error(500, str(e))
+
+
+def handle_admin_index_reconcile_status(handler):
+    """Tagastab indeksi taustavõrdluse viimase ringi statistika (admin)."""
+    try:
+        data = read_request_data(handler)
+
+        user = require_auth(handler, data, min_role='admin')
+        if not user:
+            return
+
+        send_json_response(handler, 200, {
+            "status": "success",
+            **get_reconciler_stats()
+        })
+
+    except Exception as e:
+        print(f"INDEX RECONCILE STATUS VIGA: {e}")
+        handler.send_error(500, str(e))
+
+
+def handle_admin_ingest_status(handler):
+    """Tagastab uute teoste sisselugemise konveieri progressi (admin)."""
+    try:
+        data = read_request_data(handler)
+
+        user = require_auth(handler, data, min_role='admin')
+        if not user:
+            return
+
+        send_json_response(handler, 200, {
+            "status": "success",
+            **get_ingest_stats()
+        })
+
+    except Exception as e:
+        print(f"INGEST STATUS VIGA: {e}")
+        handler.send_error(500, str(e))
@@ -12,7 +12,7 @@ import json
 from .http_helpers import send_json_response, read_request_data, require_auth
 from .utils import find_directory_by_id, metadata_lock
 from .git_ops import save_with_git
-from .meilisearch_ops import sync_work_to_meilisearch_async
+from .meilisearch_ops import sync_work_metadata_to_meilisearch_async
 from .config import BASE_DIR, COLLECTIONS_FILE
 
 
@@ -98,7 +98,7 @@ def handle_bulk_tags(handler):
                         message=f"Märksõnad: {os.path.basename(dir_path)}"
                     )
 
-                sync_work_to_meilisearch_async(os.path.basename(dir_path))
+                sync_work_metadata_to_meilisearch_async(os.path.basename(dir_path))
                 updated += 1
 
             except Exception as e:
@@ -168,7 +168,7 @@ def handle_bulk_genre(handler):
                         message=f"Žanr: {os.path.basename(dir_path)}"
                     )
 
-                sync_work_to_meilisearch_async(os.path.basename(dir_path))
+                sync_work_metadata_to_meilisearch_async(os.path.basename(dir_path))
                 updated += 1
 
             except Exception as e:
@@ -250,7 +250,7 @@ def handle_bulk_collection(handler):
                     )
 
                 # Sünkrooni Meilisearchiga (taustal)
-                sync_work_to_meilisearch_async(os.path.basename(dir_path))
+                sync_work_metadata_to_meilisearch_async(os.path.basename(dir_path))
 
                 updated += 1
 
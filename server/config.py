@@ -68,6 +68,11 @@ PENDING_EDITS_FILE = os.path.join(_STATE_DIR, "pending_edits.json")
 COLLECTIONS_FILE = os.path.join(_STATE_DIR, "collections.json")
 VOCABULARIES_FILE = os.path.join(_STATE_DIR, "vocabularies.json")
 PEOPLE_FILE = os.path.join(_STATE_DIR, "people.json")
+INDEX_OUTBOX_FILE = os.path.join(_STATE_DIR, "index_outbox.jsonl")
+DOC_FINGERPRINTS_FILE = os.path.join(_STATE_DIR, "doc_fingerprints.sqlite")
+WORK_SNAPSHOTS_FILE = os.path.join(_STATE_DIR, "work_snapshots.sqlite")
+GIT_JOURNAL_FILE = os.path.join(_STATE_DIR, "git_journal.jsonl")
+ACTIVITY_LOG_FILE = os.path.join(_STATE_DIR, "activity_log.sqlite")
 
 # =========================================================
 # SERVERI SEADED
@@ -118,6 +123,61 @@ MEILI_URL = os.getenv("MEILISEARCH_URL")
 MEILI_KEY = os.getenv("MEILISEARCH_MASTER_KEY") or os.getenv("MEILI_MASTER_KEY")
 INDEX_NAME = "teosed"
 
+# Meilisearchi ühenduste pool'i suurus (jagatud sünkroonimise lõimede pool'iga)
+# Max 10 samaaegset päringut - rohkem tekitaks Meilisearchile liiga suure koormuse
+MEILI_POOL_SIZE = 10
+
+# Sama teose sünkroonimispäringud koondatakse selle akna jooksul üheks (sekundites)
+MEILI_SYNC_DEBOUNCE_SECONDS = float(os.getenv("VUTT_MEILI_SYNC_DEBOUNCE", "2.0"))
+
+# Taustal jooksev indeksi ja failisüsteemi võrdlus (vt server/index_reconciler.py)
+RECONCILE_ENABLED = os.getenv("VUTT_RECONCILE", "1") != "0"
+# Failisüsteemist loetavate baitide eelarve sekundis (teose kontrolli järel oodatakse vastavalt)
+RECONCILE_IO_BUDGET_BYTES = int(os.getenv("VUTT_RECONCILE_IO_BUDGET", str(2 * 1024 * 1024)))
+# Paus täisringide vahel (sekundites)
+RECONCILE_PASS_INTERVAL_SECONDS = float(os.getenv("VUTT_RECONCILE_INTERVAL", "3600"))
+
+# Teose info ja piltide nimekirja cache'ide maksimaalne kirjete arv (vt server/git_ops.py)
+WORK_CACHE_MAX_ENTRIES = int(os.getenv("VUTT_WORK_CACHE_SIZE", "2048"))
+
+# Giti commitide kirjutaja (vt server/git_writer.py)
+# Kaua committer pärast esimest salvestust teisi ootab, et need ühte commitisse koondada (sekundites)
+GIT_COMMIT_BATCH_WINDOW_SECONDS = float(os.getenv("VUTT_GIT_COMMIT_WINDOW", "0.05"))
+# Maksimaalne salvestuste arv ühes committer'i partiis
+GIT_COMMIT_MAX_BATCH = int(os.getenv("VUTT_GIT_COMMIT_BATCH", "100"))
+# Kaua sünkroonsed salvestajad (nt bulk-operatsioonid) commiti valmimist ootavad (sekundites)
+GIT_COMMIT_WAIT_TIMEOUT = float(os.getenv("VUTT_GIT_COMMIT_WAIT", "30"))
+# Ebaõnnestunud commiti uue katse viivitus (sekundites, kahekordistub kuni ülempiirini)
+GIT_COMMIT_RETRY_SECONDS = float(os.getenv("VUTT_GIT_COMMIT_RETRY", "5"))
+GIT_COMMIT_RETRY_MAX_SECONDS = float(os.getenv("VUTT_GIT_COMMIT_RETRY_MAX", "300"))
+# Mitu korda commitit proovitakse, enne kui salvestused märgitakse ebaõnnestunuks
+GIT_COMMIT_MAX_ATTEMPTS = int(os.getenv("VUTT_GIT_COMMIT_MAX_ATTEMPTS", "5"))
+
+# Püsivate `git cat-file --batch` protsesside arv ajaloo lugemiseks (vt server/git_cat_file.py)
+GIT_CAT_FILE_WORKERS = int(os.getenv("VUTT_GIT_CAT_FILE_WORKERS", "2"))
+
+# Diffide ja ajaloo failisisu mälu-cache'i maht megabaitides (vt server/git_ops.py)
+GIT_DIFF_CACHE_BYTES = int(float(os.getenv("VUTT_GIT_DIFF_CACHE_MB", "32")) * 1024 * 1024)
+
+# Giti hooldus (vt server/git_maintenance.py): fsck pärast starti, repack, commit-graph, prune
+GIT_MAINTENANCE_ENABLED = os.getenv("VUTT_GIT_MAINTENANCE", "1") != "0"
+# Vaikse aja tunnid (kohalik aeg, "algus-lõpp"), tühi = igal ajal
+GIT_MAINTENANCE_HOURS = os.getenv("VUTT_GIT_MAINTENANCE_HOURS", "1-5")
+# Kaua pärast viimast salvestust hooldust alustatakse (sekundites)
+GIT_MAINTENANCE_IDLE_SECONDS = float(os.getenv("VUTT_GIT_MAINTENANCE_IDLE", "300"))
+
+# Uute teoste sisselugemise konveier (vt server/ingest_pipeline.py)
+# Iga etapi järjekorra maksimaalne pikkus (täis järjekord peatab eelmise etapi)
+INGEST_QUEUE_SIZE = int(os.getenv("VUTT_INGEST_QUEUE_SIZE", "64"))
+# Paralleelsed lõimed metaandmete ja pisipiltide etapis
+INGEST_METADATA_WORKERS = int(os.getenv("VUTT_INGEST_METADATA_WORKERS", "2"))
+INGEST_THUMBNAIL_WORKERS = int(os.getenv("VUTT_INGEST_THUMBNAIL_WORKERS", "2"))
+# Mitu teost ühes Giti commitis ja ühes Meilisearchi taskis
+INGEST_GIT_BATCH = int(os.getenv("VUTT_INGEST_GIT_BATCH", "50"))
+INGEST_INDEX_BATCH = int(os.getenv("VUTT_INGEST_INDEX_BATCH", "20"))
+# Kaua partii täitumist oodatakse (sekundites)
+INGEST_BATCH_WINDOW_SECONDS = float(os.getenv("VUTT_INGEST_BATCH_WINDOW", "2.0"))
+
 def load_env_file():
     """
     Laeb .env failist seaded, kui süsteemi muutujad puuduvad.
@@ -0,0 +1,232 @@
+"""
+Otsinguindeksi dokumentide sõrmejäljed.
+
+Hoiab iga Meilisearchi dokumendi (lehekülje) kohta viimati edukalt
+indekseeritud sisu räsi (state/doc_fingerprints.sqlite). Sünk võrdleb
+äsja koostatud dokumente salvestatud räsidega ja saadab ainult
+muutunud dokumendid. Teose alt kadunud ID-d (nt eemaldatud lehekülg või
+muutunud teose ID) tagastatakse kustutamiseks.
+
+Sama räsi salvestatakse ka dokumendi enda välja content_hash, nii et
+scripts/sync_meilisearch.py --content saab võrrelda oodatavat sisu otse
+indeksis olevaga (ka siis, kui kohalik räside fail ei vasta indeksile).
+
+Räsi koosneb kahest osast: lehekülje väljad (PAGE_FIELDS) ja teose
+väljad (kõik ülejäänud, sh teose_staatus). Osaline uuendus muudab ainult
+teose välju, seega saab uue content_hash'i arvutada lehekülje osa
+räsist (serveris cache'itud) ilma lehekülje faile uuesti lugemata.
+
+SQLite on valitud seetõttu, et sama faili kasutavad nii server kui
+scripts/sync_meilisearch.py ning ühe teose räside uuendamine ei nõua
+kogu faili ümberkirjutamist.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+# NB: ainult standardteek - moodulit laaditakse ka ilma server paketita
+# (vt search_documents.py, scripts/2-1_upload_to_meili.py)
+logger = logging.getLogger(__name__)
+
+# Dokumendi väli, kuhu sisu räsi indeksis salvestatakse
+CONTENT_HASH_FIELD = 'content_hash'
+
+
+# Lehekülje tasandi väljad - osalised uuendused (teose metaandmed, teose_staatus) neid ei muuda
+PAGE_FIELDS = frozenset({
+    'id', 'lehekylje_number', 'lehekylje_tekst', 'text_content', 'lehekylje_pilt', 'status',
+    'page_tags', 'page_tags_et', 'page_tags_en', 'page_tags_suggest_et', 'page_tags_suggest_en',
+    'page_tags_object', 'comments', 'history', 'last_modified',
+})
+
+
+def _digest(fields):
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def page_fingerprint(document):
+    """Dokumendi lehekülje väljade (PAGE_FIELDS) räsi."""
+    return _digest({k: v for k, v in document.items() if k in PAGE_FIELDS})
+
+
+def work_fingerprint(document):
+    """Dokumendi teose väljade (kõik peale PAGE_FIELDS ja content_hash'i) räsi.
+
+    Sobib ka ainult teose väljadega dict (nt osalise uuenduse jaoks).
+    """
+    return _digest({k: v for k, v in document.items()
+                    if k not in PAGE_FIELDS and k != CONTENT_HASH_FIELD})
+
+
+def combine_fingerprints(page_hash, work_hash):
+    """Lehekülje ja teose osa räsidest dokumendi content_hash."""
+    return hashlib.blake2b(f"{page_hash}:{work_hash}".encode('ascii'), digest_size=16).hexdigest()
+
+
+def document_fingerprint(document):
+    """Tagastab dokumendi sisu stabiilse räsi (võtmete järjekorrast sõltumatu).
+
+    content_hash välja ennast räsi ei arvesta.
+    """
+    return combine_fingerprints(page_fingerprint(document), work_fingerprint(document))
+
+
+def stamp_content_hash(documents):
+    """Lisab igale dokumendile content_hash välja (dokumendi lõplikul kujul)."""
+    for doc in documents:
+        doc[CONTENT_HASH_FIELD] = document_fingerprint(doc)
+    return documents
+
+
+def content_hash(document):
+    """Dokumendi räsi - kasutab juba arvutatud content_hash välja, kui see on olemas."""
+    return document.get(CONTENT_HASH_FIELD) or document_fingerprint(document)
+
+
+class FingerprintStore:
+    """Püsiv dokumendi ID -> sisu räsi hoidla (teose kausta kaupa).
+
+    Räsid salvestatakse alles pärast seda, kui Meilisearch on dokumendid
+    edukalt töödelnud (commit), nii et ebaõnnestunud sünk saadetakse
+    järgmisel korral uuesti.
+
+    Args:
+        path: SQLite faili tee (serveris config.DOC_FINGERPRINTS_FILE)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stats = {
+            "checked": 0,
+            "skipped": 0,
+            "sent": 0,
+            "deleted": 0,
+            "invalidated": 0,
+            "errors": 0,
+        }
+
+    def _connect(self):
+        """Avab ühenduse esimesel kasutamisel (eeldab et lukk on võetud)."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            # WAL: skript ja server saavad samaaegselt lugeda/kirjutada
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                "doc_id TEXT PRIMARY KEY, dir_name TEXT NOT NULL, hash TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS fingerprints_dir ON fingerprints(dir_name)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def diff(self, dir_name, documents, complete=True):
+        """Leiab teose dokumentidest need, mille sisu on muutunud.
+
+        Args:
+            dir_name: Teose kausta nimi
+            documents: Teose äsja koostatud dokumendid
+            complete: Kas documents sisaldab teose kõiki lehekülgi (muidu kadunud ID-sid ei otsita)
+
+        Returns:
+            (changed, hashes, stale_ids):
+                changed - dokumendid, mida tuleb saata
+                hashes - {doc_id: räsi} kõigi dokumentide jaoks (commit'i jaoks)
+                stale_ids - ID-d, mis olid teose all salvestatud, aga enam ei ole
+        """
+        hashes = {doc['id']: content_hash(doc) for doc in documents}
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT doc_id, hash FROM fingerprints WHERE dir_name = ?", (dir_name,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            # Räside viga ei tohi sünki takistada - saadame kõik
+            self._count("errors")
+            logger.error(f"Sõrmejälgede lugemine ebaõnnestus: {e}")
+            rows = []
+
+        stored = dict(rows)
+        changed = [doc for doc in documents if stored.get(doc['id']) != hashes[doc['id']]]
+        stale_ids = sorted(set(stored) - set(hashes)) if complete else []
+
+        with self._lock:
+            self._stats["checked"] += len(documents)
+            self._stats["skipped"] += len(documents) - len(changed)
+            self._stats["sent"] += len(changed)
+            self._stats["deleted"] += len(stale_ids)
+        return changed, hashes, stale_ids
+
+    def commit(self, dir_name, hashes, removed_ids=()):
+        """Salvestab edukalt indekseeritud dokumentide räsid ja eemaldab kustutatud ID-d."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    if removed_ids:
+                        conn.executemany(
+                            "DELETE FROM fingerprints WHERE doc_id = ?", [(i,) for i in removed_ids]
+                        )
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO fingerprints (doc_id, dir_name, hash) VALUES (?, ?, ?)",
+                        [(doc_id, dir_name, h) for doc_id, h in hashes.items()]
+                    )
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.error(f"Sõrmejälgede salvestamine ebaõnnestus: {e}")
+
+    def invalidate(self, doc_ids=None, dir_name=None):
+        """Unustab räsid (nt pärast osalist uuendust, mis muutis dokumenti indeksis).
+
+        Järgmine sünk saadab need dokumendid kindlasti uuesti.
+        """
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    if dir_name is not None:
+                        cursor = conn.execute("DELETE FROM fingerprints WHERE dir_name = ?", (dir_name,))
+                    else:
+                        cursor = conn.executemany(
+                            "DELETE FROM fingerprints WHERE doc_id = ?", [(i,) for i in doc_ids or ()]
+                        )
+                self._stats["invalidated"] += max(cursor.rowcount, 0)
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.error(f"Sõrmejälgede kustutamine ebaõnnestus: {e}")
+
+    def clear(self):
+        """Kustutab kõik räsid (nt pärast indeksi täielikku ümberehitust)."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("DELETE FROM fingerprints")
+        except sqlite3.Error as e:
+            self._count("errors")
+            logger.error(f"Sõrmejälgede tühjendamine ebaõnnestus: {e}")
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def get_stats(self):
+        """Tagastab statistika (kontrollitud/vahele jäetud dokumendid, skip rate)."""
+        try:
+            with self._lock:
+                stored = self._connect().execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        except sqlite3.Error:
+            stored = None
+        with self._lock:
+            stats = dict(self._stats)
+        stats["stored"] = stored
+        stats["skip_rate"] = round(stats["skipped"] / stats["checked"], 3) if stats["checked"] else 0.0
+        return stats
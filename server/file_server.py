@@ -13,7 +13,8 @@ from datetime import datetime
 # Impordi kõik vajalik server/ moodulitest
 from server import (
     # Konfiguratsioon
-    BASE_DIR, PORT, SESSION_DURATION, COLLECTIONS_FILE, VOCABULARIES_FILE,
+    BASE_DIR, PORT, SESSION_DURATION, COLLECTIONS_FILE, VOCABULARIES_FILE, RECONCILE_ENABLED,
+    GIT_MAINTENANCE_ENABLED,
     # CORS
     send_cors_headers,
     # HTTP helperid
@@ -29,21 +30,25 @@ from server import (
     handle_pending_edits_check, handle_pending_edits_approve,
     handle_pending_edits_reject,
     # Git
-    save_with_git, get_recent_commits, run_git_fsck,
+    save_with_git, get_recent_activity, run_git_fsck, start_git_writer, load_tracked_paths,
+    begin_activity_backfill, backfill_activity_log, ensure_commit_graph,
     # Git HTTP handlerid
     handle_backups, handle_restore, handle_git_history,
-    handle_git_restore, handle_git_diff, handle_commit_diff,
+    handle_git_restore, handle_git_diff, handle_commit_diff, handle_git_commit_status,
     # Admin HTTP handlerid
     handle_admin_registrations, handle_admin_registrations_approve,
     handle_admin_registrations_reject, handle_admin_users,
     handle_admin_users_update_role, handle_admin_users_delete,
     handle_invite_set_password,
-    handle_admin_git_failures, handle_admin_git_health,
+    handle_admin_git_failures, handle_admin_git_health, handle_admin_git_writer_status,
     handle_admin_people_refresh, handle_admin_people_refresh_status,
+    handle_admin_search_index_status, handle_admin_search_reindex, handle_admin_search_reindex_status,
+    handle_admin_index_reconcile_status, handle_admin_ingest_status,
     # Bulk operatsioonide HTTP handlerid
     handle_bulk_tags, handle_bulk_genre, handle_bulk_collection,
     # Meilisearch
-    sync_work_to_meilisearch, sync_work_to_meilisearch_async, metadata_watcher_loop,
+    sync_work_metadata_to_meilisearch_async, sync_page_to_meilisearch_async, wait_for_sync, metadata_watcher_loop,
+    outbox_replay_loop, reconcile_loop, maintenance_loop,
     # People/Authors
     load_people_data, process_creators_metadata, update_person_async, people_refresh_loop,
     # Utils
@@ -397,7 +402,7 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
         self.end_headers()
 
     def do_GET(self):
-        # GET /recent-edits - viimased muudatused (Git-põhine)
+        # GET /recent-edits - viimased muudatused (muudatuste logist, kursoriga lehitsemine)
         if self.path.startswith('/recent-edits'):
             try:
                 # Parsi query parameetrid
@@ -421,7 +426,14 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
 
                 # Admin näeb kõiki, tavaline kasutaja ainult oma muudatusi
                 filter_user = params.get('user', [None])[0]
-                limit = int(params.get('limit', [30])[0])
+                filter_work = params.get('work_id', [None])[0]
+                try:
+                    limit = max(1, min(int(params.get('limit', [30])[0]), 200))
+                    before = params.get('before', [None])[0]
+                    before = int(before) if before else None
+                except ValueError:
+                    send_json_response(self, 400, {"status": "error", "message": "Vigane limit või before"})
+                    return
 
                 # Kui pole admin ja üritab teiste muudatusi vaadata
                 if not is_admin and filter_user and filter_user != current_user.get('username'):
@@ -431,12 +443,17 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
                 if not is_admin and not filter_user:
                     filter_user = current_user.get('username')
 
-                # Hangi commitid
-                commits = get_recent_commits(username=filter_user, limit=limit)
+                # Hangi muudatused (next_cursor -> järgmise lehe `before`)
+                activity = get_recent_activity(
+                    username=filter_user, work_id=filter_work, limit=limit, before=before
+                )
 
                 send_json_response(self, 200, {
                     "status": "success",
-                    "commits": commits,
+                    "commits": activity["commits"],
+                    "next_cursor": activity["next_cursor"],
+                    "has_more": activity["next_cursor"] is not None,
+                    "backfilling": activity["backfilling"],
                     "is_admin": is_admin,
                     "filtered_by": filter_user
                 })
@@ -675,16 +692,18 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
                     additional_files.append((json_path, json_content))
                     json_saved = True
 
-                # Salvestame failid ja teeme Git commiti
+                # Salvestame failid; Git commit tehakse taustal (vt server/git_writer.py),
+                # vastuses on ootel commiti ID (/git-commit-status)
                 git_result = save_with_git(
                     filepath=txt_path,
                     content=text_content,
                     username=user['username'],
-                    additional_files=additional_files if additional_files else None
+                    additional_files=additional_files if additional_files else None,
+                    wait=False
                 )
 
                 if git_result.get("success"):
-                    print(f"Salvestatud (Git): {txt_path} + {len(additional_files)} lisafaili -> {git_result.get('commit_hash', '')[:8]}")
+                    print(f"Salvestatud (Git järjekorras): {txt_path} + {len(additional_files)} lisafaili -> #{git_result.get('commit_id')}")
                 else:
                     print(f"Git commit ebaõnnestus: {git_result.get('error')}")
                     # Fallback: salvestame failid ilma Gitita
@@ -698,11 +717,14 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
                     print(f"Salvestatud (ilma Gitita): {txt_path}")
 
                 # Sünkrooni Meilisearchiga TAUSTAL (kasutaja ei oota)
-                sync_work_to_meilisearch_async(safe_catalog)
+                # Ainult muudetud lehekülg - teose koondstaatus tuleb cache'ist
+                sync_page_to_meilisearch_async(safe_catalog, safe_filename)
 
                 response = {
                     "status": "success",
-                    "commit_hash": git_result.get("commit_hash", "")[:8] if git_result.get("success") else None,
+                    "commit_hash": git_result.get("commit_hash", "")[:8] or None if git_result.get("success") else None,
+                    "commit_id": git_result.get("commit_id"),
+                    "commit_pending": git_result.get("pending", False),
                     "is_first_commit": git_result.get("is_first_commit", False),
                     "json_created": json_saved
                 }
@@ -777,14 +799,19 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
                 if isinstance(publisher_obj, dict) and publisher_obj.get('id'):
                     update_person_async(publisher_obj['id'], publisher_obj.get('source'))
 
-                # Sünkrooni Meilisearchiga ENNE vastuse saatmist
+                # Sünkrooni Meilisearchiga teose järjekorra kaudu (ilma debounce'ita).
+                # Lehekülgede tekste ei saadeta - uuendatakse ainult teose välju.
+                # Vaikimisi ootame indekseerimise lõppu; wait_for_index=false korral
+                # vastame kohe ja frontend saab indeksi hiljem uuesti pärida.
                 dir_name = os.path.basename(os.path.dirname(metadata_path))
-                sync_ok = sync_work_to_meilisearch(dir_name)
+                sync_future = sync_work_metadata_to_meilisearch_async(dir_name, immediate=True)
 
                 # Invalideerime suggestions cache, kuna metaandmed muutusid
                 invalidate_cache()
 
-                if sync_ok:
+                if not data.get('wait_for_index', True):
+                    send_json_response(self, 200, {"status": "success", "message": "Metaandmed salvestatud", "index_pending": True})
+                elif wait_for_sync(sync_future):
                     send_json_response(self, 200, {"status": "success", "message": "Metaandmed salvestatud"})
                 else:
                     send_json_response(self, 200, {"status": "success", "message": "Metaandmed salvestatud (otsinguindeksi uuendamine ebaõnnestus)"})
@@ -884,6 +911,9 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
         elif self.path == '/commit-diff':
             handle_commit_diff(self)
 
+        elif self.path == '/git-commit-status':
+            handle_git_commit_status(self)
+
         # =========================================================
         # ADMIN ENDPOINTID (vt server/admin_handlers.py)
         # =========================================================
@@ -912,6 +942,9 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
         elif self.path == '/admin/git-health':
             handle_admin_git_health(self)
 
+        elif self.path == '/admin/git-writer-status':
+            handle_admin_git_writer_status(self)
+
         elif self.path == '/admin/people-refresh':
             handle_admin_people_refresh(self)
             invalidate_cache()  # People cache invalideerumine
@@ -919,6 +952,21 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
         elif self.path == '/admin/people-refresh-status':
             handle_admin_people_refresh_status(self)
 
+        elif self.path == '/admin/search-index-status':
+            handle_admin_search_index_status(self)
+
+        elif self.path == '/admin/search-reindex':
+            handle_admin_search_reindex(self)
+
+        elif self.path == '/admin/search-reindex-status':
+            handle_admin_search_reindex_status(self)
+
+        elif self.path == '/admin/index-reconcile-status':
+            handle_admin_index_reconcile_status(self)
+
+        elif self.path == '/admin/ingest-status':
+            handle_admin_ingest_status(self)
+
         elif self.path == '/invite/set-password':
             handle_invite_set_password(self)
 
@@ -989,14 +1037,42 @@ if __name__ == '__main__':
     # Ehita Work ID cache kiiremaks failide leidmiseks
     build_work_id_cache()
 
-    # Kontrolli git repo terviklikkust stardil
-    print("Git repo terviklikkuse kontroll...")
-    fsck_result = run_git_fsck()
-    if fsck_result["ok"]:
-        print("Git repo terviklikkus: OK")
-    else:
-        print(f"HOIATUS: Git repo terviklikkuse kontroll leidis vigu!")
-        print(f"  Vead: {fsck_result['errors']}")
+    # Kontrolli git repo terviklikkust stardil (hoolduse sisselülitamisel taustal, vt allpool)
+    if not GIT_MAINTENANCE_ENABLED:
+        print("Git repo terviklikkuse kontroll...")
+        fsck_result = run_git_fsck()
+        if fsck_result["ok"]:
+            print("Git repo terviklikkus: OK")
+        else:
+            print(f"HOIATUS: Git repo terviklikkuse kontroll leidis vigu!")
+            print(f"  Vead: {fsck_result['errors']}")
+
+    # Giti jälgitavad failid (kas salvestusele eelneb "Originaal OCR" commit, ilma ajalugu läbimata)
+    load_tracked_paths()
+
+    # Muudatuste logi (/recent-edits) - esimesel käivitusel täidetakse Giti ajaloost (taustal)
+    if begin_activity_backfill():
+        threading.Thread(target=backfill_activity_log, daemon=True, name="activity_backfill").start()
+
+    # Taasta Giti päevikust commitimata salvestused ja käivita committer-lõim
+    start_git_writer()
+
+    # Commit-graph ajaloo päringute kiirendamiseks (esimesel käivitusel, taustal)
+    threading.Thread(target=ensure_commit_graph, daemon=True, name="commit_graph").start()
+
+    # Käivita indeksi outboxi replay (stardil + pärast Meilisearchi katkestusi)
+    outbox_thread = threading.Thread(target=outbox_replay_loop, daemon=True)
+    outbox_thread.start()
+
+    # Käivita Giti taustahooldus (fsck pärast starti, repack/prune/commit-graph vaiksel ajal)
+    if GIT_MAINTENANCE_ENABLED:
+        maintenance_thread = threading.Thread(target=maintenance_loop, daemon=True, name="git_maintenance")
+        maintenance_thread.start()
+
+    # Käivita indeksi ja failisüsteemi taustavõrdlus (madala prioriteediga)
+    if RECONCILE_ENABLED:
+        reconcile_thread = threading.Thread(target=reconcile_loop, daemon=True, name="index_reconciler")
+        reconcile_thread.start()
 
     # Käivita metaandmete jälgija taustalõimena
     watcher_thread = threading.Thread(target=metadata_watcher_loop, daemon=True)
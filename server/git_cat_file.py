@@ -0,0 +1,148 @@
+"""
+Püsivad `git cat-file --batch` protsessid ajaloo lugemiseks.
+
+Versiooniajaloo sirvimine (/git-restore, ajaloo vaated) küsib faili sisu
+kindlast commitist. Varem käivitati iga päringu jaoks uus `git show`
+protsess; nüüd hoitakse väikest pooli pikaajalisi `git cat-file --batch`
+protsesse, millele kirjutatakse `<commit>:<tee>` ja loetakse vastus toru
+kaudu. Iga protsessi kasutab korraga üks lõim (pool annab protsessi
+laenuks); katkenud protsess käivitatakse järgmisel päringul uuesti.
+
+cat-file näeb ka pärast protsessi käivitamist lisatud objekte (uued
+commitid), sest puuduva objekti korral loetakse objektide kaust uuesti.
+"""
+import queue
+import subprocess
+import threading
+import time
+
+from .config import GIT_CAT_FILE_WORKERS, get_logger
+
+logger = get_logger(__name__)
+
+
+class CatFileError(Exception):
+    """cat-file protsess katkes või vastas ootamatult."""
+
+
+class _CatFileProcess:
+    """Üks `git cat-file --batch` protsess (käivitatakse esimesel päringul)."""
+
+    def __init__(self, repo_dir):
+        self.repo_dir = repo_dir
+        self._proc = None
+
+    def _ensure(self):
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.repo_dir,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            return True
+        return False
+
+    def read(self, rev):
+        """Tagastab (tüüp, sisu baitidena) või None, kui objekti pole.
+
+        Returns:
+            tuple: (spawned, tulemus) - spawned on True, kui protsess käivitati
+        """
+        spawned = self._ensure()
+        try:
+            self._proc.stdin.write(rev.encode('utf-8') + b'\n')
+            self._proc.stdin.flush()
+            header = self._proc.stdout.readline()
+            if not header:
+                raise CatFileError("cat-file protsess lõpetas")
+            parts = header.rstrip(b'\n').split(b' ')
+            # "<rev> missing" / "<rev> ambiguous"
+            if len(parts) != 3:
+                return spawned, None
+            _sha, obj_type, size = parts
+            data = self._proc.stdout.read(int(size))
+            self._proc.stdout.read(1)  # Sisu järel on reavahetus
+            if len(data) != int(size):
+                raise CatFileError("cat-file vastus jäi poolikuks")
+            return spawned, (obj_type.decode('ascii'), data)
+        except (OSError, ValueError, CatFileError):
+            self.close()
+            raise
+
+    def close(self):
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+                self._proc.wait(timeout=5)
+            except Exception:
+                pass
+            self._proc = None
+
+
+class CatFilePool:
+    """Väike pool `git cat-file --batch` protsesse.
+
+    Args:
+        repo_dir: Giti repo kaust
+        size: Protsesside arv (samaaegsed lugejad)
+    """
+
+    def __init__(self, repo_dir, size=GIT_CAT_FILE_WORKERS):
+        self.repo_dir = repo_dir
+        self.size = max(1, size)
+        self._idle = queue.Queue()
+        for _ in range(self.size):
+            self._idle.put(_CatFileProcess(repo_dir))
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "missing": 0, "errors": 0, "spawned": 0, "seconds": 0.0}
+
+    def read_blob(self, commit_hash, relative_path):
+        """Tagastab faili sisu baitidena commitist või None, kui faili pole.
+
+        Raises:
+            CatFileError: Kui protsess katkes ka pärast uuesti käivitamist
+        """
+        rev = f"{commit_hash}:{relative_path}"
+        if '\n' in rev:
+            return None
+
+        started = time.monotonic()
+        worker = self._idle.get()
+        spawned = 0
+        try:
+            # Üks kordus: protsess võis vahepeal lõppeda (nt repo gc)
+            for attempt in range(2):
+                try:
+                    was_spawned, result = worker.read(rev)
+                    spawned += was_spawned
+                    break
+                except (OSError, ValueError, CatFileError) as e:
+                    if attempt:
+                        with self._lock:
+                            self._stats["errors"] += 1
+                            self._stats["spawned"] += spawned
+                        raise CatFileError(str(e)) from e
+                    logger.warning(f"cat-file protsess katkes, käivitan uuesti: {e}")
+        finally:
+            self._idle.put(worker)
+
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["spawned"] += spawned
+            self._stats["seconds"] += time.monotonic() - started
+            if result is None or result[0] != 'blob':
+                self._stats["missing"] += 1
+        if result is None or result[0] != 'blob':
+            return None
+        return result[1]
+
+    def get_stats(self):
+        """Tagastab päringute arvu, keskmise aja ja protsesside käivitamiste arvu."""
+        with self._lock:
+            stats = dict(self._stats)
+        total_seconds = stats.pop("seconds")
+        stats["avg_ms"] = round(total_seconds * 1000 / stats["requests"], 2) if stats["requests"] else None
+        stats["workers"] = self.size
+        return stats
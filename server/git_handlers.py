@@ -4,10 +4,11 @@ Git ja backup HTTP handlerid.
 Eraldatud file_server.py-st. Sisaldab:
 - /backups - varukoopiate loetelu
 - /restore - varukoopia taastamine
-- /git-history - Git ajaloo päring
+- /git-history - Git ajaloo päring (kursoriga lehitsemine)
 - /git-restore - Git versiooni taastamine
 - /git-diff - Kahe commiti diff
 - /commit-diff - Ühe commiti diff
+- /git-commit-status - Ootel commiti olek (salvestus tagastab commit_id)
 """
 import os
 import glob
@@ -17,7 +18,8 @@ from datetime import datetime
 
 from .http_helpers import send_json_response, read_request_data, require_auth
 from .git_ops import (
-    get_file_git_history, get_file_at_commit, get_file_diff, get_commit_diff
+    get_file_history_page, get_file_at_commit, get_file_diff, get_commit_diff,
+    get_commit_status
 )
 from .cors import send_cors_headers
 from .config import BASE_DIR
@@ -195,13 +197,26 @@ def handle_git_history(handler):
 
         files_to_check = [txt_path, json_path]
 
+        # Lehitsemine: cursor = eelmise vastuse next_cursor
+        cursor = data.get('cursor') or None
+        try:
+            limit = max(1, min(int(data.get('limit', 50)), 200))
+        except (TypeError, ValueError):
+            limit = 50
+
         # Küsime Git ajaloo mõlema faili jaoks
-        history = get_file_git_history(files_to_check, max_count=50)
+        try:
+            page = get_file_history_page(files_to_check, limit=limit, cursor=cursor)
+        except ValueError:
+            handler.send_error(400, "Vigane 'cursor'")
+            return
 
         send_json_response(handler, 200, {
             "status": "success",
-            "history": history,
-            "total": len(history)
+            "history": page["history"],
+            "total": len(page["history"]),
+            "next_cursor": page["next_cursor"],
+            "has_more": page["next_cursor"] is not None
         })
 
     except Exception as e:
@@ -333,3 +348,35 @@ def handle_commit_diff(handler):
     except Exception as e:
         print(f"COMMIT-DIFF VIGA: {e}")
         handler.send_error(500, str(e))
+
+
+def handle_git_commit_status(handler):
+    """Ootel commitide olek ID järgi (/save tagastab commit_id enne commiti valmimist)."""
+    try:
+        data = read_request_data(handler)
+
+        user = require_auth(handler, data, min_role='editor')
+        if not user:
+            return
+
+        commit_ids = data.get('commit_ids')
+        if commit_ids is None and data.get('commit_id') is not None:
+            commit_ids = [data.get('commit_id')]
+        if not isinstance(commit_ids, list) or not commit_ids:
+            handler.send_error(400, "Puudub 'commit_id' või 'commit_ids'")
+            return
+
+        try:
+            commit_ids = [int(commit_id) for commit_id in commit_ids[:100]]
+        except (TypeError, ValueError):
+            handler.send_error(400, "Vigane 'commit_id'")
+            return
+
+        send_json_response(handler, 200, {
+            "status": "success",
+            "commits": {str(commit_id): get_commit_status(commit_id) for commit_id in commit_ids}
+        })
+
+    except Exception as e:
+        print(f"GIT-COMMIT-STATUS VIGA: {e}")
+        handler.send_error(500, str(e))
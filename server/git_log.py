@@ -0,0 +1,73 @@
+"""
+`git log` väljundi voogedastus.
+
+Ajalugu loetakse otse `git log --format=...` torust ja parsitakse kirje
+haaval, ilma GitPythoni commit-objekte loomata. Kui kutsuja lõpetab
+lugemise varem (nt lehekülg täis), lõpetatakse ka git protsess, nii et
+ülejäänud ajalugu läbi ei käida.
+"""
+import subprocess
+
+# Kirjete ja väljade eraldajad git log väljundis
+_RECORD_SEP = '\x1e'
+_FIELD_SEP = '\x1f'
+
+# Väljade nimed -> git log --format kohatäited
+FIELDS = {
+    "hash": "%H",
+    "author": "%an",
+    "date": "%cI",
+    "message": "%B",
+}
+
+
+def iter_git_log(repo_dir, args=(), fields=("hash", "author", "date", "message"), name_only=False):
+    """Voogedastab `git log` kirjeid.
+
+    Args:
+        repo_dir: Giti repo kaust
+        args: Täiendavad argumendid (nt ["-n", "51", "--", "tee"])
+        fields: Väljad FIELDS hulgast
+        name_only: Kas lisada muudetud failid (võti "paths")
+
+    Yields:
+        dict: väli -> väärtus (sõnum ilma lõpu tühikuteta)
+    """
+    fmt = _RECORD_SEP + _FIELD_SEP.join(FIELDS[field] for field in fields) + _FIELD_SEP
+    command = ["git", "-c", "core.quotePath=false", "log", f"--format={fmt}"]
+    if name_only:
+        command += ["--no-renames", "--name-only"]
+    # Pathspec peab jääma viimaseks ("--" järele)
+    command += list(args)
+
+    proc = subprocess.Popen(
+        command, cwd=repo_dir, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        text=True, encoding='utf-8', errors='replace'
+    )
+    buffer = ''
+    try:
+        while True:
+            chunk = proc.stdout.read(64 * 1024)
+            if chunk:
+                records = (buffer + chunk).split(_RECORD_SEP)
+                # Viimane kirje võib olla poolik - oota järgmist tükki
+                buffer = records.pop()
+            else:
+                records = [buffer]
+            for record in records:
+                values = record.split(_FIELD_SEP)
+                if len(values) != len(fields) + 1:
+                    continue
+                entry = dict(zip(fields, values))
+                if "message" in entry:
+                    entry["message"] = entry["message"].strip()
+                if name_only:
+                    entry["paths"] = [line for line in values[-1].splitlines() if line.strip()]
+                yield entry
+            if not chunk:
+                break
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
@@ -0,0 +1,195 @@
+"""
+Giti repo taustahooldus.
+
+Varem kontrolliti repo terviklikkust (`git fsck --full`, kuni 5 min)
+enne serveri käivitumist ning repot ei hooldatud kunagi - lahtiste
+objektide ja pakkide hulk kasvas iga commitiga. Nüüd jookseb taustalõim:
+
+- fsck     - üks kord pärast starti (MAINTENANCE_INITIAL_DELAY), siis kord nädalas
+- repack   - lahtised objektid pakki, väikesed pakid kokku (iga päev)
+- prune    - vanad kättesaamatud lahtised objektid (kord nädalas)
+- commit_graph - commit-graph uuendamine uute commitidega (iga päev)
+
+Perioodilised ülesanded käivitatakse ainult vaiksel ajal: kohalik kell on
+GIT_MAINTENANCE_HOURS aknas ja viimasest salvestusest on möödas vähemalt
+GIT_MAINTENANCE_IDLE_SECONDS. Salvestusi hoolduse ajaks ei peatata -
+git lubab samaaegset repacki ja commitimist. Tulemused: /admin/git-health.
+"""
+import threading
+import time
+from datetime import datetime
+
+from .config import (
+    GIT_MAINTENANCE_HOURS, GIT_MAINTENANCE_IDLE_SECONDS, get_logger
+)
+from .git_ops import (
+    run_git_fsck, run_git_repack, run_git_prune, write_commit_graph, get_commit_writer_stats
+)
+
+logger = get_logger(__name__)
+
+# Viivitus pärast serveri starti enne fsck'd (stardikoormus lõpeb enne)
+MAINTENANCE_INITIAL_DELAY = 60
+
+# Kui tihti ülesannete tähtaegu ja vaikset aega kontrollitakse (sekundites)
+MAINTENANCE_CHECK_INTERVAL = 60
+
+# Väljundi maksimaalne pikkus tulemustes
+OUTPUT_LIMIT = 4000
+
+DAY = 24 * 3600
+
+# Ülesanne -> (funktsioon, intervall sekundites), käivitamise järjekorras
+TASKS = {
+    "fsck": (run_git_fsck, 7 * DAY),
+    "repack": (run_git_repack, DAY),
+    "prune": (run_git_prune, 7 * DAY),
+    "commit_graph": (write_commit_graph, DAY),
+}
+
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_state = {"state": "idle", "current_task": None, "started_at": None}
+_tasks = {
+    name: {
+        "runs": 0,
+        "failures": 0,
+        "last_started_at": None,
+        "last_ok": None,
+        "last_seconds": None,
+        "last_output": "",
+        "last_errors": "",
+        "requested": False,
+        "_last_run": None,  # monotonic
+    }
+    for name in TASKS
+}
+
+
+def _parse_hours(value):
+    """'1-5' -> (1, 5); tühi või vigane -> None (igal ajal)."""
+    try:
+        start, end = (int(part) for part in value.split('-', 1))
+        return start % 24, end % 24
+    except (AttributeError, ValueError):
+        return None
+
+
+_window = _parse_hours(GIT_MAINTENANCE_HOURS)
+
+
+def _in_window(hour):
+    if _window is None:
+        return True
+    start, end = _window
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end  # Üle kesköö, nt 22-4
+
+
+def _is_quiet():
+    """Kas praegu on vaikne aeg (akna sees ja salvestusi pole hiljuti olnud)?"""
+    if not _in_window(datetime.now().hour):
+        return False
+    stats = get_commit_writer_stats()
+    if stats["queue_depth"]:
+        return False
+    idle = stats.get("idle_seconds")
+    return idle is None or idle >= GIT_MAINTENANCE_IDLE_SECONDS
+
+
+def _is_due(name, now):
+    task = _tasks[name]
+    if task["_last_run"] is None:
+        return True
+    return now - task["_last_run"] >= TASKS[name][1]
+
+
+def _run_task(name):
+    func = TASKS[name][0]
+    with _lock:
+        _state.update(state="running", current_task=name, started_at=datetime.now().isoformat())
+        _tasks[name]["last_started_at"] = _state["started_at"]
+        _tasks[name]["requested"] = False
+    logger.info(f"Giti hooldus: {name} algas")
+    started = time.monotonic()
+    try:
+        result = func()
+    except Exception as e:
+        result = {"ok": False, "errors": str(e)}
+    seconds = round(time.monotonic() - started, 2)
+
+    with _lock:
+        task = _tasks[name]
+        task["runs"] += 1
+        task["failures"] += 0 if result.get("ok") else 1
+        task["last_ok"] = bool(result.get("ok"))
+        task["last_seconds"] = seconds
+        task["last_output"] = (result.get("output") or "")[-OUTPUT_LIMIT:]
+        task["last_errors"] = (result.get("errors") or "")[-OUTPUT_LIMIT:]
+        task["_last_run"] = time.monotonic()
+        _state.update(state="idle", current_task=None, started_at=None)
+
+    if result.get("ok"):
+        logger.info(f"Giti hooldus: {name} lõpetatud ({seconds}s)")
+    else:
+        print(f"HOIATUS: Giti hooldus {name} ebaõnnestus: {task['last_errors']}")
+
+
+def request_maintenance(name):
+    """Käivitab ülesande esimesel võimalusel (vaiksest ajast sõltumata).
+
+    Returns:
+        False, kui sellist ülesannet pole
+    """
+    if name not in TASKS:
+        return False
+    with _lock:
+        _tasks[name]["requested"] = True
+    _wakeup.set()
+    return True
+
+
+def maintenance_loop():
+    """Daemon loop: fsck pärast starti, siis perioodiline hooldus vaiksel ajal."""
+    _wakeup.wait(MAINTENANCE_INITIAL_DELAY)
+    print("GIT HOOLDUS: Taustalõim käivitunud")
+    # Stardijärgne terviklikkuse kontroll (varem blokeeris serveri käivitumist)
+    _run_task("fsck")
+    while True:
+        _wakeup.clear()
+        try:
+            now = time.monotonic()
+            with _lock:
+                requested = [name for name in TASKS if _tasks[name]["requested"]]
+            due = [name for name in TASKS if name not in requested and _is_due(name, now)]
+            for name in requested:
+                _run_task(name)
+            for name in due:
+                # Vaikust kontrollitakse enne iga ülesannet - salvestus võis vahepeal tulla
+                if not _is_quiet():
+                    break
+                _run_task(name)
+        except Exception as e:
+            print(f"GIT HOOLDUS: Viga: {e}")
+        _wakeup.wait(MAINTENANCE_CHECK_INTERVAL)
+
+
+def get_git_maintenance_stats():
+    """Tagastab hoolduse oleku ja iga ülesande viimase tulemuse."""
+    now = time.monotonic()
+    with _lock:
+        tasks = {}
+        for name, task in _tasks.items():
+            public = {key: value for key, value in task.items() if not key.startswith('_')}
+            last_run = task["_last_run"]
+            remaining = TASKS[name][1] - (now - last_run) if last_run is not None else 0
+            public["interval_seconds"] = TASKS[name][1]
+            public["next_due_in_seconds"] = max(0, round(remaining))
+            tasks[name] = public
+        return {
+            **_state,
+            "window_hours": GIT_MAINTENANCE_HOURS or None,
+            "idle_seconds_required": GIT_MAINTENANCE_IDLE_SECONDS,
+            "tasks": tasks,
+        }
@@ -5,28 +5,56 @@ import os
 import json
 import re
 import subprocess
+import sys
 import threading
+import time
 from collections import deque
 from datetime import datetime
+from concurrent.futures import TimeoutError
 from git import Repo, Actor
 from git.exc import InvalidGitRepositoryError, GitCommandError
-from .config import BASE_DIR, get_logger
-from .utils import sanitize_id
+from .config import (
+    BASE_DIR, GIT_COMMIT_WAIT_TIMEOUT, WORK_CACHE_MAX_ENTRIES, GIT_DIFF_CACHE_BYTES, get_logger
+)
+from .utils import sanitize_id, MtimeLRUCache, SizedLRUCache
+from .git_writer import GitCommitWriter
+from .git_cat_file import CatFilePool, CatFileError
+from .git_log import iter_git_log
+from .activity_log import ActivityLog, AUTOMATIC_AUTHOR, change_type_for_path
 
 logger = get_logger(__name__)
 
 # Git repo globaalne muutuja (initsialiseeritakse esimesel kasutamisel)
 _git_repo = None
 
+# Jagatud Repo objekti lukk: GitPythoni püsivad `git cat-file` protsessid ja
+# indeksifail pole lõimekindlad (commitijad ja salvestuste kontroll)
+_repo_lock = threading.RLock()
+
+# Giti jälgitavad failid (suhtelised teed) - kas enne esimest salvestust tuleb originaal commitida,
+# ilma iga salvestuse juures ajalugu läbi käimata. Laetakse `git ls-files` abil
+# esimesel kasutamisel ja uuendatakse iga commitiga.
+_tracked_paths = None
+_tracked_paths_lock = threading.Lock()
+_tracked_paths_stats = {
+    "paths": 0,
+    "load_ms": None,
+    "loaded_at": None,
+    "lookups": 0,
+    "first_commits": 0,
+    "legacy_probe_ms": None,
+}
+
 # Git commit ebaõnnestumiste jälgimine (viimased 100)
 _git_failures = deque(maxlen=100)
 _git_failures_lock = threading.Lock()
 
-# Cache teose ID-de jaoks (kausta nimi -> (work_id, slug))
-_work_ids_cache = {}
+# Cache teose ID-de jaoks (kausta nimi -> (work_id, slug)), aegub _metadata.json muutumisel
+_work_ids_cache = MtimeLRUCache(WORK_CACHE_MAX_ENTRIES)
 
-# Cache teose info jaoks (kausta nimi -> {work_id, slug, title, year, author})
-_work_info_cache = {}
+# Cache teose info jaoks (kausta nimi -> {work_id, slug, title, year, author}),
+# aegub _metadata.json muutumisel
+_work_info_cache = MtimeLRUCache(WORK_CACHE_MAX_ENTRIES)
 
 
 def get_work_ids_from_folder(folder_name):
@@ -39,10 +67,14 @@ def get_work_ids_from_folder(folder_name):
 
     Kasutab cache'i, et vältida korduvaid faililugemisi.
     """
-    if folder_name in _work_ids_cache:
-        return _work_ids_cache[folder_name]
-
     metadata_path = os.path.join(BASE_DIR, folder_name, '_metadata.json')
+    return _work_ids_cache.get(
+        folder_name, metadata_path, lambda: _load_work_ids(folder_name, metadata_path)
+    )
+
+
+def _load_work_ids(folder_name, metadata_path):
+    """Loeb teose ID-d _metadata.json failist."""
     work_id = None
     slug = None
 
@@ -59,7 +91,6 @@ def get_work_ids_from_folder(folder_name):
     if not slug:
         slug = sanitize_id(folder_name)
 
-    _work_ids_cache[folder_name] = (work_id, slug)
     return work_id, slug
 
 
@@ -76,10 +107,14 @@ def get_work_info_from_folder(folder_name):
 
     Kasutab cache'i.
     """
-    if folder_name in _work_info_cache:
-        return _work_info_cache[folder_name]
-
     metadata_path = os.path.join(BASE_DIR, folder_name, '_metadata.json')
+    return _work_info_cache.get(
+        folder_name, metadata_path, lambda: _load_work_info(folder_name, metadata_path)
+    )
+
+
+def _load_work_info(folder_name, metadata_path):
+    """Loeb teose põhiinfo _metadata.json failist."""
     info = {
         'work_id': None,
         'slug': sanitize_id(folder_name),
@@ -111,12 +146,20 @@ def get_work_info_from_folder(folder_name):
         except (json.JSONDecodeError, IOError):
             pass
 
-    _work_info_cache[folder_name] = info
     return info
 
 
-# Cache piltide nimekirja jaoks (kausta nimi -> sorteeritud piltide nimekiri)
-_images_cache = {}
+# Cache piltide nimekirja jaoks (kausta nimi -> sorteeritud piltide nimekiri),
+# aegub kausta muutumisel (lisatud/kustutatud/ümber nimetatud failid)
+_images_cache = MtimeLRUCache(WORK_CACHE_MAX_ENTRIES)
+
+
+def _list_page_images(folder_path):
+    """Tagastab kausta lehekülgede piltide sorteeritud nimekirja."""
+    if not os.path.exists(folder_path):
+        return []
+    return sorted([f for f in os.listdir(folder_path)
+                   if f.lower().endswith(('.jpg', '.jpeg', '.png')) and not f.startswith('_thumb_')])
 
 
 def get_page_number_from_txt(folder_name, txt_filename):
@@ -135,16 +178,8 @@ def get_page_number_from_txt(folder_name, txt_filename):
         int: Lehekülje number (1-indekseeritud) või 1 kui ei leia
     """
     # Kasuta cache'i
-    if folder_name not in _images_cache:
-        folder_path = os.path.join(BASE_DIR, folder_name)
-        if os.path.exists(folder_path):
-            images = sorted([f for f in os.listdir(folder_path)
-                           if f.lower().endswith(('.jpg', '.jpeg', '.png')) and not f.startswith('_thumb_')])
-            _images_cache[folder_name] = images
-        else:
-            _images_cache[folder_name] = []
-
-    images = _images_cache[folder_name]
+    folder_path = os.path.join(BASE_DIR, folder_name)
+    images = _images_cache.get(folder_name, folder_path, lambda: _list_page_images(folder_path))
     if not images:
         return 1
 
@@ -164,6 +199,15 @@ def get_page_number_from_txt(folder_name, txt_filename):
     return 1
 
 
+def get_work_cache_stats():
+    """Tagastab teose info ja piltide nimekirja cache'ide tabamuste statistika."""
+    return {
+        "work_ids": _work_ids_cache.get_stats(),
+        "work_info": _work_info_cache.get_stats(),
+        "images": _images_cache.get_stats(),
+    }
+
+
 def get_or_init_repo():
     """
     Tagastab Git repo objekti andmekausta jaoks.
@@ -196,6 +240,75 @@ def get_or_init_repo():
     return _git_repo
 
 
+def load_tracked_paths():
+    """Laeb jälgitavate failide hulga `git ls-files` abil (serveri stardil).
+
+    Mõõdab ka vana kontrolli (iter_commits ühe faili kohta) hinda, et
+    statistikas näidata, kui palju iga salvestus säästab.
+
+    Returns:
+        int: Jälgitavate failide arv
+    """
+    global _tracked_paths
+    repo = get_or_init_repo()
+    started = time.perf_counter()
+    with _repo_lock:
+        output = repo.git.ls_files('-z')
+    paths = {path for path in output.split('\0') if path}
+    load_ms = (time.perf_counter() - started) * 1000
+
+    legacy_probe_ms = None
+    sample = next(iter(paths), None)
+    if sample:
+        probe_started = time.perf_counter()
+        try:
+            with _repo_lock:
+                list(repo.iter_commits(paths=sample, max_count=1))
+            legacy_probe_ms = round((time.perf_counter() - probe_started) * 1000, 2)
+        except Exception:
+            pass
+
+    with _tracked_paths_lock:
+        _tracked_paths = paths
+        _tracked_paths_stats.update(
+            paths=len(paths),
+            load_ms=round(load_ms, 1),
+            loaded_at=datetime.now().isoformat(),
+            legacy_probe_ms=legacy_probe_ms
+        )
+    logger.info(f"Git: {len(paths)} jälgitavat faili laetud ({load_ms:.0f} ms; "
+                f"vana ajaloo kontroll {legacy_probe_ms} ms salvestuse kohta)")
+    return len(paths)
+
+
+def _is_tracked(relative_path):
+    """Kas fail on juba Gitis (O(1) hulgast, laetakse vajadusel)."""
+    if _tracked_paths is None:
+        load_tracked_paths()
+    with _tracked_paths_lock:
+        _tracked_paths_stats["lookups"] += 1
+        return relative_path in _tracked_paths
+
+
+def _mark_tracked(paths, removed=()):
+    """Uuendab jälgitavate failide hulka pärast commiti (või päevikusse lisamist)."""
+    with _tracked_paths_lock:
+        if _tracked_paths is None:
+            return
+        _tracked_paths.update(paths)
+        _tracked_paths.difference_update(removed)
+        _tracked_paths_stats["paths"] = len(_tracked_paths)
+
+
+def get_tracked_paths_stats():
+    """Tagastab jälgitavate failide hulga statistika (laadimise aeg, säästetud ajaloo kontrollid)."""
+    with _tracked_paths_lock:
+        stats = dict(_tracked_paths_stats)
+    probe_ms = stats["legacy_probe_ms"]
+    stats["estimated_saved_ms"] = round(stats["lookups"] * probe_ms, 1) if probe_ms is not None else None
+    return stats
+
+
 def _record_git_failure(filepath, username, error):
     """Salvestab git commit ebaõnnestumise info."""
     with _git_failures_lock:
@@ -207,6 +320,50 @@ def _record_git_failure(filepath, username, error):
         })
 
 
+# Kasutajate muudatuste logi (/recent-edits)
+_activity = ActivityLog()
+
+
+def _activity_rows(commit_hash, author, ts, message, paths):
+    """Koostab commiti muudetud failidest muudatuste logi read."""
+    rows = []
+    for filepath in paths:
+        change_type = change_type_for_path(filepath)
+        if change_type is None:
+            continue
+        folder_name = filepath.split('/')[0]
+        work_info = get_work_info_from_folder(folder_name)
+        page_num = None
+        if change_type == "page":
+            page_num = get_page_number_from_txt(folder_name, filepath.split('/')[-1])
+        rows.append({
+            "ts": ts,
+            "author": author,
+            "dir_name": folder_name,
+            "work_id": work_info['work_id'],
+            "filepath": filepath,
+            "page": page_num,
+            "change_type": change_type,
+            "commit_hash": commit_hash,
+            "message": message.strip(),
+        })
+    return rows
+
+
+def _log_activity(commit_hash, author, ts, message, paths):
+    """Lisab kasutaja commiti muudatuste logisse (automaatseid commiteid ei logita)."""
+    _activity.record_first_commits(commit_hash, ts, paths)
+    if author == AUTOMATIC_AUTHOR:
+        return
+    _activity.append(_activity_rows(commit_hash, author, ts, message, paths))
+
+
+# Ühtne commitide kirjutaja: salvestused päevikusse, commitid taustal koondatult
+_commit_writer = GitCommitWriter(
+    get_or_init_repo, _repo_lock, on_failure=_record_git_failure, on_commit=_log_activity
+)
+
+
 def get_git_failures():
     """Tagastab viimased git commit ebaõnnestumised."""
     with _git_failures_lock:
@@ -253,9 +410,89 @@ def run_git_fsck():
         return {"ok": False, "output": "", "errors": str(e)}
 
 
-def save_with_git(filepath, content, username, message=None, additional_files=None):
+def _run_git_command(args, timeout, label):
+    """Käivitab git käsu repo kaustas.
+
+    Returns:
+        dict: {"ok": bool, "output": str, "errors": str}
+    """
+    repo = get_or_init_repo()
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=repo.working_dir,
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+        return {
+            "ok": result.returncode == 0,
+            "output": result.stdout,
+            "errors": result.stderr
+        }
+    except subprocess.TimeoutExpired:
+        logger.error(f"Git {label} aegus (>{timeout // 60} min)")
+        return {"ok": False, "output": "", "errors": f"Aegunud (timeout {timeout // 60} min)"}
+    except Exception as e:
+        logger.error(f"Git {label} viga: {e}")
+        return {"ok": False, "output": "", "errors": str(e)}
+
+
+def run_git_repack():
     """
-    Salvestab faili ja teeb Git commiti.
+    Pakib lahtised objektid uude paki ja liidab väikesed pakid geomeetrilise
+    progressiooni järgi (inkrementaalne - suuri pakke ümber ei kirjutata).
+
+    Returns:
+        dict: {"ok": bool, "output": str, "errors": str}
+    """
+    result = _run_git_command(["repack", "-d", "-q", "--geometric=2"], timeout=1800, label="repack")
+    if not result["ok"]:
+        logger.error(f"Git repack ebaõnnestus: {result['errors']}")
+    return result
+
+
+def run_git_prune():
+    """
+    Kustutab üle kahe nädala vanused kättesaamatud lahtised objektid
+    (nt ebaõnnestunud commitide blobid). Värskeid objekte ei puututa, nii et
+    samal ajal käiv commit ei kaota oma objekte.
+
+    Returns:
+        dict: {"ok": bool, "output": str, "errors": str}
+    """
+    result = _run_git_command(["prune", "--expire=2.weeks.ago"], timeout=1800, label="prune")
+    if not result["ok"]:
+        logger.error(f"Git prune ebaõnnestus: {result['errors']}")
+    return result
+
+
+def _untracked_originals(files):
+    """Gitis veel puuduvate failide praegune sisu kettal: [(suhteline tee, sisu)]."""
+    originals = []
+    for path, _ in files:
+        if _is_tracked(path):
+            continue
+        try:
+            with open(os.path.join(BASE_DIR, path), 'r', encoding='utf-8') as f:
+                originals.append((path, f.read()))
+        except (OSError, UnicodeDecodeError):
+            # Uus fail (või loetamatu) - originaali pole
+            continue
+    return originals
+
+
+def save_with_git(filepath, content, username, message=None, additional_files=None, wait=True):
+    """
+    Salvestab faili ja paneb selle Git commiti järjekorda (vt server/git_writer.py).
+
+    Salvestus kirjutatakse enne failide muutmist püsivasse päevikusse;
+    commiti teeb taustal ühtne committer-lõim, koondades samaaegsed
+    salvestused.
+
+    Kui fail pole veel Gitis, commititakse enne kasutaja muudatust kettal
+    olev originaal ("Originaal OCR", autor "Automaatne"), et ajaloos oleks
+    algne tekst ja kasutaja muudatus eraldi.
 
     Args:
         filepath: Absoluutne tee failini
@@ -263,73 +500,121 @@ def save_with_git(filepath, content, username, message=None, additional_files=No
         username: Kasutajanimi (commit author)
         message: Commit sõnum (valikuline, genereeritakse automaatselt)
         additional_files: List of (filepath, content) tuples to include in same commit
+        wait: Kui True, oodatakse commiti valmimist; muidu tagastatakse kohe ootel commiti ID
 
     Returns:
-        dict: {"success": bool, "commit_hash": str, "is_first_commit": bool}
+        dict: {"success": bool, "commit_hash": str, "is_first_commit": bool,
+               "commit_id": int, "pending": bool}
     """
-    repo = get_or_init_repo()
     relative_path = os.path.relpath(filepath, BASE_DIR)
 
-    # Kontrolli, kas see fail on juba repos (st kas on esimene commit)
-    is_first_commit = True
-    try:
-        # Kui faili ajalugu on olemas, pole esimene commit
-        list(repo.iter_commits(paths=relative_path, max_count=1))
-        is_first_commit = False
-    except:
-        is_first_commit = True
-
-    # Kirjuta põhifail
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
-    # Sea failiõigused loetavaks kõigile (Docker/root probleemi vältimiseks)
-    os.chmod(filepath, 0o644)
-
-    # Kogu kõik failid indeksisse lisamiseks
-    files_to_add = [relative_path]
-
-    # Kirjuta ja lisa lisafailid
-    if additional_files:
-        for add_filepath, add_content in additional_files:
-            with open(add_filepath, 'w', encoding='utf-8') as f:
-                f.write(add_content)
-            os.chmod(add_filepath, 0o644)
-            add_relative = os.path.relpath(add_filepath, BASE_DIR)
-            files_to_add.append(add_relative)
-
-    # Lisa kõik failid indeksisse
-    repo.index.add(files_to_add)
+    files = [(relative_path, content)]
+    for add_filepath, add_content in additional_files or ():
+        files.append((os.path.relpath(add_filepath, BASE_DIR), add_content))
 
     # Genereeri commit sõnum
     if not message:
-        if is_first_commit:
-            message = f"Originaal OCR: {relative_path}"
-        else:
-            message = f"Muuda: {relative_path}"
+        message = f"Muuda: {relative_path}"
+
+    # Hulk laetakse enne submit-lukku: laadimine võtab _repo_lock'i, mida välise
+    # muudatuse commit hoiab pending_paths() ajal (vastupidine järjekord)
+    if _tracked_paths is None:
+        load_tracked_paths()
+
+    # Kontroll, originaali lugemine, submit'id ja _mark_tracked ühe luku all -
+    # muidu võiks samaaegse esimese salvestuse korral teise kasutaja muudatus
+    # minna päevikusse "Originaal OCR" nime all
+    with _commit_writer.submit_lock():
+        # Kontrolli, kas see fail on juba repos (st kas on esimene commit)
+        is_first_commit = not _is_tracked(relative_path)
+        originals = _untracked_originals(files)
+        try:
+            if originals:
+                _commit_writer.submit(
+                    originals, "Automaatne", f"Originaal OCR: {', '.join(path for path, _ in originals)}",
+                    is_first_commit=True
+                )
+            commit_id, future = _commit_writer.submit(files, username, message)
+        except OSError as e:
+            # Päevik pole kirjutatav - salvestame failid ilma Gitita
+            logger.error(f"Giti päevikusse kirjutamine EBAÕNNESTUS: {relative_path} (kasutaja: {username}): {e}")
+            _record_git_failure(relative_path, username, e)
+            for path, file_content in files:
+                with open(os.path.join(BASE_DIR, path), 'w', encoding='utf-8') as f:
+                    f.write(file_content)
+                os.chmod(os.path.join(BASE_DIR, path), 0o644)
+            return {"success": False, "error": str(e)}
+
+        # Päevikus olev salvestus commititakse - järgmine salvestus pole enam esimene
+        _mark_tracked([path for path, _ in files])
+        if originals:
+            with _tracked_paths_lock:
+                _tracked_paths_stats["first_commits"] += 1
+
+    pending = {
+        "success": True,
+        "commit_hash": "",
+        "is_first_commit": is_first_commit,
+        "commit_id": commit_id,
+        "pending": True
+    }
+    if not wait:
+        return pending
 
-    # Tee commit
-    author = Actor(username, f"{username}@vutt.local")
     try:
-        commit = repo.index.commit(
-            message,
-            author=author,
-            committer=author
-        )
-        logger.info(f"Git commit: {commit.hexsha[:8]} - {message} (autor: {username})")
-        return {
-            "success": True,
-            "commit_hash": commit.hexsha,
-            "is_first_commit": is_first_commit
-        }
-    except GitCommandError as e:
-        logger.error(f"Git commit EBAÕNNESTUS: {relative_path} (kasutaja: {username}): {e}")
-        _record_git_failure(relative_path, username, e)
-        return {"success": False, "error": str(e)}
+        result = future.result(timeout=GIT_COMMIT_WAIT_TIMEOUT)
+    except TimeoutError:
+        logger.warning(f"Git commit ootel üle {GIT_COMMIT_WAIT_TIMEOUT}s: {relative_path} (id {commit_id})")
+        return pending
+
+    if not result["success"]:
+        return {"success": False, "error": result["error"], "commit_id": commit_id}
+    return {
+        "success": True,
+        "commit_hash": result["commit_hash"],
+        "is_first_commit": is_first_commit,
+        "commit_id": commit_id,
+        "pending": False
+    }
+
+
+def start_git_writer():
+    """Taastab päevikust commitimata salvestused ja käivitab committer-lõime (serveri stardil)."""
+    _commit_writer.start()
+
+
+def get_commit_status(commit_id):
+    """Tagastab ootel commiti oleku ID järgi (pending/committed/failed/unknown)."""
+    return _commit_writer.status(commit_id)
+
+
+def get_commit_writer_stats():
+    """Tagastab commitide kirjutaja statistika (järjekorra sügavus, latentsus, läbilaskevõime)."""
+    return _commit_writer.get_stats()
+
+
+# Püsivad `git cat-file --batch` protsessid (luuakse esimesel ajaloo lugemisel)
+_cat_file_pool = None
+
+# Diffid, failisisu kindlas commitis ja failide originaal-commitid ei muutu - hoitakse
+# mälus (ainult täispikkade räsidega päringud, lühike räsi või viide võib hiljem
+# teisele commitile osutada)
+_diff_cache = SizedLRUCache(GIT_DIFF_CACHE_BYTES)
+_FULL_SHA_RE = re.compile(r'[0-9a-f]{40}')
+
+
+def _is_full_sha(value):
+    return isinstance(value, str) and _FULL_SHA_RE.fullmatch(value) is not None
+
+
+def get_diff_cache_stats():
+    """Tagastab diffide ja failisisu cache'i statistika (mälukasutus, tabamused)."""
+    return _diff_cache.get_stats()
 
 
 def get_file_git_history(paths, max_count=50):
     """
-    Tagastab faili(de) Git ajaloo.
+    Tagastab faili(de) Git ajaloo (esimene lehekülg, vt get_file_history_page).
 
     Args:
         paths: Suhteline tee failini või failide list (BASE_DIR suhtes)
@@ -338,32 +623,136 @@ def get_file_git_history(paths, max_count=50):
     Returns:
         list: Commitide nimekiri, iga element on dict
     """
+    return get_file_history_page(paths, limit=max_count)["history"]
+
+
+def get_file_history_page(paths, limit=50, cursor=None):
+    """
+    Tagastab faili(de) Git ajaloo lehekülje, uuemad eespool.
+
+    Ajalugu loetakse `git log` torust ja protsess lõpetatakse, kui lehekülg
+    on täis - vanemat ajalugu läbi ei käida.
+
+    Args:
+        paths: Suhteline tee failini või failide list (BASE_DIR suhtes)
+        limit: Maksimaalne commitide arv leheküljel
+        cursor: Eelmise lehekülje next_cursor (viimase commiti täispikk räsi)
+
+    Returns:
+        dict: {"history": [...], "next_cursor": str või None}
+
+    Raises:
+        ValueError: Kui kursor pole täispikk commiti räsi
+    """
+    if cursor is not None and not _is_full_sha(cursor):
+        raise ValueError("Vigane kursor")
+    paths = [paths] if isinstance(paths, str) else list(paths)
     repo = get_or_init_repo()
 
-    try:
-        commits = list(repo.iter_commits(paths=paths, max_count=max_count))
-    except:
-        return []
+    # Üks lisakirje, et teada, kas vanemaid commiteid on veel
+    args = ["-n", str(limit + 1)]
+    if cursor:
+        args += [cursor, "--skip=1"]  # Kursor ise oli eelmise lehekülje viimane
+    args += ["--", *paths]
 
-    if not commits:
-        return []
+    try:
+        entries = list(iter_git_log(repo.working_dir, args))
+    except Exception as e:
+        logger.error(f"Git log viga: {e}")
+        return {"history": [], "next_cursor": None}
 
-    # Esimene commit (kõige vanem) on originaal
-    original_hash = commits[-1].hexsha if commits else None
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if entries and not has_more:
+        # Ajaloo lõpp käes - viimane on originaal
+        _remember_original_commit(paths, entries[-1]["hash"])
+    original_hash = _get_original_commit(repo, paths) if entries else None
 
     history = []
-    for commit in commits:
+    for entry in entries:
+        committed = datetime.fromisoformat(entry["date"])
         history.append({
-            "hash": commit.hexsha[:8],
-            "full_hash": commit.hexsha,
-            "author": commit.author.name,
-            "date": commit.committed_datetime.isoformat(),
-            "formatted_date": commit.committed_datetime.strftime("%d.%m.%Y %H:%M"),
-            "message": commit.message.strip(),
-            "is_original": commit.hexsha == original_hash
+            "hash": entry["hash"][:8],
+            "full_hash": entry["hash"],
+            "author": entry["author"],
+            "date": entry["date"],
+            "formatted_date": committed.strftime("%d.%m.%Y %H:%M"),
+            "message": entry["message"],
+            "is_original": entry["hash"] == original_hash
         })
 
-    return history
+    next_cursor = entries[-1]["hash"] if has_more else None
+    return {"history": history, "next_cursor": next_cursor}
+
+
+def _remember_original_commit(paths, commit_hash):
+    key = ("original", tuple(sorted(paths)))
+    _diff_cache.put(key, commit_hash, sys.getsizeof(commit_hash) + sum(sys.getsizeof(p) for p in paths))
+
+
+def _get_original_commit(repo, paths):
+    """Tagastab failide esimese (originaal-OCR) commiti räsi.
+
+    Loetakse muudatuste logi esimeste commitide tabelist (täidetakse Giti
+    ajaloost ja iga commitiga). Kuni tabel pole täidetud, otsitakse
+    `git log` abil ja hoitakse tulemust cache'is.
+    """
+    if _activity.first_commits_ready():
+        return _activity.first_commit(paths)
+    key = ("original", tuple(sorted(paths)))
+    cached = _diff_cache.get(key)
+    if cached is not None:
+        return cached
+    try:
+        result = subprocess.run(
+            ["git", "log", "--format=%H", "--", *paths],
+            cwd=repo.working_dir, capture_output=True, text=True, timeout=60
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.error(f"Originaal-commiti otsing ebaõnnestus: {e}")
+        return None
+    hashes = result.stdout.split()
+    if not hashes:
+        return None
+    _remember_original_commit(paths, hashes[-1])
+    return hashes[-1]
+
+
+def write_commit_graph():
+    """
+    Kirjutab commit-graph faili (koos muudetud radade Bloomi filtritega),
+    mis kiirendab `git log` ja ajaloo pathspec-päringuid.
+
+    Returns:
+        dict: {"ok": bool, "seconds": float, "errors": str}
+    """
+    repo = get_or_init_repo()
+    started = time.monotonic()
+    try:
+        result = subprocess.run(
+            ["git", "commit-graph", "write", "--reachable", "--changed-paths"],
+            cwd=repo.working_dir, capture_output=True, text=True, timeout=600
+        )
+        ok = result.returncode == 0
+        errors = result.stderr.strip() if not ok else ""
+    except (OSError, subprocess.TimeoutExpired) as e:
+        ok, errors = False, str(e)
+    seconds = round(time.monotonic() - started, 2)
+    if ok:
+        logger.info(f"Git commit-graph kirjutatud ({seconds}s)")
+    else:
+        logger.error(f"Git commit-graph kirjutamine ebaõnnestus: {errors}")
+    return {"ok": ok, "seconds": seconds, "errors": errors}
+
+
+def ensure_commit_graph():
+    """Kirjutab commit-graph faili, kui see puudub (serveri stardil taustal)."""
+    repo = get_or_init_repo()
+    info_dir = os.path.join(repo.git_dir, 'objects', 'info')
+    if os.path.exists(os.path.join(info_dir, 'commit-graph')) or \
+            os.path.isdir(os.path.join(info_dir, 'commit-graphs')):
+        return None
+    return write_commit_graph()
 
 
 def get_file_at_commit(relative_path, commit_hash):
@@ -377,14 +766,37 @@ def get_file_at_commit(relative_path, commit_hash):
     Returns:
         str: Faili sisu või None kui ei leidnud
     """
+    global _cat_file_pool
+    cache_key = ("blob", commit_hash, relative_path) if _is_full_sha(commit_hash) else None
+    if cache_key:
+        cached = _diff_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     repo = get_or_init_repo()
+    with _repo_lock:
+        if _cat_file_pool is None:
+            _cat_file_pool = CatFilePool(repo.working_dir)
 
     try:
-        content = repo.git.show(f"{commit_hash}:{relative_path}")
-        return content
-    except GitCommandError as e:
-        logger.error(f"Git show viga: {e}")
+        data = _cat_file_pool.read_blob(commit_hash, relative_path)
+    except CatFileError as e:
+        logger.error(f"Git cat-file viga: {e}")
         return None
+    if data is None:
+        logger.error(f"Git cat-file: {commit_hash}:{relative_path} puudub")
+        return None
+    content = data.decode('utf-8', errors='replace')
+    if cache_key:
+        _diff_cache.put(cache_key, content, sys.getsizeof(content))
+    return content
+
+
+def get_cat_file_stats():
+    """Tagastab ajaloo lugemise protsesside statistika."""
+    if _cat_file_pool is None:
+        return {"requests": 0, "workers": 0}
+    return _cat_file_pool.get_stats()
 
 
 def get_file_diff(relative_path, hash1, hash2):
@@ -399,10 +811,19 @@ def get_file_diff(relative_path, hash1, hash2):
     Returns:
         str: Diff tekst
     """
+    cache_key = None
+    if _is_full_sha(hash1) and _is_full_sha(hash2):
+        cache_key = ("file_diff", hash1, hash2, relative_path)
+        cached = _diff_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     repo = get_or_init_repo()
 
     try:
         diff = repo.git.diff(hash1, hash2, '--', relative_path)
+        if cache_key:
+            _diff_cache.put(cache_key, diff, sys.getsizeof(diff))
         return diff
     except GitCommandError as e:
         logger.error(f"Git diff viga: {e}")
@@ -419,7 +840,19 @@ def get_commit_diff(commit_hash, filepaths=None):
 
     Returns:
         dict: {"diff": str, "additions": int, "deletions": int, "files": list}
+        (cache'ist tagastatud dict on jagatud - kutsuja ei tohi seda muuta)
     """
+    if isinstance(filepaths, list):
+        paths = tuple(filepaths)
+    else:
+        paths = (filepaths,) if filepaths else ()
+
+    cache_key = ("commit_diff", commit_hash, paths) if _is_full_sha(commit_hash) else None
+    if cache_key:
+        cached = _diff_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     repo = get_or_init_repo()
 
     # Git "empty tree" hash - kasutatakse esimese commiti võrdluseks
@@ -431,27 +864,12 @@ def get_commit_diff(commit_hash, filepaths=None):
         # Määra parent (esimese commiti puhul tühi puu)
         parent_hash = commit.parents[0].hexsha if commit.parents else EMPTY_TREE
 
-        # Koosta argumentide list
-        args = [parent_hash, commit.hexsha, '--']
-        if filepaths:
-            if isinstance(filepaths, list):
-                args.extend(filepaths)
-            else:
-                args.append(filepaths)
-        
         # Käivita git diff
-        diff_text = repo.git.diff(*args)
+        diff_text = repo.git.diff(parent_hash, commit.hexsha, '--', *paths)
         
         # Loe statistika
         # numstat puhul peame samuti failid ette andma
-        stat_args = [parent_hash, commit.hexsha, '--numstat', '--']
-        if filepaths:
-            if isinstance(filepaths, list):
-                stat_args.extend(filepaths)
-            else:
-                stat_args.append(filepaths)
-                
-        stat = repo.git.diff(*stat_args)
+        stat = repo.git.diff(parent_hash, commit.hexsha, '--numstat', '--', *paths)
         
         additions = 0
         deletions = 0
@@ -468,12 +886,16 @@ def get_commit_diff(commit_hash, filepaths=None):
                     except ValueError:
                         pass
         
-        return {
+        result = {
             "diff": diff_text,
             "additions": additions,
             "deletions": deletions,
             "files": files
         }
+        if cache_key:
+            size = sys.getsizeof(diff_text) + sum(sys.getsizeof(f) for f in files)
+            _diff_cache.put(cache_key, result, size)
+        return result
     except GitCommandError as e:
         logger.error(f"Git commit diff viga: {e}")
         return None
@@ -484,142 +906,256 @@ def get_commit_diff(commit_hash, filepaths=None):
 
 def commit_new_work_to_git(dir_name):
     """Lisab uue teose txt ja json failid Git reposse originaal-OCR commitina."""
+    return bool(commit_new_works_to_git([dir_name]))
+
+
+def commit_new_works_to_git(dir_names):
+    """Lisab mitme uue teose txt ja json failid Git reposse ühe originaal-OCR commitina.
+
+    Kasutab sisselugemise konveier (server/ingest_pipeline.py), et korraga
+    kopeeritud teosed ei teeks igaüks eraldi commitit.
+
+    Returns:
+        list: Teosed, mille failid commititi (tühi, kui commit ebaõnnestus)
+    """
     try:
         repo = get_or_init_repo()
-        dir_path = os.path.join(BASE_DIR, dir_name)
 
-        # Leia kõik txt ja json failid kaustas
+        # Leia kõik txt ja json failid teoste kaustades
         files_to_add = []
+        committed = []
         txt_count = 0
         json_count = 0
-        for f in os.listdir(dir_path):
-            if f.endswith('.txt'):
-                relative_path = os.path.join(dir_name, f)
-                files_to_add.append(relative_path)
-                txt_count += 1
-            elif f.endswith('.json'):
-                relative_path = os.path.join(dir_name, f)
-                files_to_add.append(relative_path)
-                json_count += 1
+        for dir_name in dir_names:
+            dir_path = os.path.join(BASE_DIR, dir_name)
+            if not os.path.isdir(dir_path):
+                continue
+            work_files = []
+            for f in os.listdir(dir_path):
+                if f.endswith('.txt'):
+                    txt_count += 1
+                elif f.endswith('.json'):
+                    json_count += 1
+                else:
+                    continue
+                work_files.append(os.path.join(dir_name, f))
+            if work_files:
+                files_to_add.extend(work_files)
+                committed.append(dir_name)
 
         if not files_to_add:
-            return False
-
-        # Lisa failid indeksisse
-        repo.index.add(files_to_add)
+            return []
 
         # Tee commit
         author = Actor("Automaatne", "auto@vutt.local")
-        repo.index.commit(
-            f"Originaal OCR: {dir_name} ({txt_count} lehekülge, {json_count} json)",
-            author=author,
-            committer=author
-        )
-        logger.info(f"GIT: Lisatud uus teos {dir_name} ({txt_count} txt, {json_count} json)")
-        return True
+        if len(committed) == 1:
+            message = f"Originaal OCR: {committed[0]} ({txt_count} lehekülge, {json_count} json)"
+        else:
+            message = f"Originaal OCR: {len(committed)} teost ({txt_count} lehekülge, {json_count} json)"
+        with _repo_lock:
+            index = repo.index
+            index.add(files_to_add)
+            commit = index.commit(message, author=author, committer=author)
+        _mark_tracked(files_to_add)
+        _activity.record_first_commits(commit.hexsha, commit.committed_datetime.isoformat(), files_to_add)
+        logger.info(f"GIT: Lisatud {len(committed)} uut teost ({txt_count} txt, {json_count} json)")
+        return committed
     except Exception as e:
-        logger.error(f"GIT viga uue teose lisamisel ({dir_name}): {e}")
-        return False
+        logger.error(f"GIT viga uute teoste lisamisel ({', '.join(dir_names)}): {e}")
+        return []
 
 
-def get_recent_commits(username=None, limit=50):
-    """
-    Tagastab viimased commitid, valikuliselt filtreerituna kasutaja järgi.
-    
+def _git_status_entries(repo, pathspecs=()):
+    """Tagastab muutunud/jälgimata/kustutatud .txt ja .json failid: [(XY kood, tee)]."""
+    # -z: failinimed muutmata kujul, NUL-eraldatud. --no-optional-locks: status
+    # ei kirjuta värskendatud indeksit tagasi ega võistle commitijatega index.lock'i pärast
+    with _repo_lock:
+        status = repo.git(no_optional_locks=True).status(
+            '--porcelain', '-z', '--untracked-files=all', '--', *pathspecs
+        )
+    result = []
+    entries = status.split('\0')
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if len(entry) < 4:
+            continue
+        code, path = entry[:2], entry[3:]
+        if code[0] in 'RC':
+            i += 1  # Ümbernimetamise vana nimi
+        if path.endswith(('.txt', '.json')):
+            result.append((code, path))
+    return result
+
+
+def get_dirty_work_dirs():
+    """Tagastab teoste kaustad, kus on commitimata .txt/.json muudatusi (üks git status)."""
+    repo = get_or_init_repo()
+    try:
+        entries = _git_status_entries(repo)
+    except GitCommandError as e:
+        logger.error(f"GIT status viga: {e}")
+        return set()
+    return {path.split('/', 1)[0] for _, path in entries if '/' in path}
+
+
+def commit_out_of_band_changes(dir_name, filenames=None):
+    """Commitib teose failid, mida muudeti serverist mööda (skriptid, käsitsi kopeerimine).
+
+    Commititakse ainult failid, mis Giti järgi on muutunud, lisatud või
+    kustutatud - serveri enda salvestused on juba commititud ja jäävad välja.
+
     Args:
-        username: Kui määratud, tagastab ainult selle kasutaja commitid
-        limit: Maksimaalne commitide arv
-    
+        dir_name: Teose kausta nimi
+        filenames: Kontrollitavad failinimed (None = kogu kaust)
+
     Returns:
-        list: Commitide nimekiri koos teose ja lehekülje infoga
+        list: Commititud failide suhtelised teed (tühi, kui midagi polnud)
+        või None, kui Giti viga takistas commitimist
     """
     repo = get_or_init_repo()
-    
+    if filenames is None:
+        pathspecs = [dir_name]
+    else:
+        pathspecs = [os.path.join(dir_name, f) for f in filenames]
+    if not pathspecs:
+        return []
+
+    # Commitimata salvestused teeb committer-lõim ise. Päevik loetakse enne
+    # git status'it ja uuesti lukus: vahepeal tehtud salvestused jäävad välja.
+    in_journal = _commit_writer.pending_paths()
     try:
-        all_commits = list(repo.iter_commits(max_count=limit * 3))  # Võtame rohkem, et filtreerimise järel piisaks
-    except:
+        entries = _git_status_entries(repo, pathspecs)
+    except GitCommandError as e:
+        logger.error(f"GIT status viga ({dir_name}): {e}")
+        return None
+    if not entries:
         return []
-    
-    results = []
-    seen_files = set()  # Vältimaks duplikaate sama faili kohta
-    
-    for commit in all_commits:
-        # Filtreeri kasutaja järgi (kui määratud)
-        if username and commit.author.name != username:
-            continue
-        
-        # Jäta vahele automaatsed commitid
-        if commit.author.name == "Automaatne":
-            continue
-        
-        # Leia muudetud failid selles commitis
-        try:
-            # Optimeerimine: Kasutame stats.files, et saada ainult failinimed
-            # See väldib kulukat sisu võrdlemist (diff)
-            file_paths = list(commit.stats.files.keys())
-            
-            for filepath in file_paths:
-                if not filepath:
-                    continue
 
-                # Parsi kausta nimi failiteest
-                parts = filepath.split('/')
-                if len(parts) < 2:
-                    continue
+    try:
+        author = Actor("Automaatne", "auto@vutt.local")
+        with _repo_lock:
+            in_journal |= _commit_writer.pending_paths()
+            entries = [(code, path) for code, path in entries if path not in in_journal]
+            to_add = [path for code, path in entries if 'D' not in code]
+            to_remove = [path for code, path in entries if 'D' in code]
+            if not to_add and not to_remove:
+                return []
+
+            index = repo.index
+            if to_add:
+                index.add(to_add)
+            if to_remove:
+                index.remove(to_remove)
+            # Committer-lõim jõudis muudatused vahepeal ise commitida
+            if repo.head.is_valid() and index.write_tree() == repo.head.commit.tree:
+                return []
+            commit = index.commit(
+                f"Väline muudatus: {dir_name} ({len(to_add) + len(to_remove)} faili)",
+                author=author,
+                committer=author
+            )
+        _mark_tracked(to_add, removed=to_remove)
+        _activity.record_first_commits(commit.hexsha, commit.committed_datetime.isoformat(), to_add)
+        logger.info(f"GIT: {commit.hexsha[:8]} - väline muudatus {dir_name} "
+                    f"({len(to_add)} muudetud/lisatud, {len(to_remove)} kustutatud)")
+    except (GitCommandError, OSError) as e:
+        logger.error(f"GIT viga välise muudatuse commitimisel ({dir_name}): {e}")
+        _record_git_failure(dir_name, "Automaatne", e)
+        return None
+    return to_add + to_remove
 
-                folder_name = parts[0]
-                filename = parts[-1]
 
-                # Käsitle erinevaid failitüüpe
-                is_txt = filename.endswith('.txt')
-                is_metadata = filename == '_metadata.json'
+def begin_activity_backfill():
+    """Kontrollib, kas muudatuste logi tuleb Giti ajaloost täita (serveri stardil).
 
-                if not is_txt and not is_metadata:
-                    continue
+    Kutsutakse enne commitide kirjutaja starti: ajalugu loetakse praeguse
+    HEAD-ini, hilisemad commitid lisatakse logisse pärast täitmist.
 
-                # Leia teose info _metadata.json failist
-                work_info = get_work_info_from_folder(folder_name)
+    Returns:
+        bool: Kas täitmine on vajalik (siis käivita backfill_activity_log taustal)
+    """
+    repo = get_or_init_repo()
+    with _repo_lock:
+        head = repo.head.commit.hexsha if repo.head.is_valid() else None
+    return _activity.begin_backfill(head)
 
-                if is_txt:
-                    # Lehekülje muudatus
-                    page_num = get_page_number_from_txt(folder_name, filename)
-                    file_key = f"{work_info['work_id']}/{page_num}"
-                    change_type = "page"
-                else:
-                    # Metaandmete muudatus
-                    page_num = None
-                    file_key = f"{work_info['work_id']}/_metadata"
-                    change_type = "metadata"
 
-                # Unikaalne võti (et vältida duplikaate)
-                if file_key in seen_files:
-                    continue
-                seen_files.add(file_key)
-
-                results.append({
-                    "commit_hash": commit.hexsha[:8],
-                    "full_hash": commit.hexsha,
-                    "author": commit.author.name,
-                    "date": commit.committed_datetime.isoformat(),
-                    "formatted_date": commit.committed_datetime.strftime("%d.%m.%Y %H:%M"),
-                    "message": commit.message.strip(),
-                    "work_id": work_info['work_id'],
-                    "title": work_info['title'],
-                    "year": work_info['year'],
-                    "work_author": work_info['author'],  # NB: 'author' on juba commit author
-                    "lehekylje_number": page_num,
-                    "filepath": filepath,
-                    "change_type": change_type  # "page" või "metadata"
-                })
-                
-                if len(results) >= limit:
-                    break
-            
-            if len(results) >= limit:
-                break
-                
-        except Exception as e:
-            logger.warning(f"Viga commiti {commit.hexsha[:8]} töötlemisel: {e}")
-            continue
-    
-    return results
+def backfill_activity_log():
+    """Täidab muudatuste logi Giti ajaloost (pärast begin_activity_backfill, taustalõimes).
+
+    Returns:
+        int: Lisatud ridade arv
+    """
+    return _activity.backfill_from_git(BASE_DIR, _activity_rows)
+
+
+def get_activity_log_stats():
+    """Tagastab muudatuste logi statistika (ridade ja failide arv)."""
+    return _activity.get_stats()
+
+
+def get_recent_activity(username=None, work_id=None, limit=50, before=None):
+    """
+    Tagastab viimased muudatused muudatuste logist (iga faili kohta viimane).
+
+    Args:
+        username: Kui määratud, tagastab ainult selle kasutaja muudatused
+        work_id: Kui määratud, tagastab ainult selle teose muudatused
+        limit: Maksimaalne kirjete arv
+        before: Kursor eelmise lehe vastusest (next_cursor)
+
+    Returns:
+        dict: {"commits": [...], "next_cursor": int või None, "backfilling": bool}
+        (backfilling - logi täidetakse veel Giti ajaloost, vanemad muudatused puuduvad)
+    """
+    backfilling = _activity.is_backfilling()
+    dir_name = None
+    if work_id:
+        from .utils import find_directory_by_id
+        dir_path = find_directory_by_id(work_id)
+        if not dir_path:
+            return {"commits": [], "next_cursor": None, "backfilling": backfilling}
+        dir_name = os.path.basename(dir_path)
+
+    rows = _activity.query(author=username, dir_name=dir_name, before=before, limit=limit)
+
+    results = []
+    for row in rows:
+        # Pealkiri jms loetakse praegustest metaandmetest (võisid pärast muutuda)
+        work_info = get_work_info_from_folder(row["dir_name"])
+        committed = datetime.fromisoformat(row["ts"])
+        results.append({
+            "activity_id": row["id"],
+            "commit_hash": row["commit_hash"][:8],
+            "full_hash": row["commit_hash"],
+            "author": row["author"],
+            "date": row["ts"],
+            "formatted_date": committed.strftime("%d.%m.%Y %H:%M"),
+            "message": row["message"],
+            "work_id": work_info['work_id'],
+            "title": work_info['title'],
+            "year": work_info['year'],
+            "work_author": work_info['author'],  # NB: 'author' on juba commit author
+            "lehekylje_number": row["page"],
+            "filepath": row["filepath"],
+            "change_type": row["change_type"]  # "page" või "metadata"
+        })
+
+    next_cursor = rows[-1]["id"] if len(rows) == limit else None
+    return {"commits": results, "next_cursor": next_cursor, "backfilling": backfilling}
+
+
+def get_recent_commits(username=None, limit=50):
+    """
+    Tagastab viimased muudatused, valikuliselt filtreerituna kasutaja järgi.
+
+    Args:
+        username: Kui määratud, tagastab ainult selle kasutaja muudatused
+        limit: Maksimaalne kirjete arv
+
+    Returns:
+        list: Muudatuste nimekiri koos teose ja lehekülje infoga
+    """
+    return get_recent_activity(username=username, limit=limit)["commits"]
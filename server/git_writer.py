@@ -0,0 +1,496 @@
+"""
+Giti commitide ühtne kirjutaja (group commit) püsiva salvestuste päevikuga.
+
+/save ja teised salvestused ei tee enam ise commitit päringu lõimes.
+Salvestus kirjutatakse state/git_journal.jsonl faili (append + fsync,
+koos failide sisuga), misjärel päring saab kohe vastuse ootel commiti
+ID-ga. Üks committer-lõim võtab järjekorrast korraga kõik ootel
+salvestused ja teeb neist commitid: järjestikused sama autori salvestused
+lähevad ühte commitisse, autori muutudes alustatakse uut - autorsus ja
+järjekord säilivad.
+
+Commit koostatakse päevikus olevast sisust (mitte tööpuu failidest), nii et
+kiiresti järgnenud teise kasutaja salvestus ei satu eelmise autori
+commitisse. Serveri stardil kirjutatakse kinnitamata salvestused
+päevikust uuesti kettale ja commititakse (redo). Ebaõnnestunud commiti
+salvestused jäävad päevikusse ja neid proovitakse sama autoriga uuesti
+(kasvava viivitusega); järgmised salvestused ootavad, et järjekord säiliks.
+Kui commit ei õnnestu ka GIT_COMMIT_MAX_ATTEMPTS katsega, märgitakse
+salvestused ebaõnnestunuks ("done" ilma commitita) ja järjekord liigub
+edasi - failid jäävad kettale ja välise muudatuse commit korjab need üles.
+
+Faili formaat (üks JSON objekt rea kohta):
+    {"op": "save", "id": 7, "author": "mari", "message": "Muuda: 1632-1/001.txt",
+     "files": [{"path": "1632-1/001.txt", "content": "..."}], "is_first_commit": false, "ts": "..."}
+    {"op": "done", "ids": [7, 8], "commit": "3f2a..."}
+    {"op": "done", "ids": [9], "commit": null, "error": "..."}   (ebaõnnestunud)
+    {"op": "seq", "next_id": 9}   (tühjendatud päeviku esimene rida)
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from datetime import datetime
+from io import BytesIO
+
+from git import Actor
+from git.index.typ import BaseIndexEntry
+from gitdb import IStream
+
+from .config import (
+    BASE_DIR, GIT_JOURNAL_FILE, GIT_COMMIT_MAX_BATCH, GIT_COMMIT_BATCH_WINDOW_SECONDS,
+    GIT_COMMIT_RETRY_SECONDS, GIT_COMMIT_RETRY_MAX_SECONDS, GIT_COMMIT_MAX_ATTEMPTS, get_logger
+)
+
+logger = get_logger(__name__)
+
+# Kui päevik on sellest suurem, kirjutatakse see ümber ainult ootel kirjetega
+COMPACT_THRESHOLD_BYTES = 4 * 1024 * 1024
+
+# Mitme viimase salvestuse tulemust hoitakse (commit_status päringute jaoks)
+RESULTS_LIMIT = 1000
+
+# Latentsuse statistika aken (viimased N salvestust)
+LATENCY_WINDOW = 1000
+
+# Läbilaskevõime arvutamise aken (sekundites)
+THROUGHPUT_WINDOW_SECONDS = 60
+
+_FILE_MODE = 0o100644
+
+
+def _write_work_file(relative_path, content):
+    """Kirjutab faili tööpuusse (loetav kõigile, Docker/root probleemi vältimiseks)."""
+    filepath = os.path.join(BASE_DIR, relative_path)
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.chmod(filepath, 0o644)
+
+
+def _commit_message(entries):
+    """Ühe commiti sõnum: üksiku salvestuse sõnum või koond mitme kohta."""
+    messages = [entry["message"] for entry in entries]
+    if len(messages) == 1:
+        return messages[0]
+    prefixes = {message.split(':', 1)[0] for message in messages}
+    prefix = prefixes.pop() if len(prefixes) == 1 else "Muuda"
+    files = {f["path"] for entry in entries for f in entry["files"]}
+    # Sama faili korduvad salvestused ühe reana
+    return f"{prefix}: {len(files)} faili\n\n" + "\n".join(f"- {message}" for message in dict.fromkeys(messages))
+
+
+class GitCommitWriter:
+    """Päevikuga group-commit kirjutaja.
+
+    Args:
+        repo_getter: Funktsioon, mis tagastab git.Repo objekti
+        repo_lock: Lukk, mida hoitakse Giti indeksi muutmise ajal (jagatud
+            teiste commitijatega, nt välised muudatused ja uued teosed)
+        on_failure: Funktsioon on_failure(path, username, error) commiti esimese ebaõnnestumise korral
+        on_commit: Funktsioon on_commit(commit_hash, author, ts, message, paths) pärast
+            õnnestunud commiti (nt muudatuste logi)
+    """
+
+    def __init__(self, repo_getter, repo_lock, on_failure=None, on_commit=None, path=GIT_JOURNAL_FILE):
+        self.path = path
+        self._repo_getter = repo_getter
+        self._repo_lock = repo_lock
+        self._on_failure = on_failure
+        self._on_commit = on_commit
+
+        self._lock = threading.RLock()
+        self._queue = queue.Queue()
+        self._pending = OrderedDict()  # id -> päeviku kirje (commitimata)
+        self._futures = {}             # id -> Future[dict]
+        self._enqueued_at = {}         # id -> monotonic aeg
+        self._results = OrderedDict()  # id -> {"state", "commit_hash", "error"}
+        self._next_id = 1
+        self._started = False
+
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._committed_at = deque()  # (monotonic aeg, salvestuste arv) läbilaskevõime jaoks
+        self._last_save_at = None      # monotonic aeg (hoolduse vaikse aja jaoks)
+        self._stats = {
+            "saves": 0,
+            "saves_committed": 0,
+            "saves_failed": 0,
+            "commits": 0,
+            "commit_retries": 0,
+            "last_error": None,
+            "batches": 0,
+            "max_batch": 0,
+            "max_queue_depth": 0,
+            "replayed": 0,
+            "journal_write_errors": 0,
+        }
+        self._load()
+
+    # ---------------------------------------------------------
+    # Päevik
+    # ---------------------------------------------------------
+
+    def _load(self):
+        """Loeb olemasoleva päeviku ja taastab commitimata salvestused."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Poolik viimane rida (crash kirjutamise ajal) - salvestus polnud kinnitatud
+                        continue
+                    if entry.get('op') == 'save':
+                        self._pending[entry['id']] = entry
+                        self._next_id = max(self._next_id, entry['id'] + 1)
+                    elif entry.get('op') == 'done':
+                        for entry_id in entry.get('ids', []):
+                            self._pending.pop(entry_id, None)
+                    elif entry.get('op') == 'seq':
+                        self._next_id = max(self._next_id, entry['next_id'])
+        except OSError as e:
+            logger.error(f"Giti päeviku lugemine ebaõnnestus ({self.path}): {e}")
+            return
+
+        if self._pending:
+            logger.info(f"Giti päevik: {len(self._pending)} commitimata salvestust")
+
+    def _write(self, entries):
+        """Lisab kirjed päevikusse ja teeb fsync (eeldab et lukk on võetud)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _maybe_compact(self):
+        """Tühjendab/kirjutab päeviku ümber, kui see on kasvanud (eeldab et lukk on võetud)."""
+        try:
+            if not self._pending:
+                # ID loendur jätkub ka pärast restarti (ootel ID-d ei kordu)
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps({"op": "seq", "next_id": self._next_id}) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                return
+            if os.path.getsize(self.path) < COMPACT_THRESHOLD_BYTES:
+                return
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({"op": "seq", "next_id": self._next_id}) + '\n')
+                for entry in self._pending.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Giti päeviku kompakteerimine ebaõnnestus: {e}")
+
+    # ---------------------------------------------------------
+    # Avalik liides
+    # ---------------------------------------------------------
+
+    def start(self):
+        """Kirjutab päeviku commitimata salvestused kettale ja käivitab committer-lõime.
+
+        Kutsutakse serveri stardil (ja igal juhul enne esimest salvestust),
+        et päevikust taastatud sisu ei kirjutaks üle uuemaid salvestusi.
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            replay = list(self._pending.values())
+            for entry in replay:
+                for f in entry["files"]:
+                    try:
+                        _write_work_file(f["path"], f["content"])
+                    except OSError as e:
+                        logger.error(f"Giti päeviku taastamine ebaõnnestus ({f['path']}): {e}")
+                self._futures[entry["id"]] = Future()
+                self._enqueued_at[entry["id"]] = time.monotonic()
+                self._queue.put(entry)
+            self._stats["replayed"] += len(replay)
+
+        if replay:
+            print(f"GIT PÄEVIK: {len(replay)} commitimata salvestust taastatud")
+        threading.Thread(target=self._run, daemon=True, name="git_committer").start()
+
+    def submit(self, files, author, message, is_first_commit=False):
+        """Salvestab päevikusse ja kirjutab failid kettale. Commit tehakse taustal.
+
+        Args:
+            files: [(suhteline tee, sisu)]
+            author: Kasutajanimi (commiti autor)
+            message: Commiti sõnum
+
+        Returns:
+            (commit_id, Future[dict]): Future lahendub {"success", "commit_hash"/"error"}
+
+        Raises:
+            OSError: päevikusse kirjutamine ebaõnnestus
+        """
+        self.start()
+        with self._lock:
+            entry_id = self._next_id
+            entry = {
+                "op": "save",
+                "id": entry_id,
+                "author": author,
+                "message": message,
+                "files": [{"path": path, "content": content} for path, content in files],
+                "is_first_commit": is_first_commit,
+                "ts": datetime.now().astimezone().isoformat(),
+            }
+            try:
+                self._write([entry])
+            except OSError:
+                self._stats["journal_write_errors"] += 1
+                raise
+            self._next_id += 1
+            self._pending[entry_id] = entry
+            future = Future()
+            self._futures[entry_id] = future
+            self._enqueued_at[entry_id] = time.monotonic()
+            self._last_save_at = self._enqueued_at[entry_id]
+            self._stats["saves"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._pending))
+
+            # Failid kirjutatakse luku all, et sama faili kaks salvestust
+            # jõuaksid kettale samas järjekorras kui päevikusse
+            for path, content in files:
+                _write_work_file(path, content)
+
+        self._queue.put(entry)
+        return entry_id, future
+
+    def submit_lock(self):
+        """Submit'ide lukk: hoia seda mitme submit'i ja nende eelduste kontrolli ümber.
+
+        Luku all ei saa teine salvestus vahepeal päevikusse ega faile kettale
+        kirjutada (lukk on korduvsisenetav, submit võtab selle uuesti).
+        """
+        return self._lock
+
+    def status(self, commit_id):
+        """Tagastab salvestuse oleku: {"state": pending|committed|failed|unknown, ...}."""
+        with self._lock:
+            if commit_id in self._pending:
+                return {"state": "pending", "commit_hash": None}
+            result = self._results.get(commit_id)
+        return dict(result) if result else {"state": "unknown", "commit_hash": None}
+
+    def pending_paths(self):
+        """Failid, mille salvestus on veel commitimata (suhtelised teed)."""
+        with self._lock:
+            return {f["path"] for entry in self._pending.values() for f in entry["files"]}
+
+    # ---------------------------------------------------------
+    # Committer
+    # ---------------------------------------------------------
+
+    def _take_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + GIT_COMMIT_BATCH_WINDOW_SECONDS
+        while len(batch) < GIT_COMMIT_MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            # Järjestikused sama autori salvestused -> üks commit
+            runs = []
+            for entry in batch:
+                if runs and runs[-1][0]["author"] == entry["author"]:
+                    runs[-1].append(entry)
+                else:
+                    runs.append([entry])
+            for run in runs:
+                self._commit_run(run)
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+
+    def _write_commit(self, entries, author_name, message):
+        """Kirjutab salvestuste sisu Giti ja teeb commiti. Tagastab (commit, failide teed)."""
+        repo = None
+        try:
+            repo = self._repo_getter()
+            with self._repo_lock:
+                blobs = {}
+                for entry in entries:
+                    for f in entry["files"]:
+                        data = f["content"].encode('utf-8')
+                        istream = repo.odb.store(IStream('blob', len(data), BytesIO(data)))
+                        blobs[f["path"]] = istream.binsha  # Hilisem salvestus võidab
+                index = repo.index
+                index.add([BaseIndexEntry((_FILE_MODE, binsha, 0, path)) for path, binsha in blobs.items()])
+                author = Actor(author_name, f"{author_name}@vutt.local")
+                commit = index.commit(
+                    message,
+                    author=author,
+                    committer=author,
+                    author_date=datetime.fromisoformat(entries[0]["ts"])
+                )
+        except Exception:
+            # Eemalda indeksisse lisatud failid, et need ei satuks teise commitisse
+            if repo is not None:
+                try:
+                    with self._repo_lock:
+                        repo.git.reset('-q', '--', *{f["path"] for entry in entries for f in entry["files"]})
+                except Exception as reset_error:
+                    logger.error(f"Giti indeksi taastamine ebaõnnestus: {reset_error}")
+            raise
+        self._refresh_index(repo)
+        return commit, sorted(blobs)
+
+    def _refresh_index(self, repo):
+        """Täidab commititud kirjete stat-andmed indeksis.
+
+        BaseIndexEntry'l pole stat-andmeid, mistõttu iga hilisem git status
+        räsiks need failid uuesti. Teed anda ei saa (update-index lisaks
+        need tööpuust indeksisse), seega värskendatakse kogu indeks - muutmata
+        stat-andmetega kirjeid ei loeta uuesti.
+        """
+        try:
+            with self._repo_lock:
+                repo.git.update_index('-q', '--refresh')
+        except Exception as e:
+            logger.warning(f"Giti indeksi värskendamine ebaõnnestus: {e}")
+
+    def _commit_run(self, entries):
+        """Teeb ühe autori järjestikustest salvestustest ühe commiti.
+
+        Ebaõnnestumisel proovitakse sama commitit uuesti (kasvava viivitusega)
+        kuni GIT_COMMIT_MAX_ATTEMPTS korda - salvestused jäävad seni päevikusse
+        ootele ja hilisemad salvestused ei jõua Giti enne neid. Pärast viimast
+        katset märgitakse salvestused ebaõnnestunuks, et järjekord ei jääks
+        ühe vigase partii taha kinni.
+        """
+        author_name = entries[0]["author"]
+        message = _commit_message(entries)
+        delay = GIT_COMMIT_RETRY_SECONDS
+        attempt = 1
+        while True:
+            try:
+                commit, paths = self._write_commit(entries, author_name, message)
+                break
+            except Exception as e:
+                if attempt == 1 and self._on_failure:
+                    for entry in entries:
+                        self._on_failure(entry["files"][0]["path"], author_name, e)
+                if attempt >= GIT_COMMIT_MAX_ATTEMPTS:
+                    logger.error(f"Git commit EBAÕNNESTUS: {len(entries)} salvestust (kasutaja: {author_name}, "
+                                 f"katse {attempt}), salvestused märgitud ebaõnnestunuks: {e}")
+                    self._finish_run(entries, None, str(e))
+                    return
+                logger.error(f"Git commit EBAÕNNESTUS: {len(entries)} salvestust (kasutaja: {author_name}, "
+                             f"katse {attempt}), uus katse {delay:g}s pärast: {e}")
+                with self._lock:
+                    self._stats["commit_retries"] += 1
+                    self._stats["last_error"] = str(e)
+                time.sleep(delay)
+                delay = min(delay * 2, GIT_COMMIT_RETRY_MAX_SECONDS)
+                attempt += 1
+
+        commit_hash = commit.hexsha
+        committed_at = commit.committed_datetime.isoformat()
+        logger.info(f"Git commit: {commit_hash[:8]} - {message.splitlines()[0]} "
+                    f"(autor: {author_name}, {len(entries)} salvestust)")
+        futures = self._finish_run(entries, commit_hash)
+
+        if self._on_commit:
+            try:
+                self._on_commit(commit_hash, author_name, committed_at, message, paths)
+            except Exception as e:
+                logger.error(f"on_commit ebaõnnestus ({commit_hash[:8]}): {e}")
+
+        result = {"success": True, "commit_hash": commit_hash}
+        for future in futures:
+            if future is not None:
+                future.set_result(result)
+
+    def _finish_run(self, entries, commit_hash, error=None):
+        """Märgib salvestused päevikus lõpetatuks ja eemaldab need järjekorrast.
+
+        Ebaõnnestunud partii (commit_hash=None) Future'id lahendatakse kohe
+        veaga; õnnestunud partii Future'id tagastatakse, et need lahendataks
+        pärast on_commit'i.
+        """
+        ids = [entry["id"] for entry in entries]
+        now = time.monotonic()
+        with self._lock:
+            done = {"op": "done", "ids": ids, "commit": commit_hash}
+            if error is not None:
+                done["error"] = error
+            try:
+                self._write([done])
+            except OSError as e:
+                self._stats["journal_write_errors"] += 1
+                logger.error(f"Giti päevikusse kirjutamine ebaõnnestus: {e}")
+            futures = []
+            for entry in entries:
+                self._pending.pop(entry["id"], None)
+                futures.append(self._futures.pop(entry["id"], None))
+                enqueued = self._enqueued_at.pop(entry["id"], None)
+                if commit_hash is None:
+                    self._results[entry["id"]] = {"state": "failed", "commit_hash": None, "error": error}
+                    continue
+                if enqueued is not None:
+                    self._latencies.append(now - enqueued)
+                self._results[entry["id"]] = {"state": "committed", "commit_hash": commit_hash}
+            while len(self._results) > RESULTS_LIMIT:
+                self._results.popitem(last=False)
+            if commit_hash is None:
+                self._stats["saves_failed"] += len(entries)
+                self._stats["last_error"] = error
+            else:
+                self._stats["commits"] += 1
+                self._stats["saves_committed"] += len(entries)
+                self._stats["last_error"] = None
+                self._committed_at.append((now, len(entries)))
+            self._maybe_compact()
+
+        if commit_hash is None:
+            result = {"success": False, "error": error}
+            for future in futures:
+                if future is not None:
+                    future.set_result(result)
+        return futures
+
+    def get_stats(self):
+        """Tagastab kirjutaja statistika: järjekorra sügavus, latentsus, läbilaskevõime."""
+        now = time.monotonic()
+        with self._lock:
+            while self._committed_at and now - self._committed_at[0][0] > THROUGHPUT_WINDOW_SECONDS:
+                self._committed_at.popleft()
+            recent_saves = sum(count for _, count in self._committed_at)
+            latencies = sorted(self._latencies)
+            oldest = min(self._enqueued_at.values()) if self._enqueued_at else None
+            return {
+                **self._stats,
+                "queue_depth": len(self._pending),
+                "oldest_pending_seconds": round(now - oldest, 3) if oldest is not None else None,
+                "idle_seconds": round(now - self._last_save_at, 1) if self._last_save_at is not None else None,
+                "saves_per_minute": recent_saves * 60 / THROUGHPUT_WINDOW_SECONDS,
+                "saves_per_commit": (round(self._stats["saves_committed"] / self._stats["commits"], 2)
+                                     if self._stats["commits"] else None),
+                "latency_ms": {
+                    "avg": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+                    "p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else None,
+                    "max": round(latencies[-1] * 1000, 1) if latencies else None,
+                },
+            }
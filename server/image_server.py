@@ -255,16 +255,17 @@ class SafeThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServe
         traceback.print_exc()
 
 
-print(f"Pildiserver käivitub pordil {PORT} (Multi-threaded)...")
-print(f"Juurkaust: {DIRECTORY}")
+if __name__ == '__main__':
+    print(f"Pildiserver käivitub pordil {PORT} (Multi-threaded)...")
+    print(f"Juurkaust: {DIRECTORY}")
 
-# Ehita cache stardil (kriitiline NanoID toe jaoks)
-try:
-    build_work_id_cache()
-except Exception as e:
-    print(f"Viga cache ehitamisel: {e}")
+    # Ehita cache stardil (kriitiline NanoID toe jaoks)
+    # NB: ainult serverina käivitades - failiserver impordib siit pisipiltide funktsioone
+    try:
+        build_work_id_cache()
+    except Exception as e:
+        print(f"Viga cache ehitamisel: {e}")
 
-if __name__ == '__main__':
     server = SafeThreadingHTTPServer(("", PORT), ImageRequestHandler)
     print("Pildiserver töötab.")
     try:
@@ -0,0 +1,191 @@
+"""
+Otsinguindeksi uuenduste püsiv väljundjärjekord (outbox).
+
+Iga sünkroonimispäring kirjutatakse enne vastuse saatmist
+state/index_outbox.jsonl faili (append + fsync). Kui sünk õnnestub,
+lisatakse faili ack-kirje. Serveri stardil ja pärast Meilisearchi
+katkestust loetakse kinnitamata kirjed uuesti ja sünkroonitakse
+(teose kaupa koondatuna), nii et indeks ei jää vaikselt maha.
+
+Faili formaat (üks JSON objekt rea kohta):
+    {"op": "enqueue", "seq": 12, "dir": "1632-1", "full": false, "pages": ["001.txt"], "metadata": false, "ts": "..."}
+    {"op": "ack", "seq": 12}
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+from .config import INDEX_OUTBOX_FILE, get_logger
+
+logger = get_logger(__name__)
+
+# Kui fail on sellest suurem, kirjutatakse see ümber ainult ootel kirjetega
+COMPACT_THRESHOLD_BYTES = 1024 * 1024
+
+
+class IndexOutbox:
+    """Append-only outbox indeksi uuenduste jaoks.
+
+    Hoiab mälus ootel kirjete koopiat, et pending() ei peaks faili lugema.
+    """
+
+    def __init__(self, path=INDEX_OUTBOX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = {}      # seq -> {"dir", "full", "pages"}
+        self._inflight = set()  # seq-id, mille sünk on praegu järjekorras/töös
+        self._next_seq = 1
+        self._stats = {"appended": 0, "acked": 0, "dropped": 0, "replayed": 0, "write_errors": 0}
+        self._load()
+
+    def _load(self):
+        """Loeb olemasoleva faili ja taastab ootel kirjed."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Poolik viimane rida (crash kirjutamise ajal)
+                        continue
+                    seq = entry.get('seq', 0)
+                    self._next_seq = max(self._next_seq, seq + 1)
+                    if entry.get('op') == 'enqueue':
+                        self._pending[seq] = {
+                            "dir": entry['dir'],
+                            "full": entry.get('full', False),
+                            "pages": entry.get('pages', []),
+                            "metadata": entry.get('metadata', False),
+                        }
+                    elif entry.get('op') == 'ack':
+                        self._pending.pop(seq, None)
+        except OSError as e:
+            logger.error(f"Outboxi lugemine ebaõnnestus ({self.path}): {e}")
+            return
+
+        if self._pending:
+            logger.info(f"Outbox: {len(self._pending)} kinnitamata indeksi uuendust")
+
+    def _write(self, entries):
+        """Lisab kirjed faili ja teeb fsync (eeldab et lukk on võetud)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, dir_name, full=False, pages=None, metadata=False):
+        """Salvestab päringu püsivalt. Tagastab seq (või None, kui kirjutamine ebaõnnestus)."""
+        with self._lock:
+            seq = self._next_seq
+            entry = {
+                "op": "enqueue",
+                "seq": seq,
+                "dir": dir_name,
+                "full": full,
+                "pages": sorted(pages or []),
+                "metadata": metadata,
+                "ts": datetime.now().isoformat(),
+            }
+            try:
+                self._write([entry])
+            except OSError as e:
+                self._stats["write_errors"] += 1
+                logger.error(f"Outboxi kirjutamine ebaõnnestus: {e}")
+                return None
+            self._next_seq += 1
+            self._pending[seq] = {"dir": dir_name, "full": full, "pages": entry["pages"], "metadata": metadata}
+            self._inflight.add(seq)
+            self._stats["appended"] += 1
+            return seq
+
+    def ack(self, seqs, dropped=False):
+        """Märgib kirjed tehtuks (sünk õnnestus või teos on kadunud)."""
+        seqs = [s for s in seqs if s is not None]
+        with self._lock:
+            seqs = [s for s in seqs if s in self._pending]
+            if not seqs:
+                return
+            try:
+                self._write([{"op": "ack", "seq": s} for s in seqs])
+            except OSError as e:
+                self._stats["write_errors"] += 1
+                logger.error(f"Outboxi kirjutamine ebaõnnestus: {e}")
+                return
+            for s in seqs:
+                self._pending.pop(s, None)
+                self._inflight.discard(s)
+            self._stats["dropped" if dropped else "acked"] += len(seqs)
+            self._maybe_compact()
+
+    def release(self, seqs):
+        """Sünk ebaõnnestus - kirjed jäävad ootele ja neid proovitakse hiljem uuesti."""
+        with self._lock:
+            for s in seqs:
+                self._inflight.discard(s)
+
+    def claim_pending(self):
+        """Võtab kõik ootel kirjed, mis pole töös, ja koondab need teose kaupa.
+
+        Returns:
+            dict: dir_name -> {"full": bool, "pages": set, "metadata": bool, "seqs": list}
+        """
+        by_work = {}
+        with self._lock:
+            for seq, entry in sorted(self._pending.items()):
+                if seq in self._inflight:
+                    continue
+                self._inflight.add(seq)
+                work = by_work.setdefault(entry["dir"], {"full": False, "pages": set(), "metadata": False, "seqs": []})
+                work["full"] = work["full"] or entry["full"]
+                work["pages"].update(entry["pages"])
+                work["metadata"] = work["metadata"] or entry.get("metadata", False)
+                work["seqs"].append(seq)
+            self._stats["replayed"] += sum(len(w["seqs"]) for w in by_work.values())
+        for work in by_work.values():
+            if work["full"]:
+                work["pages"].clear()
+                work["metadata"] = False
+        return by_work
+
+    def has_pending(self, dir_name):
+        """Kas teosel on kinnitamata (ootel või töös) kirjeid."""
+        with self._lock:
+            return any(entry["dir"] == dir_name for entry in self._pending.values())
+
+    def _maybe_compact(self):
+        """Tühjendab/kirjutab faili ümber, kui see on kasvanud (eeldab et lukk on võetud)."""
+        try:
+            if not self._pending:
+                # Kõik tehtud - seq loendur jätkub mälus, fail võib olla tühi
+                with open(self.path, 'w', encoding='utf-8') as f:
+                    f.flush()
+                    os.fsync(f.fileno())
+                return
+            if os.path.getsize(self.path) < COMPACT_THRESHOLD_BYTES:
+                return
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for seq, entry in sorted(self._pending.items()):
+                    f.write(json.dumps({"op": "enqueue", "seq": seq, **entry}, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Outboxi kompakteerimine ebaõnnestus: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "pending": len(self._pending),
+                "inflight": len(self._inflight),
+                "pending_works": len({e["dir"] for e in self._pending.values()}),
+            }
@@ -0,0 +1,313 @@
+"""
+Otsinguindeksi ja failisüsteemi pidev võrdlus (reconciler).
+
+Taustalõim käib teosed ükshaaval läbi (ringiratast, tähestiku järjekorras)
+ja võrdleb iga teose kohta:
+- lehekülgede arvu (teose_lehekylgede_arv) indeksis ja failisüsteemis
+- puuduvaid ja üleliigseid dokumentide ID-sid
+- dokumentide sisu räsi (content_hash) oodatava dokumendiga
+
+Lahknevused parandatakse tavalise sünki kaudu: üleliigsed ID-d
+kustutatakse, lahknevate dokumentide räsid unustatakse ja teos pannakse
+täissünki järjekorda.
+
+Lõim on madala prioriteediga: pärast iga teost oodatakse nii kaua, et
+failisüsteemist loetud baitide hulk ei ületaks RECONCILE_IO_BUDGET_BYTES
+sekundis. Indeksi ümberehituse ajal ja Meilisearchi katkestuse ajal
+lõim ootab.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+from .config import (
+    BASE_DIR, INDEX_NAME, RECONCILE_IO_BUDGET_BYTES, RECONCILE_PASS_INTERVAL_SECONDS,
+    get_logger
+)
+from .meili_client import get_meili_client, MeiliError
+from .doc_fingerprints import CONTENT_HASH_FIELD
+
+logger = get_logger(__name__)
+
+# Viivitus pärast serveri starti (outbox replay ja muu stardikoormus lõpeb enne)
+RECONCILE_INITIAL_DELAY = 300
+
+# Minimaalne paus teoste vahel (sekundites), ka väikeste teoste korral
+RECONCILE_MIN_PAUSE = 0.2
+
+# Kaua oodatakse, kui Meilisearch pole kättesaadav või ümberehitus käib
+RECONCILE_BACKOFF = 60
+
+# Dokumente ühes /documents/fetch päringus
+RECONCILE_FETCH_LIMIT = 1000
+
+_stats_lock = threading.Lock()
+_state = {"state": "idle", "passes": 0}
+_current_pass = None
+_last_pass = None
+_totals = {
+    "works_checked": 0,
+    "works_repaired": 0,
+    "missing_ids": 0,
+    "extra_ids": 0,
+    "page_count_mismatches": 0,
+    "hash_mismatches": 0,
+    "errors": 0,
+}
+
+
+def _new_pass_stats(works_total):
+    return {
+        "started_at": datetime.now().isoformat(),
+        "works_total": works_total,
+        "works_checked": 0,
+        "works_repaired": 0,
+        "documents_checked": 0,
+        "missing_ids": 0,
+        "extra_ids": 0,
+        "page_count_mismatches": 0,
+        "hash_mismatches": 0,
+        "bytes_read": 0,
+        "errors": 0,
+        "repaired_works": [],
+    }
+
+
+def get_reconciler_stats():
+    """Tagastab võrdluse oleku, käimasoleva ja viimase täisringi statistika."""
+    with _stats_lock:
+        return {
+            **_state,
+            "io_budget_bytes_per_second": RECONCILE_IO_BUDGET_BYTES,
+            "pass_interval_seconds": RECONCILE_PASS_INTERVAL_SECONDS,
+            "current_pass": dict(_current_pass) if _current_pass else None,
+            "last_pass": dict(_last_pass) if _last_pass else None,
+            "totals": dict(_totals),
+        }
+
+
+def _set_state(state, **fields):
+    with _stats_lock:
+        _state["state"] = state
+        _state.update(fields)
+
+
+def _filter_value(value):
+    """Jutumärkides filtri väärtus (Meilisearchi filtri süntaks)."""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def fetch_indexed_work(dir_name, work_id):
+    """Tagastab teose dokumendid indeksis: {doc_id: {"hash", "page_count"}}.
+
+    Otsitakse nii kausta nime kui work_id järgi, et leida ka vana ID-ga
+    jäänud dokumendid.
+    """
+    conditions = [f"originaal_kataloog = {_filter_value(dir_name)}"]
+    if work_id:
+        conditions.append(f"work_id = {_filter_value(work_id)}")
+
+    client = get_meili_client()
+    indexed = {}
+    offset = 0
+    while True:
+        result = client.request('POST', f'/indexes/{INDEX_NAME}/documents/fetch', {
+            'filter': ' OR '.join(conditions),
+            'fields': ['id', CONTENT_HASH_FIELD, 'teose_lehekylgede_arv'],
+            'offset': offset,
+            'limit': RECONCILE_FETCH_LIMIT,
+        }, idempotent=True)
+        docs = result.get('results', [])
+        for doc in docs:
+            indexed[doc['id']] = {
+                "hash": doc.get(CONTENT_HASH_FIELD),
+                "page_count": doc.get('teose_lehekylgede_arv'),
+            }
+        if len(docs) < RECONCILE_FETCH_LIMIT:
+            return indexed
+        offset += len(docs)
+
+
+def _work_read_bytes(dir_path):
+    """Teose sünkil loetavate failide (.txt, .json) kogumaht - I/O eelarve jaoks."""
+    total = 0
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if entry.name.endswith(('.txt', '.json')) and entry.is_file():
+                    total += entry.stat().st_size
+    except OSError:
+        pass
+    return total
+
+
+def reconcile_work(dir_name, repair=True):
+    """Võrdleb ühe teose dokumente indeksis ja failisüsteemis.
+
+    Args:
+        dir_name: Teose kausta nimi
+        repair: Kas lahknevused parandada (kustutus + täissünk)
+
+    Teos jäetakse vahele, kui selle sünk on pooleli (järjekorras, töös või
+    outboxis): indeks ei pea siis veel failisüsteemiga klappima.
+
+    Returns:
+        dict: {"documents", "missing", "extra", "page_count", "hash", "bytes"}
+        või None, kui teost ei saa indekseerida (nt pilte pole) või sünk on pooleli
+
+    Raises:
+        MeiliError: indeksi lugemine ebaõnnestus
+    """
+    from .meilisearch_ops import (
+        build_work_documents, get_fingerprint_store, has_pending_sync, submit_delete,
+        sync_work_to_meilisearch_async
+    )
+
+    if has_pending_sync(dir_name):
+        return None
+    built = build_work_documents(dir_name)
+    if not built:
+        return None
+    ctx, documents, _, _ = built
+
+    expected = {doc['id']: doc[CONTENT_HASH_FIELD] for doc in documents}
+    indexed = fetch_indexed_work(dir_name, ctx['work_id'])
+    # Teost muudeti võrdluse ajal - järgmine ring kontrollib uuesti
+    if has_pending_sync(dir_name):
+        return None
+
+    missing = sorted(set(expected) - set(indexed))
+    extra = sorted(set(indexed) - set(expected))
+    page_count = sorted(
+        doc_id for doc_id, info in indexed.items()
+        if doc_id in expected and info["page_count"] != len(documents)
+    )
+    # Räsita dokumendid (indekseeritud enne content_hash välja lisamist) ei ole lahknevus
+    hash_mismatch = sorted(
+        doc_id for doc_id, info in indexed.items()
+        if doc_id in expected and info["hash"] is not None and info["hash"] != expected[doc_id]
+    )
+
+    if repair and (missing or extra or page_count or hash_mismatch):
+        store = get_fingerprint_store()
+        if extra:
+            submit_delete(extra)
+        # Unusta räsid, et tavaline sünk need dokumendid kindlasti uuesti saadaks
+        store.invalidate(doc_ids=sorted(set(missing) | set(extra) | set(page_count) | set(hash_mismatch)))
+        sync_work_to_meilisearch_async(dir_name)
+        print(
+            f"RECONCILE: {dir_name} parandamisel (puudu {len(missing)}, üleliigseid {len(extra)}, "
+            f"lk arv {len(page_count)}, sisu {len(hash_mismatch)})"
+        )
+
+    return {
+        "documents": len(documents),
+        "missing": len(missing),
+        "extra": len(extra),
+        "page_count": len(page_count),
+        "hash": len(hash_mismatch),
+        "bytes": _work_read_bytes(ctx['dir_path']),
+    }
+
+
+def _list_work_dirs():
+    if not os.path.isdir(BASE_DIR):
+        return []
+    return sorted(
+        entry.name for entry in os.scandir(BASE_DIR)
+        if entry.is_dir() and not entry.name.startswith('.')
+    )
+
+
+def _wait_until_ready():
+    """Ootab, kuni Meilisearch on kättesaadav ja täisindekseerimine ei käi."""
+    from .search_reindex import is_reindex_running
+
+    while get_meili_client().breaker.state == "open" or is_reindex_running():
+        _set_state("paused")
+        time.sleep(RECONCILE_BACKOFF)
+    _set_state("running")
+
+
+def run_reconcile_pass():
+    """Käib kõik teosed ühe korra läbi. Tagastab täisringi statistika."""
+    global _current_pass, _last_pass
+
+    dir_names = _list_work_dirs()
+    stats = _new_pass_stats(len(dir_names))
+    with _stats_lock:
+        _current_pass = stats
+    _set_state("running")
+
+    for dir_name in dir_names:
+        _wait_until_ready()
+        started = time.monotonic()
+        try:
+            result = reconcile_work(dir_name)
+        except MeiliError as e:
+            print(f"RECONCILE: {dir_name} kontroll ebaõnnestus: {e}")
+            with _stats_lock:
+                stats["errors"] += 1
+                _totals["errors"] += 1
+            time.sleep(RECONCILE_MIN_PAUSE)
+            continue
+        except Exception as e:
+            logger.error(f"Võrdlus ebaõnnestus ({dir_name}): {e}")
+            with _stats_lock:
+                stats["errors"] += 1
+                _totals["errors"] += 1
+            result = None
+
+        if result:
+            repaired = bool(result["missing"] or result["extra"] or result["page_count"] or result["hash"])
+            with _stats_lock:
+                stats["works_checked"] += 1
+                stats["documents_checked"] += result["documents"]
+                stats["missing_ids"] += result["missing"]
+                stats["extra_ids"] += result["extra"]
+                stats["page_count_mismatches"] += result["page_count"]
+                stats["hash_mismatches"] += result["hash"]
+                stats["bytes_read"] += result["bytes"]
+                _totals["works_checked"] += 1
+                _totals["missing_ids"] += result["missing"]
+                _totals["extra_ids"] += result["extra"]
+                _totals["page_count_mismatches"] += result["page_count"]
+                _totals["hash_mismatches"] += result["hash"]
+                if repaired:
+                    stats["works_repaired"] += 1
+                    _totals["works_repaired"] += 1
+                    # Viimase ringi parandatud teosed (piiratud arv)
+                    if len(stats["repaired_works"]) < 100:
+                        stats["repaired_works"].append(dir_name)
+
+        # I/O eelarve: oota nii kaua, nagu selle teose lugemine "maksma läks"
+        budget_seconds = (result["bytes"] / RECONCILE_IO_BUDGET_BYTES
+                          if result and RECONCILE_IO_BUDGET_BYTES > 0 else 0)
+        pause = max(RECONCILE_MIN_PAUSE, budget_seconds - (time.monotonic() - started))
+        time.sleep(pause)
+
+    stats["finished_at"] = datetime.now().isoformat()
+    with _stats_lock:
+        _last_pass = stats
+        _current_pass = None
+        _state["passes"] += 1
+    print(
+        f"RECONCILE: Ring lõpetatud - {stats['works_checked']} teost, "
+        f"parandatud {stats['works_repaired']}, vigu {stats['errors']}"
+    )
+    return stats
+
+
+def reconcile_loop():
+    """Daemon loop: võrdleb indeksit failisüsteemiga ringiratast."""
+    time.sleep(RECONCILE_INITIAL_DELAY)
+    print("RECONCILE: Taustalõim käivitunud")
+    while True:
+        try:
+            run_reconcile_pass()
+        except Exception as e:
+            print(f"RECONCILE LOOP: Viga: {e}")
+        _set_state("sleeping", next_pass_at=datetime.fromtimestamp(
+            time.time() + RECONCILE_PASS_INTERVAL_SECONDS).isoformat())
+        time.sleep(RECONCILE_PASS_INTERVAL_SECONDS)
@@ -0,0 +1,285 @@
+"""
+Uute teoste sisselugemise konveier.
+
+Kui andmekausta kopeeritakse korraga palju teoseid, ei töödelda neid enam
+ükshaaval (metaandmed -> ootav indekseerimine -> commit), vaid etappide
+kaupa, igal etapil oma piiratud järjekord ja lõimed:
+
+1. metadata  - vaikimisi _metadata.json (INGEST_METADATA_WORKERS lõime)
+2. thumbnail - esimese lehe pisipilt (image_server.get_or_create_thumbnail)
+3. git       - mitme teose txt/json failid ühe originaal-OCR commitina
+4. index     - mitme teose dokumendid ühe Meilisearchi taskiga
+
+Täis järjekord peatab eelmise etapi (ja lõpuks submit() kutsuja), nii et
+mälus on korraga piiratud arv teoseid. Pisipildi ebaõnnestumine ei peata
+teose sisselugemist; Giti ja indekseerimise vead logitakse (indekseerimise
+kirjed jäävad outboxi ja neid proovitakse hiljem uuesti).
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from .config import (
+    BASE_DIR, INGEST_QUEUE_SIZE, INGEST_METADATA_WORKERS, INGEST_THUMBNAIL_WORKERS,
+    INGEST_GIT_BATCH, INGEST_INDEX_BATCH, INGEST_BATCH_WINDOW_SECONDS, get_logger
+)
+from .utils import atomic_write_json, generate_default_metadata
+from .git_ops import commit_new_works_to_git
+from .meilisearch_ops import index_new_works, wait_for_sync
+
+logger = get_logger(__name__)
+
+STAGES = ("metadata", "thumbnail", "git", "index")
+
+# Kaua indekseerimise etapp Meilisearchi taski lõppu ootab (sekundites)
+INGEST_INDEX_TIMEOUT = 300
+
+# Mitu viimati lõpetatud teost progressis näidatakse
+RECENT_LIMIT = 50
+
+
+def _take_batch(stage_queue, max_items, window):
+    """Ootab esimest teost ja kogub kuni window sekundit lisa (kuni max_items)."""
+    items = [stage_queue.get()]
+    deadline = time.monotonic() + window
+    while len(items) < max_items:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            items.append(stage_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return items
+
+
+class IngestPipeline:
+    """Etappidega sisselugemise konveier.
+
+    Args:
+        on_committed: Funktsioon on_committed(dir_name), mis kutsutakse pärast
+            teose edukat commitimist (nt teose algne hetktõmmis välise muudatuse jälgimiseks)
+    """
+
+    def __init__(self, on_committed=None):
+        self._on_committed = on_committed
+        self._queues = {stage: queue.Queue(maxsize=INGEST_QUEUE_SIZE) for stage in STAGES}
+
+        self._lock = threading.Lock()
+        self._started = False
+        self._works = {}  # dir_name -> {"stage", "active", "submitted", "stage_started"}
+        self._recent = deque(maxlen=RECENT_LIMIT)
+        self._stage_stats = {
+            stage: {"active": 0, "processed": 0, "failed": 0, "seconds": 0.0}
+            for stage in STAGES
+        }
+        for stage in ("git", "index"):
+            self._stage_stats[stage].update({"batches": 0, "max_batch": 0})
+        self._totals = {"submitted": 0, "completed": 0, "failed": 0}
+
+    def _start(self):
+        """Käivitab etappide lõimed esimesel submit'il (eeldab et lukk on võetud)."""
+        if self._started:
+            return
+        workers = (
+            [("metadata", self._metadata_worker)] * max(1, INGEST_METADATA_WORKERS)
+            + [("thumbnail", self._thumbnail_worker)] * max(1, INGEST_THUMBNAIL_WORKERS)
+            + [("git", self._git_worker), ("index", self._index_worker)]
+        )
+        for i, (stage, target) in enumerate(workers):
+            threading.Thread(target=target, daemon=True, name=f"ingest_{stage}_{i}").start()
+        self._started = True
+
+    def submit(self, dir_name):
+        """Lisab uue teose konveierisse.
+
+        Blokeerub, kui metaandmete järjekord on täis.
+
+        Returns:
+            False, kui teos on juba konveieris
+        """
+        with self._lock:
+            if dir_name in self._works:
+                return False
+            self._start()
+            now = time.monotonic()
+            self._works[dir_name] = {
+                "stage": "metadata", "active": False, "submitted": now, "stage_started": now
+            }
+            self._totals["submitted"] += 1
+        self._queues["metadata"].put(dir_name)
+        return True
+
+    def is_active(self, dir_name):
+        """Kas teos on veel konveieris (Giti etapp pole lõppenud)?"""
+        with self._lock:
+            work = self._works.get(dir_name)
+            return work is not None and work["stage"] != "index"
+
+    # ---------------------------------------------------------
+    # Etappide arvestus
+    # ---------------------------------------------------------
+
+    def _begin(self, stage, dir_names):
+        now = time.monotonic()
+        with self._lock:
+            self._stage_stats[stage]["active"] += len(dir_names)
+            for dir_name in dir_names:
+                work = self._works.get(dir_name)
+                if work:
+                    work["active"] = True
+        return now
+
+    def _advance(self, dir_name, stage):
+        """Paneb teose järgmise etapi järjekorda (blokeerub, kui see on täis)."""
+        with self._lock:
+            work = self._works.get(dir_name)
+            if work:
+                work.update(stage=stage, active=False, stage_started=time.monotonic())
+        self._queues[stage].put(dir_name)
+
+    def _end(self, stage, dir_names, started, failed=()):
+        elapsed = time.monotonic() - started
+        with self._lock:
+            stats = self._stage_stats[stage]
+            stats["active"] -= len(dir_names)
+            stats["processed"] += len(dir_names) - len(failed)
+            stats["failed"] += len(failed)
+            stats["seconds"] += elapsed
+            if "batches" in stats:
+                stats["batches"] += 1
+                stats["max_batch"] = max(stats["max_batch"], len(dir_names))
+
+    def _finish(self, dir_name, failed_stage=None):
+        """Eemaldab teose konveierist ja lisab viimati lõpetatute hulka."""
+        with self._lock:
+            work = self._works.pop(dir_name, None)
+            if work is None:
+                return
+            self._totals["failed" if failed_stage else "completed"] += 1
+            self._recent.append({
+                "dir_name": dir_name,
+                "result": "failed" if failed_stage else "done",
+                "failed_stage": failed_stage,
+                "seconds": round(time.monotonic() - work["submitted"], 2),
+                "finished_at": datetime.now().isoformat(),
+            })
+
+    # ---------------------------------------------------------
+    # Etapid
+    # ---------------------------------------------------------
+
+    def _metadata_worker(self):
+        while True:
+            dir_name = self._queues["metadata"].get()
+            started = self._begin("metadata", [dir_name])
+            try:
+                dir_path = os.path.join(BASE_DIR, dir_name)
+                meta_path = os.path.join(dir_path, '_metadata.json')
+                if not os.path.isdir(dir_path):
+                    raise FileNotFoundError(f"Kaust kadus: {dir_path}")
+                if not os.path.exists(meta_path):
+                    atomic_write_json(meta_path, generate_default_metadata(dir_name))
+                    print(f"AUTOMAATNE METADATA: Loodud fail {meta_path}")
+            except Exception as e:
+                print(f"Viga metaandmete loomisel ({dir_name}): {e}")
+                self._end("metadata", [dir_name], started, failed=[dir_name])
+                self._finish(dir_name, failed_stage="metadata")
+                continue
+            self._end("metadata", [dir_name], started)
+            self._advance(dir_name, "thumbnail")
+
+    def _thumbnail_worker(self):
+        from .image_server import get_or_create_thumbnail
+
+        while True:
+            dir_name = self._queues["thumbnail"].get()
+            started = self._begin("thumbnail", [dir_name])
+            failed = []
+            try:
+                thumb = get_or_create_thumbnail(os.path.join(BASE_DIR, dir_name))
+                # Tagastab originaalpildi (või None), kui pisipilti ei saanud teha
+                if not thumb or not os.path.basename(thumb).startswith('_thumb_'):
+                    failed.append(dir_name)
+            except Exception as e:
+                print(f"[THUMB] Viga ({dir_name}): {e}")
+                failed.append(dir_name)
+            # Pisipilt pole sisselugemiseks hädavajalik - teos liigub edasi
+            self._end("thumbnail", [dir_name], started, failed=failed)
+            self._advance(dir_name, "git")
+
+    def _git_worker(self):
+        while True:
+            batch = _take_batch(self._queues["git"], INGEST_GIT_BATCH, INGEST_BATCH_WINDOW_SECONDS)
+            started = self._begin("git", batch)
+            try:
+                committed = set(commit_new_works_to_git(batch))
+            except Exception as e:
+                print(f"Viga uute teoste commitimisel: {e}")
+                committed = set()
+            failed = [dir_name for dir_name in batch if dir_name not in committed]
+            if committed:
+                print(f"SISSELUGEMINE: {len(committed)} teost commititud")
+
+            # Commitimata teosele hetktõmmist ei salvestata - nii leiab välise
+            # muudatuse jälgija selle failid hiljem ja commitib need
+            for dir_name in batch:
+                if self._on_committed and dir_name in committed:
+                    try:
+                        self._on_committed(dir_name)
+                    except Exception as e:
+                        logger.error(f"on_committed ebaõnnestus ({dir_name}): {e}")
+            self._end("git", batch, started, failed=failed)
+            for dir_name in batch:
+                self._advance(dir_name, "index")
+
+    def _index_worker(self):
+        while True:
+            batch = _take_batch(self._queues["index"], INGEST_INDEX_BATCH, INGEST_BATCH_WINDOW_SECONDS)
+            # Vahepeal kustutatud/ümber nimetatud kaustad
+            for dir_name in [d for d in batch if not os.path.isdir(os.path.join(BASE_DIR, d))]:
+                batch.remove(dir_name)
+                self._finish(dir_name, failed_stage="index")
+            started = self._begin("index", batch)
+            try:
+                ok = wait_for_sync(index_new_works(batch), timeout=INGEST_INDEX_TIMEOUT) if batch else True
+            except Exception as e:
+                print(f"Viga uute teoste indekseerimisel: {e}")
+                ok = False
+            failed = [] if ok else batch
+            self._end("index", batch, started, failed=failed)
+            for dir_name in batch:
+                self._finish(dir_name, failed_stage=None if ok else "index")
+
+    def get_stats(self):
+        """Tagastab konveieri progressi: etappide järjekorrad, töös teosed, viimati lõpetatud."""
+        now = time.monotonic()
+        with self._lock:
+            stages = {}
+            for stage in STAGES:
+                stats = dict(self._stage_stats[stage])
+                stats["queued"] = self._queues[stage].qsize()
+                stats["seconds"] = round(stats["seconds"], 2)
+                stages[stage] = stats
+            works = sorted(self._works.items(), key=lambda item: item[1]["submitted"])
+            return {
+                "running": self._started,
+                "in_flight": len(works),
+                "queue_size": INGEST_QUEUE_SIZE,
+                "stages": stages,
+                "works": [
+                    {
+                        "dir_name": dir_name,
+                        "stage": work["stage"],
+                        "active": work["active"],
+                        "seconds_in_stage": round(now - work["stage_started"], 2),
+                        "seconds_total": round(now - work["submitted"], 2),
+                    }
+                    for dir_name, work in works[:100]
+                ],
+                "recent": list(self._recent),
+                "totals": dict(self._totals),
+            }
@@ -0,0 +1,148 @@
+"""
+Minimaalne Linuxi inotify liides (ctypes, ilma väliste sõltuvusteta).
+
+Kasutab libc inotify_init1/inotify_add_watch/inotify_rm_watch funktsioone.
+Kui inotify pole saadaval (mitte-Linux, libc puudub, kerneli piirang),
+viskab konstruktor InotifyUnavailable - kutsuja kasutab siis polling'ut.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+
+# Sündmuste maskid (vt inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+_READ_SIZE = 64 * 1024
+
+
+class InotifyUnavailable(Exception):
+    """inotify pole sellel süsteemil kasutatav."""
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        init1 = libc.inotify_init1
+        add_watch = libc.inotify_add_watch
+        rm_watch = libc.inotify_rm_watch
+    except (OSError, AttributeError) as e:
+        raise InotifyUnavailable(f"libc inotify puudub: {e}")
+    init1.argtypes = [ctypes.c_int]
+    init1.restype = ctypes.c_int
+    add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    add_watch.restype = ctypes.c_int
+    rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    rm_watch.restype = ctypes.c_int
+    return init1, add_watch, rm_watch
+
+
+class Inotify:
+    """inotify failikirjeldaja koos wd -> kausta tee kaardistusega.
+
+    Ei ole lõimekindel - kasutatakse ühest jälgija lõimest.
+    """
+
+    def __init__(self):
+        self._init1, self._add_watch, self._rm_watch = _load_libc()
+        fd = self._init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise InotifyUnavailable(f"inotify_init1 ebaõnnestus: {os.strerror(err)}")
+        self._fd = fd
+        self._paths = {}  # wd -> path
+        self._wds = {}    # path -> wd
+
+    def fileno(self):
+        return self._fd
+
+    def add_watch(self, path, mask):
+        """Lisab kausta jälgimise. Tagastab wd.
+
+        Raises:
+            OSError: nt ENOENT (kaust kadus) või ENOSPC (max_user_watches täis)
+        """
+        wd = self._add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self._paths[wd] = path
+        self._wds[path] = wd
+        return wd
+
+    def remove_watch(self, path):
+        """Lõpetab kausta jälgimise (kui see on veel jälgitav)."""
+        wd = self._wds.pop(path, None)
+        if wd is None:
+            return
+        self._paths.pop(wd, None)
+        self._rm_watch(self._fd, wd)
+
+    def is_watched(self, path):
+        return path in self._wds
+
+    @property
+    def watch_count(self):
+        return len(self._wds)
+
+    def read_events(self, timeout=None):
+        """Ootab sündmusi kuni timeout sekundit.
+
+        Returns:
+            list of (path, mask, name): path on jälgitav kaust, name faili/alamkausta
+            nimi (tühi string, kui sündmus puudutab kausta ennast). IN_Q_OVERFLOW
+            korral on path None.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+
+        events = []
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            if not data:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                path = self._paths.get(wd)
+                if mask & IN_IGNORED:
+                    # Kaust kustutati või jälgimine eemaldati
+                    if path is not None:
+                        self._paths.pop(wd, None)
+                        self._wds.pop(path, None)
+                events.append((path, mask, name))
+        return events
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._paths.clear()
+        self._wds.clear()
@@ -0,0 +1,361 @@
+"""
+Meilisearchi HTTP klient.
+
+Hoiab püsivaid HTTP/1.1 (keep-alive) ühendusi piiratud suurusega pool'is,
+et iga dokumendipaki ja taski päringu jaoks ei peaks uut TCP ühendust
+looma. Dokumendid saadetakse gzip-pakituna. Ajutiste vigade korral
+proovitakse uuesti (exponential backoff) ja järjestikuste vigade korral
+avaneb circuit breaker, et Meilisearchi maasoleku ajal ei ootaks iga
+päring timeout'i ära.
+"""
+import gzip
+import http.client
+import json
+import queue
+import random
+import socket
+import threading
+import time
+import urllib.parse
+
+from .config import MEILI_URL, MEILI_KEY, MEILI_POOL_SIZE, get_logger
+
+logger = get_logger(__name__)
+
+# Päringu timeout sekundites
+MEILI_TIMEOUT = 10
+
+# Väiksemaid kehasid ei pakita (gzip päis ja CPU ei tasu ära)
+GZIP_MIN_BYTES = 1024
+
+# Ajutised HTTP vead, mille korral tasub uuesti proovida
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# Meetodid, mida võib alati korrata (sama päring kaks korda = sama tulemus).
+# POST/DELETE korratakse ainult siis, kui päring ei jõudnud serverini
+# (vt MeiliClient.request idempotent argument).
+IDEMPOTENT_METHODS = ('GET', 'PUT', 'PATCH')
+
+
+class MeiliError(Exception):
+    """Meilisearchi päring ebaõnnestus."""
+
+    def __init__(self, message, status=None, body=None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+class MeiliUnavailableError(MeiliError):
+    """Circuit breaker on avatud - Meilisearch pole hetkel kättesaadav."""
+
+
+class _RequestNotSentError(Exception):
+    """Ühendust ei saanud luua - päring ei jõudnud serverini (kordamine on ohutu)."""
+
+
+class CircuitBreaker:
+    """Lihtne kolme olekuga circuit breaker (closed → open → half-open).
+
+    Args:
+        failure_threshold: Järjestikuste vigade arv, mille järel breaker avaneb
+        reset_timeout: Sekundid, mille järel lubatakse üks proovipäring
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def allow(self):
+        """Kas päringu võib teha."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: lubame ühe proovipäringu korraga
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Meilisearch on taas kättesaadav (circuit breaker suletud)")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"Meilisearch: {self._failures} järjestikust viga, "
+                        f"circuit breaker avatud {self.reset_timeout}s"
+                    )
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+
+class MeiliClient:
+    """Keep-alive ühenduste pool'iga Meilisearchi klient.
+
+    Args:
+        base_url: Meilisearchi URL (nt http://127.0.0.1:7700)
+        api_key: API võti (Bearer)
+        pool_size: Maksimaalne samaaegsete ühenduste arv
+        max_retries: Korduskatsete arv ajutiste vigade korral
+        backoff: Esimese korduskatse ooteaeg sekundites (kahekordistub)
+    """
+
+    def __init__(self, base_url, api_key, pool_size=MEILI_POOL_SIZE, timeout=MEILI_TIMEOUT,
+                 max_retries=3, backoff=0.5, breaker=None):
+        parsed = urllib.parse.urlparse(base_url)
+        self._scheme = parsed.scheme or 'http'
+        self._host = parsed.hostname or '127.0.0.1'
+        self._port = parsed.port or (443 if self._scheme == 'https' else 80)
+        self._base_path = parsed.path.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        # Vabad ühendused (LIFO - viimati kasutatud ühendus on kõige tõenäolisemalt elus)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._pool_size = pool_size
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "rejected_open_circuit": 0,
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "bytes_raw": 0,
+            "bytes_sent": 0,
+        }
+
+    # ---------------------------------------------------------
+    # Ühenduste pool
+    # ---------------------------------------------------------
+
+    def _new_connection(self):
+        conn_class = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+        self._count("connections_opened")
+        return conn_class(self._host, self._port, timeout=self.timeout)
+
+    def _acquire(self, fresh=False):
+        """Võtab pool'ist ühenduse (fresh=True korral alati uue ühenduse)."""
+        self._slots.acquire()
+        if not fresh:
+            try:
+                conn = self._idle.get_nowait()
+                self._count("connections_reused")
+                return conn
+            except queue.Empty:
+                pass
+        return self._new_connection()
+
+    def _release(self, conn, reusable):
+        if reusable:
+            self._idle.put(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self):
+        """Sulgeb kõik vabad ühendused."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # ---------------------------------------------------------
+    # Päringud
+    # ---------------------------------------------------------
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _send_once(self, method, path, body, headers, fresh=False):
+        """Teeb ühe päringu pool'ist võetud ühendusega. Tagastab (status, body_bytes).
+
+        Raises:
+            _RequestNotSentError: ühendust ei saanud luua (midagi ei saadetud)
+        """
+        conn = self._acquire(fresh=fresh)
+        reusable = False
+        try:
+            if conn.sock is None:
+                try:
+                    conn.connect()
+                except OSError as e:
+                    raise _RequestNotSentError(e) from e
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+            reusable = not response.will_close
+            return response.status, data
+        finally:
+            self._release(conn, reusable)
+
+    def request(self, method, path, payload=None, params=None, raw_body=None,
+                content_type='application/json', idempotent=None):
+        """Teeb päringu Meilisearchi API-sse ja tagastab parsitud JSON vastuse.
+
+        Args:
+            method: HTTP meetod
+            path: API tee (nt /indexes/teosed/documents)
+            payload: JSON-serialiseeritav keha
+            params: Query parameetrid (dict)
+            raw_body: Valmis keha baitidena (nt NDJSON), kasutatakse payload asemel
+            idempotent: Kas päringut võib pärast saatmist korrata (vaikimisi
+                GET/PUT/PATCH jah, POST/DELETE ei). Mitte-idempotentset päringut
+                (nt /swap-indexes - korduv vahetus vahetaks indeksid tagasi)
+                korratakse ainult siis, kui ühendust ei saanud luua; see
+                saadetakse alati uue ühendusega, sest pool'i ühendus võis olla
+                serveri poolt vahepeal suletud.
+
+        Raises:
+            MeiliUnavailableError: circuit breaker on avatud
+            MeiliError: päring ebaõnnestus ka pärast korduskatseid
+        """
+        if not self.breaker.allow():
+            self._count("rejected_open_circuit")
+            raise MeiliUnavailableError("Meilisearch pole kättesaadav (circuit breaker avatud)")
+
+        full_path = self._base_path + path
+        if params:
+            full_path += '?' + urllib.parse.urlencode(params)
+
+        headers = {'Connection': 'keep-alive'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+
+        body = raw_body
+        if body is None and payload is not None:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        if body is not None:
+            headers['Content-Type'] = content_type
+            self._count("bytes_raw", len(body))
+            if len(body) >= GZIP_MIN_BYTES:
+                body = gzip.compress(body, compresslevel=5)
+                headers['Content-Encoding'] = 'gzip'
+            self._count("bytes_sent", len(body))
+
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+                delay = self.backoff * (2 ** (attempt - 1))
+                time.sleep(delay + random.uniform(0, delay / 2))
+
+            self._count("requests")
+            try:
+                status, data = self._send_once(method, full_path, body, headers, fresh=not idempotent)
+            except _RequestNotSentError as e:
+                last_error = MeiliError(f"Ühenduse viga: {e.__cause__}")
+                continue
+            except (http.client.HTTPException, ConnectionError, socket.timeout, OSError) as e:
+                # Keep-alive ühendus võis serveri poolt suletud olla - proovime uuesti.
+                # Mitte-idempotentne päring võis aga serverisse jõuda - ei korda.
+                last_error = MeiliError(f"Ühenduse viga: {e}")
+                if not idempotent:
+                    break
+                continue
+
+            if status in RETRY_STATUSES and (idempotent or status == 429):
+                last_error = MeiliError(f"HTTP {status}", status=status, body=data)
+                continue
+
+            try:
+                parsed = json.loads(data.decode('utf-8')) if data else {}
+            except ValueError:
+                parsed = {}
+
+            if status >= 500:
+                last_error = MeiliError(f"HTTP {status}: {parsed.get('message', '')}", status=status, body=parsed)
+                if not idempotent:
+                    break
+                continue
+
+            self.breaker.record_success()
+            if status >= 400:
+                # Kliendi viga (vale päring) - korduskatse ei aita
+                self._count("errors")
+                raise MeiliError(f"HTTP {status}: {parsed.get('message', '')}", status=status, body=parsed)
+            return parsed
+
+        self._count("errors")
+        self.breaker.record_failure()
+        raise last_error
+
+    # ---------------------------------------------------------
+    # Mugavusmeetodid
+    # ---------------------------------------------------------
+
+    def add_documents(self, index_name, documents, partial=False):
+        """Saadab dokumendid indeksisse. Tagastab taski ID.
+
+        partial=True korral uuendatakse ainult antud välju (PUT), muidu asendatakse (POST).
+        """
+        # Sama dokumendipaki korduv lisamine annab sama tulemuse
+        result = self.request('PUT' if partial else 'POST', f'/indexes/{index_name}/documents', documents,
+                              idempotent=True)
+        return result.get('taskUid')
+
+    def delete_documents(self, index_name, document_ids):
+        """Kustutab dokumendid ID järgi. Tagastab taski ID."""
+        result = self.request('POST', f'/indexes/{index_name}/documents/delete-batch', list(document_ids),
+                              idempotent=True)
+        return result.get('taskUid')
+
+    def get_task(self, task_uid):
+        """Tagastab taski oleku."""
+        return self.request('GET', f'/tasks/{task_uid}')
+
+    def get_stats(self):
+        """Tagastab kliendi statistika (päringud, korduskatsed, ühendused, baidid)."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["circuit_state"] = self.breaker.state
+        stats["pool_size"] = self._pool_size
+        stats["idle_connections"] = self._idle.qsize()
+        return stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_meili_client():
+    """Tagastab jagatud MeiliClient instantsi (luuakse esimesel kasutamisel)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MeiliClient(MEILI_URL, MEILI_KEY)
+        return _client
@@ -0,0 +1,157 @@
+"""
+Meilisearchi taskide jälgija.
+
+Üks taustalõim küsib kõigi ootel taskide olekut ühe päringuga
+(GET /tasks?uids=1,2,3) ja lahendab nendega seotud Future'id.
+Nii ei pea iga sünk hoidma eraldi lõime, mis taski olekut 100 ms
+tagant küsib.
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+from .config import get_logger
+from .meili_client import get_meili_client, MeiliError
+
+logger = get_logger(__name__)
+
+# Kui tihti ootel taskide olekut küsitakse (sekundites)
+POLL_INTERVAL = 0.2
+
+# Ooteaeg pärast ebaõnnestunud olekupäringut (sekundites)
+ERROR_RETRY_INTERVAL = 2.0
+
+# Mitu taski ühes /tasks päringus (URL-i pikkuse piir)
+MAX_UIDS_PER_POLL = 200
+
+# Kui kaua taski maksimaalselt jälgitakse, enne kui see loetakse aegunuks
+TASK_MAX_AGE = 600
+
+_FINISHED_STATUSES = ('succeeded', 'failed', 'canceled')
+
+
+class TaskTracker:
+    """Jälgib Meilisearchi taske ja lahendab nende Future'id.
+
+    Future'i tulemus on taski dict (status, error, duration, ...).
+    Ühenduse vea korral jäävad taskid ootele ja neid küsitakse uuesti.
+    """
+
+    def __init__(self, client_factory=get_meili_client, poll_interval=POLL_INTERVAL):
+        self._client_factory = client_factory
+        self._poll_interval = poll_interval
+        self._lock = threading.Condition()
+        self._futures = {}      # task_uid -> [Future, ...]
+        self._registered = {}   # task_uid -> monotonic registreerimise aeg
+        self._thread = None
+        self._stats = {
+            "tracked": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "expired": 0,
+            "polls": 0,
+            "poll_errors": 0,
+        }
+
+    def track(self, task_uid, callback=None):
+        """Alustab taski jälgimist. Tagastab Future'i, mis lahendub taski lõppedes.
+
+        Args:
+            task_uid: Meilisearchi taski ID
+            callback: Valikuline funktsioon callback(task_dict), kutsutakse jälgija lõimes
+        """
+        future = Future()
+        if callback:
+            future.add_done_callback(lambda f: callback(f.result()))
+
+        with self._lock:
+            self._ensure_thread()
+            self._futures.setdefault(task_uid, []).append(future)
+            self._registered.setdefault(task_uid, time.monotonic())
+            self._stats["tracked"] += 1
+            self._lock.notify()
+        return future
+
+    def wait(self, task_uid, timeout=30):
+        """Ootab taski lõppu. Tagastab taski dict'i või None timeout'i korral."""
+        future = self.track(task_uid)
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def get_stats(self):
+        with self._lock:
+            return {**self._stats, "pending": len(self._futures)}
+
+    def _ensure_thread(self):
+        """Käivitab jälgija lõime esimesel kasutamisel (eeldab et lukk on võetud)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._poll_loop, daemon=True, name="meili_task_tracker")
+            self._thread.start()
+
+    def _poll_loop(self):
+        while True:
+            with self._lock:
+                while not self._futures:
+                    self._lock.wait()
+                uids = list(self._futures.keys())[:MAX_UIDS_PER_POLL]
+
+            try:
+                result = self._client_factory().request(
+                    'GET', '/tasks', params={'uids': ','.join(str(u) for u in uids), 'limit': len(uids)}
+                )
+                tasks = result.get('results', [])
+                with self._lock:
+                    self._stats["polls"] += 1
+            except MeiliError as e:
+                with self._lock:
+                    self._stats["poll_errors"] += 1
+                logger.warning(f"Taskide oleku päring ebaõnnestus: {e}")
+                tasks = []
+
+            finished = {}
+            for task in tasks:
+                if task.get('status') in _FINISHED_STATUSES:
+                    finished[task.get('uid')] = task
+
+            resolved = []
+            now = time.monotonic()
+            with self._lock:
+                for uid in uids:
+                    if uid in finished:
+                        task = finished[uid]
+                        self._stats["succeeded" if task.get('status') == 'succeeded' else "failed"] += 1
+                    elif now - self._registered.get(uid, now) > TASK_MAX_AGE:
+                        task = {"uid": uid, "status": "expired"}
+                        self._stats["expired"] += 1
+                    else:
+                        continue
+                    self._registered.pop(uid, None)
+                    resolved.append((self._futures.pop(uid, []), task))
+
+            # Future'id lahendatakse väljaspool lukku (callback'id võivad uusi taske lisada)
+            for futures, task in resolved:
+                for future in futures:
+                    future.set_result(task)
+
+            # Vea korral oota kauem, et mitte logisid üle ujutada
+            time.sleep(self._poll_interval if tasks or not uids else ERROR_RETRY_INTERVAL)
+
+
+_tracker = TaskTracker()
+
+
+def track_task(task_uid, callback=None):
+    """Alustab taski jälgimist jagatud jälgijaga. Tagastab Future'i."""
+    return _tracker.track(task_uid, callback)
+
+
+def wait_for_task_result(task_uid, timeout=30):
+    """Ootab taski lõppu jagatud jälgijaga. Tagastab taski dict'i või None timeout'i korral."""
+    return _tracker.wait(task_uid, timeout)
+
+
+def get_task_tracker_stats():
+    """Tagastab taskide jälgija statistika."""
+    return _tracker.get_stats()
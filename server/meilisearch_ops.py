@@ -30,114 +30,42 @@ Vt docs/DATA_ARCHITECTURE.md täieliku ülevaate jaoks.
 import os
 import json
 import time
-import urllib.request
-import urllib.parse
-from concurrent.futures import ThreadPoolExecutor
-from .config import BASE_DIR, MEILI_URL, MEILI_KEY, INDEX_NAME, COLLECTIONS_FILE, PEOPLE_FILE
-from .utils import (
-    atomic_write_json,
-    sanitize_id, generate_default_metadata, normalize_genre,
-    calculate_work_status, get_label, get_id, get_all_labels, get_all_ids, get_primary_labels,
-    get_labels_by_lang
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from .config import (
+    BASE_DIR, MEILI_KEY, INDEX_NAME, COLLECTIONS_FILE, PEOPLE_FILE, DOC_FINGERPRINTS_FILE,
+    MEILI_SYNC_DEBOUNCE_SECONDS, MEILI_POOL_SIZE
+)
+from .utils import JsonFileCache, calculate_work_status
+from .sync_scheduler import SyncScheduler
+from .index_outbox import IndexOutbox
+from .doc_fingerprints import (
+    FingerprintStore, stamp_content_hash, page_fingerprint, work_fingerprint, combine_fingerprints,
+    CONTENT_HASH_FIELD
+)
+from .meili_client import get_meili_client, MeiliError
+from .meili_tasks import track_task, wait_for_task_result
+from .search_documents import (
+    build_collection_index, collection_ancestors, load_work_context, build_documents,
+    _read_page_files, _build_work_fields, _build_work_template, _build_page_document
 )
 
-# Meilisearch päringu timeout sekundites
-MEILI_TIMEOUT = 10
-from .git_ops import commit_new_work_to_git
-import re
-
-def clean_text_for_search(text):
-    """Puhastab teksti otsinguindeksi jaoks, eemaldades vormindusmärgid ja liites poolitused."""
-    if not text:
-        return ""
-    
-    # 0. Käitle reavahetuse poolituskriipse (nt "spen-\ner", "spen⸗\ner" või "spen¬ \ner" -> "spener")
-    # Toetab standardset kriipsu (-), topeltkriipsu (⸗) ja poolitusmärki (¬)
-    text = re.sub(r'[-⸗¬]\s*\n\s*', '', text)
-    
-    # Asenda erimärgid tühikuga, et vältida sõnade kokkukleepumist ja müra
-    
-    # 1. Bold/Italic (*) - asenda kõik tärnid tühikuga
-    text = text.replace('*', ' ')
-    
-    # 2. Koodivahetus (~)
-    text = text.replace('~', ' ')
-    
-    # 3. Ääremärkuse markerid [[m: ja ]]
-    text = text.replace('[[m:', ' ').replace(']]', ' ')
-    
-    # 4. Leheküljevahetus --lk--
-    text = text.replace('--lk--', ' ')
-    
-    # 5. Joonealused viited [^...] - eemaldame viite markeri
-    # Nt [^1] -> " "
-    text = re.sub(r'\[\^\d+\]', ' ', text)
-    
-    # 6. Eemalda üleliigsed tühikud (pole kriitiline Meilisearchile, aga viisakas)
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    return text
-
-def load_people_aliases():
-    """Laeb inimeste aliased JSON failist."""
-    if os.path.exists(PEOPLE_FILE):
-        try:
-            with open(PEOPLE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            pass
-    return {}
-
-
-def get_creator_aliases(creators, people_data):
-    """Leiab isikutele aliased (nimevariandid)."""
-    aliases = []
-    for creator in creators:
-        creator_id = creator.get('id')
-        # Otsi ID järgi (nt Q123)
-        if creator_id and people_data.get(creator_id):
-            person = people_data[creator_id]
-            if person.get('aliases'):
-                aliases.extend(person['aliases'])
-    return aliases
-
-
-def normalize_creator(creator, people_data):
-    """Normaliseerib isiku nime ja ID people.json kaudu.
-
-    Tagastab (kanooniline_nimi, eelistatud_id) tuple.
-    Eelistab Wikidata Q-koodi teiste ID-de üle.
-    """
-    cid = creator.get('id')
-    name = creator.get('name', '')
+# people.json ja collections.json loetakse uuesti ainult faili muutumisel
+# (sünkroonimise pool kutsub neid iga teose sünkil)
+_people_cache = JsonFileCache(PEOPLE_FILE)
 
-    if not cid or not people_data or cid not in people_data:
-        return name, cid
 
-    person = people_data[cid]
-    canonical_name = person.get('primary_name', name)
+def load_people_aliases():
+    """Laeb inimeste aliased JSON failist (cache'itud, ära muuda tulemust)."""
+    return _people_cache.get()
 
-    # Eelistatavalt Wikidata Q-kood
-    ids = person.get('ids', {})
-    wikidata_id = ids.get('wikidata')
-    if wikidata_id:
-        # Veendu et Q-prefiks on olemas
-        best_id = wikidata_id if wikidata_id.startswith('Q') else f'Q{wikidata_id}'
-    else:
-        best_id = cid
 
-    return canonical_name, best_id
+_collections_cache = JsonFileCache(COLLECTIONS_FILE, transform=build_collection_index)
 
 
 def load_collections():
-    """Laeb kollektsioonide hierarhia."""
-    if os.path.exists(COLLECTIONS_FILE):
-        try:
-            with open(COLLECTIONS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            pass
-    return {}
+    """Laeb kollektsioonide hierarhia (cache'itud, ära muuda tulemust)."""
+    return _collections_cache.get()['collections']
 
 
 def get_collection_hierarchy(collections, collection_id):
@@ -156,8 +84,31 @@ def get_collection_hierarchy(collections, collection_id):
     return hierarchy
 
 
+def get_collection_ancestors(collection_id):
+    """Tagastab kollektsiooni hierarhia eelarvutatud tabelist (vanematest lapseni)."""
+    return collection_ancestors(_collections_cache.get(), collection_id)
+
+
+# Kui kaua sünkroonsed kutsujad (nt /update-work-metadata) indekseerimist ootavad
+SYNC_WAIT_TIMEOUT = 30
+
+
+def _task_succeeded(task):
+    """Logib taski tulemuse ja tagastab True kui task õnnestus."""
+    status = task.get('status')
+    task_uid = task.get('uid')
+    if status == 'succeeded':
+        print(f"Meilisearch task {task_uid} õnnestus ({task.get('duration', '')})")
+        return True
+    if status == 'expired':
+        print(f"Meilisearch task {task_uid} timeout")
+    else:
+        print(f"Meilisearch task {task_uid} ebaõnnestus: {task.get('error')}")
+    return False
+
+
 def wait_for_task(task_uid, timeout=30):
-    """Ootab Meilisearchi taski lõppu.
+    """Ootab Meilisearchi taski lõppu (jagatud taskide jälgija kaudu).
 
     Args:
         task_uid: Meilisearchi taski ID
@@ -166,379 +117,668 @@ def wait_for_task(task_uid, timeout=30):
     Returns:
         True kui task õnnestus, False kui ebaõnnestus või timeout
     """
-    url = f"{MEILI_URL}/tasks/{task_uid}"
-    start_time = time.time()
+    task = wait_for_task_result(task_uid, timeout)
+    if task is None:
+        print(f"Meilisearch task timeout ({timeout}s)")
+        return False
+    return _task_succeeded(task)
 
-    while time.time() - start_time < timeout:
-        try:
-            req = urllib.request.Request(url)
-            req.add_header('Authorization', f'Bearer {MEILI_KEY}')
-
-            with urllib.request.urlopen(req, timeout=MEILI_TIMEOUT) as response:
-                task_data = json.loads(response.read().decode('utf-8'))
-                status = task_data.get('status')
-
-                if status == 'succeeded':
-                    elapsed = time.time() - start_time
-                    print(f"Meilisearch task {task_uid} õnnestus ({elapsed:.2f}s)")
-                    return True
-                elif status == 'failed':
-                    print(f"Meilisearch task {task_uid} ebaõnnestus: {task_data.get('error')}")
-                    return False
-                # status on 'enqueued' või 'processing' - ootame edasi
-        except Exception as e:
-            print(f"Viga taski staatuse kontrollimisel: {e}")
-            return False
 
-        time.sleep(0.1)  # Oota 100ms enne järgmist kontrolli
+def _resolved(value):
+    """Tagastab juba lahendatud Future'i."""
+    future = Future()
+    future.set_result(value)
+    return future
 
-    print(f"Meilisearch task timeout ({timeout}s)")
-    return False
 
+def _all_succeeded(futures):
+    """Koondab mitu Future[bool]-i üheks, mis on True kui kõik õnnestusid."""
+    combined = Future()
+    remaining = [len(futures)]
+    results = []
+    lock = threading.Lock()
 
-def send_to_meilisearch(documents, wait=True):
-    """Saadab dokumendid Meilisearchi kasutades urllib-i.
+    def on_done(f):
+        with lock:
+            results.append(not f.exception() and f.result())
+            remaining[0] -= 1
+            if remaining[0] == 0:
+                combined.set_result(all(results))
 
-    Args:
-        documents: Dokumentide list
-        wait: Kui True, ootab kuni indekseerimine on lõppenud
+    for f in futures:
+        f.add_done_callback(on_done)
+    return combined
+
+
+def _wait_future(future, timeout=SYNC_WAIT_TIMEOUT):
+    """Ootab Future[bool] tulemust, timeout'i korral tagastab False."""
+    try:
+        return future.result(timeout=timeout)
+    except Exception:
+        print(f"Meilisearch sünk timeout ({timeout}s)")
+        return False
+
+
+def submit_documents(documents, partial=False):
+    """Saadab dokumendid Meilisearchi ootamata indekseerimise lõppu.
+
+    Tagastab Future[bool], mis lahendub taskide jälgija poolt, kui
+    Meilisearch on dokumendid töödelnud (True = õnnestus).
     """
     if not MEILI_KEY:
         print("HOIATUS: Meilisearchi võti puudub, ei saa indekseerida.")
-        return False
+        return _resolved(False)
 
-    url = f"{MEILI_URL}/indexes/{INDEX_NAME}/documents"
     try:
-        data = json.dumps(documents).encode('utf-8')
-        req = urllib.request.Request(url, data=data, method='POST')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Authorization', f'Bearer {MEILI_KEY}')
-
-        with urllib.request.urlopen(req, timeout=MEILI_TIMEOUT) as response:
-            res_data = json.loads(response.read().decode('utf-8'))
-            task_uid = res_data.get('taskUid')
-            print(f"Meilisearch task: {task_uid}")
-
-            if wait and task_uid:
-                return wait_for_task(task_uid)
-            return True
-    except Exception as e:
+        task_uid = get_meili_client().add_documents(INDEX_NAME, documents, partial=partial)
+    except MeiliError as e:
         print(f"Viga Meilisearchi saatmisel: {e}")
-        return False
+        return _resolved(False)
+
+    print(f"Meilisearch task: {task_uid}")
+    if task_uid is None:
+        return _resolved(True)
+
+    result = Future()
+    track_task(task_uid).add_done_callback(lambda f: result.set_result(_task_succeeded(f.result())))
+    return result
+
+
+def submit_delete(document_ids):
+    """Kustutab dokumendid Meilisearchist ootamata indekseerimise lõppu. Tagastab Future[bool]."""
+    if not MEILI_KEY:
+        return _resolved(False)
+
+    try:
+        task_uid = get_meili_client().delete_documents(INDEX_NAME, document_ids)
+    except MeiliError as e:
+        print(f"Viga Meilisearchist kustutamisel: {e}")
+        return _resolved(False)
+
+    if task_uid is None:
+        return _resolved(True)
+
+    result = Future()
+    track_task(task_uid).add_done_callback(lambda f: result.set_result(_task_succeeded(f.result())))
+    return result
+
+
+def send_to_meilisearch(documents, wait=True, partial=False):
+    """Saadab dokumendid Meilisearchi (jagatud keep-alive kliendiga, gzip).
+
+    Args:
+        documents: Dokumentide list
+        wait: Kui True, ootab kuni indekseerimine on lõppenud
+        partial: Kui True, uuendab ainult antud välju (PUT), muidu asendab dokumendid (POST)
+    """
+    future = submit_documents(documents, partial=partial)
+    if wait:
+        return _wait_future(future)
+    # Ootamata: False ainult siis, kui saatmine ise ebaõnnestus
+    return not (future.done() and not future.result())
+
+
+def _load_work_context(dir_name):
+    """Loeb teose tasandi andmed (vt search_documents.load_work_context).
+
+    people.json ja collections.json tulevad cache'ist.
+    """
+    return load_work_context(BASE_DIR, dir_name, load_people_aliases(), _collections_cache.get())
+
+
+# =========================================================
+# LEHEKÜLGEDE OLEKU CACHE
+# Hoiab iga teose viimati indekseeritud piltide nimekirja ja lehekülgede
+# staatused, et ühe lehekülje salvestamisel ei peaks kogu kausta uuesti lugema.
+# =========================================================
+
+# dir_name -> {'work_id': str, 'images': tuple, 'statuses': {base_name: status}, 'teose_staatus': str}
+_page_state_cache = {}
+_page_state_lock = threading.Lock()
+
+# Viimati indekseeritud dokumentide räsid - muutmata dokumente uuesti ei saadeta
+_fingerprints = FingerprintStore(DOC_FINGERPRINTS_FILE)
+
+
+def _remember_work_state(ctx, statuses, teose_staatus, page_hashes):
+    """Salvestab teose lehekülgede oleku pärast edukat sünki."""
+    with _page_state_lock:
+        _page_state_cache[ctx['dir_name']] = {
+            'work_id': ctx['work_id'],
+            'images': tuple(ctx['images']),
+            'statuses': statuses,
+            'teose_staatus': teose_staatus,
+            'page_hashes': page_hashes,
+        }
+
+
+def forget_work_state(dir_name):
+    """Eemaldab teose lehekülgede oleku cache'ist (järgmine sünk teeb täissünki)."""
+    with _page_state_lock:
+        _page_state_cache.pop(dir_name, None)
+
+
+def _after_sync(future, ctx, statuses, teose_staatus, page_hashes):
+    """Uuendab lehekülgede oleku cache'i, kui sünk on lõppenud."""
+    def on_done(f):
+        if not f.exception() and f.result():
+            _remember_work_state(ctx, statuses, teose_staatus, page_hashes)
+        else:
+            forget_work_state(ctx['dir_name'])
+    future.add_done_callback(on_done)
+    return future
+
+
+def build_work_documents(dir_name):
+    """Koostab teose kõigi lehekülgede dokumendid failisüsteemist.
+
+    Kasutavad nii serveri sünk kui scripts/sync_meilisearch.py.
+
+    Returns:
+        (ctx, documents, statuses, teose_staatus) või None, kui teost ei saa indekseerida
+    """
+    return build_documents(BASE_DIR, dir_name, load_people_aliases(), _collections_cache.get())
+
+
+def _partial_work_updates(ctx, cached, teose_staatus):
+    """Koostab teose kõigi lehekülgede osalised uuendused (teose väljad ja teose_staatus).
+
+    content_hash arvutatakse cache'itud lehekülje räsidest, nii et indeksi
+    räsi vastab ka pärast osalist uuendust täisdokumendile.
+
+    Returns:
+        list või None, kui mõne lehekülje räsi pole teada
+    """
+    page_hashes = cached.get('page_hashes') or {}
+    work_hash = work_fingerprint({**_build_work_template(ctx), 'teose_staatus': teose_staatus})
+    work_fields = _build_work_fields(ctx)
+    updates = []
+    for i in range(len(ctx['images'])):
+        doc_id = f"{ctx['work_id']}-{i + 1}"
+        if doc_id not in page_hashes:
+            return None
+        updates.append({
+            "id": doc_id,
+            **work_fields,
+            "teose_staatus": teose_staatus,
+            CONTENT_HASH_FIELD: combine_fingerprints(page_hashes[doc_id], work_hash),
+        })
+    return updates
+
+
+def _commit_partial(future, dir_name, updates):
+    """Salvestab osaliste uuenduste räsid, kui Meilisearch need edukalt töötles."""
+    hashes = {doc['id']: doc[CONTENT_HASH_FIELD] for doc in updates}
+
+    def on_done(f):
+        if not f.exception() and f.result():
+            _fingerprints.commit(dir_name, hashes)
+
+    future.add_done_callback(on_done)
+    return future
+
+
+def _submit_changed(dir_name, documents):
+    """Saadab ainult muutunud dokumendid ja kustutab teose alt kadunud ID-d.
+
+    Räsid salvestatakse pärast seda, kui Meilisearch on kõik taskid
+    edukalt töödelnud. Tagastab (Future[bool], saadetud, vahele jäetud).
+    """
+    changed, hashes, stale_ids = _fingerprints.diff(dir_name, documents)
+    futures = []
+    if changed:
+        futures.append(submit_documents(changed))
+    if stale_ids:
+        print(f"SÜNK: Kustutan {len(stale_ids)} kadunud dokumenti ({dir_name})")
+        futures.append(submit_delete(stale_ids))
+
+    future = _all_succeeded(futures) if futures else _resolved(True)
+
+    sent_hashes = {doc['id']: hashes[doc['id']] for doc in changed}
+
+    def on_done(f):
+        if not f.exception() and f.result():
+            _fingerprints.commit(dir_name, sent_hashes, removed_ids=stale_ids)
+
+    future.add_done_callback(on_done)
+    return future, len(changed), len(documents) - len(changed)
+
+
+def _sync_work(dir_name):
+    """Täissünk ootamata indekseerimise lõppu. Tagastab Future[bool]."""
+    built = build_work_documents(dir_name)
+    if not built:
+        forget_work_state(dir_name)
+        return _resolved(False)
+
+    ctx, documents, statuses, teose_staatus = built
+    if not documents:
+        return _resolved(False)
+
+    future, sent, skipped = _submit_changed(dir_name, documents)
+    print(f"AUTOMAATNE SÜNK: Teos {ctx['slug']} ({len(documents)} lk, saadetud {sent}, muutmata {skipped}), staatus: {teose_staatus}")
+    page_hashes = {doc['id']: page_fingerprint(doc) for doc in documents}
+    return _after_sync(future, ctx, statuses, teose_staatus, page_hashes)
 
 
 def sync_work_to_meilisearch(dir_name):
     """
     Sünkroonib ühe teose kõik leheküljed Meilisearchi.
     Loeb andmed failisüsteemist (_metadata.json, pildid, .txt, .json).
+    Ootab indekseerimise lõppu.
     """
-    dir_path = os.path.join(BASE_DIR, dir_name)
-    if not os.path.exists(dir_path):
-        print(f"SÜNK: Kausta ei leitud: {dir_path}")
-        return False
+    return _wait_future(_sync_work(dir_name))
 
-    # 1. Lae teose metaandmed
-    meta_path = os.path.join(dir_path, '_metadata.json')
-    metadata = {}
-    if os.path.exists(meta_path):
-        try:
-            with open(meta_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-        except Exception as e:
-            print(f"SÜNK: Viga metaandmete lugemisel: {e}")
-            return False
-
-    if not metadata:
-        metadata = generate_default_metadata(dir_name)
-
-    # Metaandmed (v3 formaat: LinkedEntity objektid)
-    work_id = metadata.get('id')  # Nanoid (püsiv lühikood)
-    slug = metadata.get('slug', sanitize_id(dir_name))
-    title = metadata.get('title', 'Pealkiri puudub')
-    year = metadata.get('year', 0)
-
-    # Autor ja respondens creators massiivist
-    creators = metadata.get('creators', [])
-    autor = ''
-    respondens = ''
-    if creators:
-        # Prioriteet: auctor > praeses > esimene isik
-        praeses = next((c for c in creators if c.get('role') == 'praeses'), None)
-        auctor = next((c for c in creators if c.get('role') == 'auctor'), None)
-        resp = next((c for c in creators if c.get('role') == 'respondens'), None)
-        if auctor:
-            autor = auctor.get('name', '')
-        elif praeses:
-            autor = praeses.get('name', '')
-        elif creators:
-            first_creator = creators[0]
-            if first_creator.get('role') not in ['respondens', 'gratulator', 'dedicator']:
-                autor = first_creator.get('name', '')
-        if resp:
-            respondens = resp.get('name', '')
-
-    # Tags (LinkedEntity objektide massiiv või stringid)
-    tags = metadata.get('tags', [])
-    if isinstance(tags, list):
-        tags = [normalize_genre(t) for t in tags]
-
-    # Kollektsioon
-    collection = metadata.get('collection')
-    collections = load_collections()
-    collections_hierarchy = get_collection_hierarchy(collections, collection)
-
-    ester_id = metadata.get('ester_id')
-    external_url = metadata.get('external_url')
-    location = metadata.get('location')
-    publisher = metadata.get('publisher')
-    work_type = metadata.get('type')
-    genre = metadata.get('genre')
-    languages = metadata.get('languages', [])
-
-    # 2. Leia leheküljed (pildid)
-    # NB: Lehekülje number (page_num) tuleneb pildi POSITSIOONIST tähestikuliselt
-    # sorteeritud nimekirjas, MITTE failinimest. See võimaldab lehekülgi ümber
-    # järjestada (nt kui avastatakse puuduv lk) ilma failinimesid muutmata.
-    # Näide: 001.jpg=lk1, 002.jpg=lk2. Kui lisada 001a.jpg, siis: 001.jpg=lk1, 001a.jpg=lk2, 002.jpg=lk3
-    images = sorted([f for f in os.listdir(dir_path) if f.lower().endswith(('.jpg', '.jpeg', '.png')) and not f.startswith('_thumb_')])
-    if not images:
-        print(f"SÜNK: Pilte ei leitud kaustas: {dir_name}")
-        return False
 
-    documents = []
-    page_statuses = []
+def _sync_pages(dir_name, page_filenames):
+    """Lehekülgede sünk ootamata indekseerimise lõppu. Tagastab Future[bool]."""
+    base_names = {os.path.splitext(os.path.basename(name))[0] for name in page_filenames}
 
-    # Dokumendi ID = nanoid + lehekülje number (nt "cymbv7-1")
-    if not work_id:
-        print(f"HOIATUS: Teosel {dir_name} puudub nanoid (_metadata.json 'id' väli)")
-        work_id = slug  # Fallback slugile
+    with _page_state_lock:
+        cached = _page_state_cache.get(dir_name)
+        cached = dict(cached, statuses=dict(cached['statuses']),
+                      page_hashes=dict(cached.get('page_hashes') or {})) if cached else None
 
-    # Lae inimeste aliased ÜKS KORD enne tsüklit (mitte iga lehe kohta!)
-    people_data = load_people_aliases()
+    if not cached:
+        return _sync_work(dir_name)
 
-    for i, img_name in enumerate(images):
-        page_num = i + 1
-        page_id = f"{work_id}-{page_num}"
+    ctx = _load_work_context(dir_name)
+    if not ctx:
+        forget_work_state(dir_name)
+        return _resolved(False)
+
+    # Lehekülgede nimekiri või teose ID muutus - numbrid nihkuvad, vaja täissünki
+    if tuple(ctx['images']) != cached['images'] or ctx['work_id'] != cached['work_id']:
+        return _sync_work(dir_name)
+
+    statuses = cached['statuses']
+    documents = []
+    template = _build_work_template(ctx)
+    for i, img_name in enumerate(ctx['images']):
         base_name = os.path.splitext(img_name)[0]
+        if base_name not in base_names:
+            continue
+        page_text, page_meta = _read_page_files(ctx['dir_path'], base_name)
+        statuses[base_name] = page_meta['status']
+        documents.append(_build_page_document(ctx, template, i + 1, img_name, page_text, page_meta))
+
+    if not documents:
+        # Tekstifail ilma vastava pildita ei ole eraldi lehekülg indeksis
+        print(f"SÜNK: Lehekülgede pilte ei leitud: {dir_name}/{sorted(base_names)}")
+        return _resolved(False)
+
+    teose_staatus = calculate_work_status(list(statuses.values()))
+    for doc in documents:
+        doc['teose_staatus'] = teose_staatus
+    stamp_content_hash(documents)
+    page_hashes = cached['page_hashes']
+    page_hashes.update((doc['id'], page_fingerprint(doc)) for doc in documents)
+
+    page_ids = {doc['id'] for doc in documents}
+    page_nums = [doc['lehekylje_number'] for doc in documents]
+    futures = []
+
+    # Koondstaatus muutus - uuenda teistel lehekülgedel teose välju (koos content_hash'iga)
+    # (Meilisearch töötleb sama indeksi taske järjekorras)
+    if teose_staatus != cached['teose_staatus']:
+        updates = _partial_work_updates(ctx, dict(cached, page_hashes=page_hashes), teose_staatus)
+        if updates is None:
+            return _sync_work(dir_name)
+        updates = [doc for doc in updates if doc['id'] not in page_ids]
+        if updates:
+            futures.append(_commit_partial(submit_documents(updates, partial=True), dir_name, updates))
+
+    # Muutmata lehekülgi (nt salvestati sama tekst) uuesti ei saadeta
+    changed, hashes, _ = _fingerprints.diff(dir_name, documents, complete=False)
+    if changed:
+        page_future = submit_documents(changed)
+        sent_hashes = {doc['id']: hashes[doc['id']] for doc in changed}
+        page_future.add_done_callback(
+            lambda f: f.result() and _fingerprints.commit(dir_name, sent_hashes)
+        )
+        futures.append(page_future)
+
+    print(
+        f"AUTOMAATNE SÜNK: Teos {ctx['slug']} lk {', '.join(map(str, page_nums))} "
+        f"(saadetud {len(changed)}, muutmata {len(documents) - len(changed)}), staatus: {teose_staatus}"
+    )
+    if not futures:
+        return _after_sync(_resolved(True), ctx, statuses, teose_staatus, page_hashes)
+
+    return _after_sync(_all_succeeded(futures), ctx, statuses, teose_staatus, page_hashes)
+
+
+def sync_pages_to_meilisearch(dir_name, page_filenames):
+    """
+    Sünkroonib teose valitud leheküljed Meilisearchi (inkrementaalne sünk /save jaoks).
 
-        # Tekst
-        txt_path = os.path.join(dir_path, base_name + '.txt')
-        page_text = ""
-        if os.path.exists(txt_path):
-            try:
-                with open(txt_path, 'r', encoding='utf-8') as f:
-                    page_text = f.read()
-            except:
-                pass
-
-        # Lehekülje meta (status, tags, comments)
-        json_path = os.path.join(dir_path, base_name + '.json')
-        page_meta = {
-            'status': 'Toores',
-            'tags': [],
-            'comments': [],
-            'history': []
-        }
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    p_data = json.load(f)
-                    # Toeta nii vana kui uut formaati (meta_content wrapper)
-                    source = p_data.get('meta_content', p_data)
-                    page_meta['status'] = source.get('status', 'Toores')
-                    # Eelistame uut nime 'page_tags'
-                    page_meta['tags'] = source.get('page_tags', source.get('tags', []))
-                    page_meta['comments'] = source.get('comments', [])
-                    page_meta['history'] = source.get('history', [])
-                    # Kui JSON-is on tekst ja failis pole, kasuta JSON-it
-                    if not page_text and 'text_content' in p_data:
-                        page_text = p_data['text_content']
-            except:
-                pass
-
-        page_statuses.append(page_meta['status'])
-
-    # NB: page_meta['tags'] sisaldab lehekülje märksõnu (loetud page_tags väljalt)
-        page_tags_data = page_meta.get('tags', [])
-
-        # Kasuta eellaetud people_data (laetud enne tsüklit)
-        aliases = get_creator_aliases(creators, people_data)
-
-        # authors_text sisaldab nüüd ka aliaseid, et otsing leiaks "Lorenz" kui nimi on "Laurentius"
-        authors_text = [c['name'] for c in creators if c.get('name')] + aliases
-
-        # Trükkali aliased (trükkalid on ka mitme nimega)
-        publisher_aliases = []
-        pub_id = get_id(publisher)
-        if pub_id and people_data.get(pub_id):
-            publisher_aliases = people_data[pub_id].get('aliases', [])
-
-        doc = {
-            "id": page_id,
-            "work_id": work_id,  # Nanoid (püsiv lühikood)
-            "title": title,
-            "autor": autor,      # Filtreerimiseks (jääb)
-            "respondens": respondens,  # Filtreerimiseks (jääb)
-            "aasta": year,       # Filtreerimiseks ja sortimiseks (jääb)
-            "year": year,
-            "lehekylje_number": page_num,
-            "teose_lehekylgede_arv": len(images),
-            "lehekylje_tekst": clean_text_for_search(page_text), # OTSINGU JAOKS (puhastatud märkidest ja poolitustest)
-            "text_content": page_text,                          # REDAKTORI JAOKS (algne tekst koos kõigi märkidega)
-            "lehekylje_pilt": os.path.join(dir_name, img_name),
-            "originaal_kataloog": dir_name,
-            "status": page_meta['status'],
-            "page_tags": [l.lower() for l in get_primary_labels(page_tags_data)],
-            "page_tags_et": [l.lower() for l in get_labels_by_lang(page_tags_data, 'et')],
-            "page_tags_en": [l.lower() for l in get_labels_by_lang(page_tags_data, 'en')],
-            "page_tags_suggest_et": [
-                f"{get_label(t, 'et')}|||{t.get('id') if isinstance(t, dict) else ''}"
-                for t in page_tags_data
-            ],
-            "page_tags_suggest_en": [
-                f"{get_label(t, 'en')}|||{t.get('id') if isinstance(t, dict) else ''}"
-                for t in page_tags_data
-            ],
-            "page_tags_object": page_tags_data,
-            "comments": page_meta['comments'],
-            "history": page_meta['history'],
-            "last_modified": int(os.path.getmtime(txt_path if os.path.exists(txt_path) else os.path.join(dir_path, img_name)) * 1000),
-            "tags": get_primary_labels(tags),
-            "tags_et": get_labels_by_lang(tags, 'et'),
-            "tags_en": get_labels_by_lang(tags, 'en'),
-            "tags_object": tags,
-            "tags_search": get_all_labels(tags),
-            "tags_ids": get_all_ids(tags),
-            "collection": collection,
-            "collections_hierarchy": collections_hierarchy,
-            "location": get_label(location),
-            "location_object": location,
-            "location_id": get_id(location),
-            "location_search": get_all_labels(location),
-            "publisher": get_label(publisher),
-            "publisher_object": publisher,
-            "publisher_id": get_id(publisher),
-            "publisher_search": get_all_labels(publisher) + publisher_aliases,
-            "genre": get_label(genre),
-            "genre_et": get_labels_by_lang(genre, 'et'),
-            "genre_en": get_labels_by_lang(genre, 'en'),
-            "genre_object": genre,
-            "genre_search": get_all_labels(genre),
-            "genre_ids": get_all_ids(genre),
-            "type": get_label(work_type),
-            "type_et": get_labels_by_lang(work_type, 'et'),
-            "type_en": get_labels_by_lang(work_type, 'en'),
-            "type_object": work_type,
-            "type_ids": get_all_ids(work_type),
-            "languages": languages,
-            "creators": creators,
-            "authors_text": authors_text,
-            "author_names": [normalize_creator(c, people_data)[0] for c in creators if c.get('name') and c.get('role') != 'respondens'],
-            "respondens_names": [normalize_creator(c, people_data)[0] for c in creators if c.get('name') and c.get('role') == 'respondens'],
-            "creator_ids": [normalize_creator(c, people_data)[1] for c in creators if c.get('id')]
-            # NB: pealkiri, koht, trükkal eemaldatud - kasuta title, location, publisher
-        }
+    Loeb ainult muudetud lehekülgede .txt/.json faile. Teose koondstaatus
+    arvutatakse cache'itud lehekülgede staatustest. Kui cache puudub või
+    piltide nimekiri on muutunud (lisatud/eemaldatud lk), teeb täissünki.
 
-        if ester_id:
-            doc['ester_id'] = ester_id
-        if external_url:
-            doc['external_url'] = external_url
+    Args:
+        dir_name: Teose kausta nimi
+        page_filenames: Lehekülgede failinimed (nt ["lk_003.txt"])
+    """
+    return _wait_future(_sync_pages(dir_name, page_filenames))
 
-        documents.append(doc)
 
-    # 3. Arvuta teose koondstaatus
-    teose_staatus = calculate_work_status(page_statuses)
-    for doc in documents:
-        doc['teose_staatus'] = teose_staatus
+def sync_page_to_meilisearch(dir_name, page_filename):
+    """Sünkroonib ühe lehekülje Meilisearchi (vt sync_pages_to_meilisearch)."""
+    return sync_pages_to_meilisearch(dir_name, [page_filename])
 
-    # 4. Saada Meilisearchi
-    if documents:
-        print(f"AUTOMAATNE SÜNK: Teos {slug} ({len(documents)} lk), staatus: {teose_staatus}")
-        return send_to_meilisearch(documents)
-    return False
+
+def _sync_work_metadata(dir_name):
+    """Teose metaandmete osaline uuendus ootamata indekseerimise lõppu. Tagastab Future[bool].
+
+    Saadab kõigile teose lehekülgedele ainult teose tasandi väljad (PUT),
+    lehekülgede tekste ei loeta ega saadeta. Kui lehekülgede olek pole
+    teada või on muutunud, teeb täissünki.
+    """
+    with _page_state_lock:
+        cached = _page_state_cache.get(dir_name)
+
+    if not cached:
+        return _sync_work(dir_name)
+
+    ctx = _load_work_context(dir_name)
+    if not ctx:
+        forget_work_state(dir_name)
+        return _resolved(False)
+
+    # Lehekülgede nimekiri või teose ID muutus - dokumentide ID-d muutuvad, vaja täissünki
+    if tuple(ctx['images']) != cached['images'] or ctx['work_id'] != cached['work_id']:
+        return _sync_work(dir_name)
+
+    # content_hash arvutatakse uuesti, et indeksi räsi ei jääks vanaks
+    updates = _partial_work_updates(ctx, cached, cached['teose_staatus'])
+    if updates is None:
+        return _sync_work(dir_name)
+
+    print(f"AUTOMAATNE SÜNK: Teos {ctx['slug']} metaandmed ({len(updates)} lk)")
+    future = _commit_partial(submit_documents(updates, partial=True), dir_name, updates)
+    future.add_done_callback(lambda f: f.result() or forget_work_state(dir_name))
+    return future
+
+
+def sync_work_metadata_to_meilisearch(dir_name):
+    """Uuendab Meilisearchis ainult teose metaandmete välju (ootab indekseerimise lõppu)."""
+    return _wait_future(_sync_work_metadata(dir_name))
 
 
 def index_new_work(dir_name, metadata):
-    """Loob lehekülgede dokumendid ja saadab Meilisearchi."""
-    return sync_work_to_meilisearch(dir_name)
+    """Loob lehekülgede dokumendid ja saadab Meilisearchi (outboxi kaudu, ootab tulemust)."""
+    return wait_for_sync(sync_work_to_meilisearch_async(dir_name, immediate=True))
 
 
 # =========================================================
 # ASYNC MEILISEARCH SYNC
-# Käivitab indekseerimise lõimede pool'is, et päring ei blokeeruks
+# Käivitab indekseerimise lõimede pool'is, et päring ei blokeeruks.
+# SyncScheduler koondab sama teose päringud ja hoiab teose kohta
+# korraga ainult ühe sünki (vt server/sync_scheduler.py).
 # =========================================================
 
 # Lõimede pool Meilisearch päringute jaoks
-# Max 10 samaaegset päringut - rohkem tekitaks Meilisearchile liiga suure koormuse
-MEILISEARCH_POOL_SIZE = 10
+# Sama suurus mis MeiliClient ühenduste pool'il (vt config.MEILI_POOL_SIZE)
+MEILISEARCH_POOL_SIZE = MEILI_POOL_SIZE
 _meilisearch_executor = ThreadPoolExecutor(
     max_workers=MEILISEARCH_POOL_SIZE,
     thread_name_prefix="meili_sync"
 )
 
 
-def _sync_work_task(dir_name):
-    """Meilisearch sync task (käivitatakse pool'is)."""
-    try:
-        sync_work_to_meilisearch(dir_name)
-    except Exception as e:
-        print(f"ASYNC MEILISEARCH VIGA ({dir_name}): {e}")
+def _needs_full_sync(dir_name):
+    """Kas lehekülgede olek on teadmata või aegunud (osaline sünk teeks täissünki)?"""
+    with _page_state_lock:
+        cached = _page_state_cache.get(dir_name)
+    if not cached:
+        return True
+    ctx = _load_work_context(dir_name)
+    return not ctx or tuple(ctx['images']) != cached['images'] or ctx['work_id'] != cached['work_id']
+
+
+def _run_sync_request(dir_name, sync_request):
+    """Täidab koondatud sünkroonimispäringu (käivitatakse pool'is).
+
+    Tagastab Future[bool] - lõim vabaneb kohe pärast dokumentide saatmist,
+    taski lõppu jälgib taskide jälgija.
+    """
+    if sync_request.full:
+        return _sync_work(dir_name)
+
+    # Metaandmed + leheküljed külma cache'iga: mõlemad teeksid eraldi täissünki
+    # (cache täidetakse alles taski lõppedes) - teeme ühe
+    if sync_request.metadata and sync_request.pages and _needs_full_sync(dir_name):
+        return _sync_work(dir_name)
+
+    futures = []
+    if sync_request.metadata:
+        futures.append(_sync_work_metadata(dir_name))
+    if sync_request.pages:
+        futures.append(_sync_pages(dir_name, sync_request.pages))
+    return _all_succeeded(futures) if futures else _resolved(True)
+
+
+_sync_scheduler = SyncScheduler(
+    _meilisearch_executor,
+    _run_sync_request,
+    debounce_seconds=MEILI_SYNC_DEBOUNCE_SECONDS
+)
 
 
-def sync_work_to_meilisearch_async(dir_name):
-    """Käivitab Meilisearch sync'i lõimede pool'is.
+_outbox = IndexOutbox()
+
+# Täisindekseerimise ajal (vt search_reindex.py) jäetakse meelde, milliseid
+# teoseid muudeti - need sünkroonitakse pärast indeksite vahetamist uuesti
+_sync_capture = None
+_sync_capture_lock = threading.Lock()
+
+
+def begin_sync_capture():
+    """Hakkab koguma teoseid, mille sünki küsitakse (täisindekseerimise ajaks)."""
+    global _sync_capture
+    with _sync_capture_lock:
+        _sync_capture = set()
+
+
+def end_sync_capture():
+    """Lõpetab kogumise ja tagastab vahepeal muudetud teoste kaustad."""
+    global _sync_capture
+    with _sync_capture_lock:
+        captured, _sync_capture = _sync_capture or set(), None
+    return captured
+
+
+def _is_indexable(dir_name):
+    """Kas teost saab indekseerida (kaust olemas, metaandmed loetavad, pilte on)."""
+    ctx = _load_work_context(dir_name)
+    return bool(ctx and ctx['images'])
+
+
+def _request_sync(dir_name, full=False, pages=None, metadata=False, immediate=False, seqs=None):
+    """Salvestab päringu outboxi ja lisab selle teose järjekorda.
+
+    Outboxi kirje tehakse sünkroonselt (fsync) enne tagasipöördumist, et
+    päring ei kaoks serveri crashi või Meilisearchi katkestuse korral.
+    Kui sünk õnnestub, kirje kinnitatakse; muidu jääb see replay jaoks alles.
+    Teose kirjed, mida ei saa indekseerida (kaust kadunud, vigased
+    metaandmed, pilte pole), kinnitatakse kohe - teose järgmine muudatus
+    teeb uue kirje.
+    """
+    if seqs is None:
+        seqs = [_outbox.append(dir_name, full=full, pages=pages, metadata=metadata)]
+
+    with _sync_capture_lock:
+        if _sync_capture is not None:
+            _sync_capture.add(dir_name)
+
+    def on_done(f):
+        if f.result():
+            _outbox.ack(seqs)
+        elif not os.path.isdir(os.path.join(BASE_DIR, dir_name)):
+            # Teos on kustutatud/ümber nimetatud - pole mida sünkroonida
+            _outbox.ack(seqs, dropped=True)
+        elif not _is_indexable(dir_name):
+            # Püsiv viga - replay ei aitaks (iga minut täissünk)
+            print(f"OUTBOX: Teost ei saa indekseerida ({dir_name}: metaandmed vigased või pilte pole), kirje eemaldatud")
+            _outbox.ack(seqs, dropped=True)
+        else:
+            _outbox.release(seqs)
+
+    future = _sync_scheduler.request(dir_name, full=full, pages=pages, metadata=metadata, immediate=immediate)
+    future.add_done_callback(on_done)
+    return future
+
+
+def sync_work_to_meilisearch_async(dir_name, immediate=False):
+    """Planeerib teose täissünki taustal.
 
     Kasutaja päring ei pea ootama indekseerimise lõppu.
     Vead logitakse, aga ei katkesta kasutaja tööd.
-    Pool piirab samaagsete päringute arvu (max 10).
+    Sama teose päringud koondatakse debounce-akna jooksul üheks.
+
+    Args:
+        immediate: Kui True, ei oodata debounce-akent (kutsuja ootab tulemust)
+
+    Returns:
+        Future[bool], mis lahendub kui seda päringut kattev sünk on indekseeritud
+    """
+    return _request_sync(dir_name, full=True, immediate=immediate)
+
+
+def sync_page_to_meilisearch_async(dir_name, page_filename):
+    """Planeerib ühe lehekülje sünki taustal (koondatakse teose teiste päringutega)."""
+    return _request_sync(dir_name, pages=[page_filename])
+
+
+def sync_pages_to_meilisearch_async(dir_name, page_filenames, metadata=False):
+    """Planeerib mitme lehekülje (ja soovi korral teose metaandmete) sünki ühe päringuna."""
+    return _request_sync(dir_name, pages=page_filenames, metadata=metadata)
+
+
+def sync_work_metadata_to_meilisearch_async(dir_name, immediate=False):
+    """Planeerib teose metaandmete osalise uuenduse taustal (lehekülgede tekste ei saadeta)."""
+    return _request_sync(dir_name, metadata=True, immediate=immediate)
+
+
+def index_new_works(dir_names):
+    """Indekseerib mitu uut teost ühe Meilisearchi taskiga (sisselugemise konveier).
+
+    Iga teose kohta tehakse outboxi kirje nagu tavalise täissünki puhul;
+    ebaõnnestumisel jäävad kirjed replay jaoks alles. Teosed, mida ei saa
+    koos indekseerida (nt dokumente pole), lähevad tavalisse järjekorda.
+
+    Returns:
+        Future[bool], mis lahendub kui kõigi teoste dokumendid on indekseeritud
+    """
+    seqs = {dir_name: _outbox.append(dir_name, full=True) for dir_name in dir_names}
+
+    with _sync_capture_lock:
+        if _sync_capture is not None:
+            _sync_capture.update(dir_names)
+
+    documents = []
+    stale_ids = []
+    built_works = []
+    fallback = []
+    for dir_name in dir_names:
+        built = build_work_documents(dir_name)
+        if not built or not built[1]:
+            fallback.append(_request_sync(dir_name, full=True, seqs=[seqs.pop(dir_name)]))
+            continue
+        ctx, work_documents, statuses, teose_staatus = built
+        changed, hashes, stale = _fingerprints.diff(dir_name, work_documents)
+        documents.extend(changed)
+        stale_ids.extend(stale)
+        sent_hashes = {doc['id']: hashes[doc['id']] for doc in changed}
+        page_hashes = {doc['id']: page_fingerprint(doc) for doc in work_documents}
+        built_works.append((ctx, statuses, teose_staatus, sent_hashes, stale, page_hashes))
+
+    futures = []
+    if documents:
+        futures.append(submit_documents(documents))
+    if stale_ids:
+        futures.append(submit_delete(stale_ids))
+    future = _all_succeeded(futures) if futures else _resolved(True)
+
+    batch_seqs = list(seqs.values())
+
+    def on_done(f):
+        if not f.exception() and f.result():
+            for ctx, statuses, teose_staatus, sent_hashes, stale, page_hashes in built_works:
+                _fingerprints.commit(ctx['dir_name'], sent_hashes, removed_ids=stale)
+                _remember_work_state(ctx, statuses, teose_staatus, page_hashes)
+            _outbox.ack(batch_seqs)
+        else:
+            for ctx, _, _, _, _, _ in built_works:
+                forget_work_state(ctx['dir_name'])
+            _outbox.release(batch_seqs)
+
+    future.add_done_callback(on_done)
+    print(f"UUED TEOSED: {len(built_works)} teost indekseerimisel ({len(documents)} dokumenti)")
+    return _all_succeeded([future] + fallback)
+
+
+def replay_index_outbox():
+    """Saadab outboxi kinnitamata kirjed uuesti järjekorda (teose kaupa koondatuna).
+
+    Returns:
+        int: Uuesti järjekorda pandud teoste arv
     """
-    _meilisearch_executor.submit(_sync_work_task, dir_name)
+    pending = _outbox.claim_pending()
+    for dir_name, work in pending.items():
+        _request_sync(dir_name, full=work['full'], pages=work['pages'], metadata=work['metadata'], seqs=work['seqs'])
+    if pending:
+        print(f"OUTBOX: {len(pending)} teost uuesti indekseerimise järjekorras")
+    return len(pending)
 
 
-def metadata_watcher_loop():
-    """Taustalõim, mis otsib uusi kaustu ja loob neile metaandmed."""
-    print(f"Metaandmete jälgija käivitatud (kataloog: {BASE_DIR})")
+# Kui tihti outboxi ebaõnnestunud kirjeid uuesti proovitakse (sekundites)
+OUTBOX_REPLAY_INTERVAL = 60
+
+
+def outbox_replay_loop():
+    """Taustalõim: stardil ja pärast Meilisearchi katkestusi saadab outboxi kirjed uuesti."""
     while True:
         try:
-            if not os.path.exists(BASE_DIR):
-                time.sleep(60)
-                continue
-
-            for entry in os.scandir(BASE_DIR):
-                # Ignoreeri peidetud kaustu (nt .git)
-                if entry.is_dir() and not entry.name.startswith('.'):
-                    meta_path = os.path.join(entry.path, '_metadata.json')
-                    if not os.path.exists(meta_path):
-                        # Kontrolli kas kaust on "stabiilne" (pole muutunud viimase 60 sek jooksul)
-                        # See annab aega aeglasele kopeerimisele lõpule jõuda
-                        dir_mtime = entry.stat().st_mtime
-                        age_seconds = time.time() - dir_mtime
-                        if age_seconds < 60:
-                            continue  # Kaust on liiga uus, oota veel
-
-                        # Kontrollime kas on pilte
-                        has_images = False
-                        for f in os.listdir(entry.path):
-                            if f.lower().endswith(('.jpg', '.jpeg', '.png')) and not f.startswith('_thumb_'):
-                                has_images = True
-                                break
-
-                        if has_images:
-                            try:
-                                metadata = generate_default_metadata(entry.name)
-                                atomic_write_json(meta_path, metadata)
-                                print(f"AUTOMAATNE METADATA: Loodud fail {meta_path}")
-
-                                # Indekseeri kohe Meilisearchis
-                                index_new_work(entry.name, metadata)
-
-                                # Lisa txt failid Giti originaal-OCR commitina
-                                commit_new_work_to_git(entry.name)
-                            except Exception as e:
-                                print(f"Viga metaandmete loomisel ({entry.name}): {e}")
-
-            # Oota 60 sekundit järgmise skannimiseni
-            time.sleep(60)
+            # Circuit breaker avatud - Meilisearch on maas, pole mõtet proovida
+            if get_meili_client().breaker.state != "open":
+                replay_index_outbox()
         except Exception as e:
-            print(f"Jälgija viga: {e}")
-            time.sleep(60)
+            print(f"Outboxi replay viga: {e}")
+        time.sleep(OUTBOX_REPLAY_INTERVAL)
+
+
+def has_pending_sync(dir_name):
+    """Kas teosel on sünk järjekorras, töös või outboxis kinnitamata."""
+    return _sync_scheduler.is_busy(dir_name) or _outbox.has_pending(dir_name)
+
+
+def get_sync_queue_stats():
+    """Tagastab sünkroonimise järjekorra statistika (järjekorra sügavus, koondamised)."""
+    return _sync_scheduler.get_stats()
+
+
+def get_meili_client_stats():
+    """Tagastab Meilisearchi kliendi statistika (ühendused, korduskatsed, circuit breaker)."""
+    return get_meili_client().get_stats()
+
+
+def get_outbox_stats():
+    """Tagastab outboxi statistika (ootel kirjed, kinnitused, replay)."""
+    return _outbox.get_stats()
+
+
+def get_fingerprint_stats():
+    """Tagastab dokumentide räside statistika (vahele jäetud dokumendid, skip rate)."""
+    return _fingerprints.get_stats()
+
+
+def get_fingerprint_store():
+    """Tagastab jagatud räside hoidla (nt täisindekseerimise jaoks)."""
+    return _fingerprints
+
+
+def wait_for_sync(future, timeout=SYNC_WAIT_TIMEOUT):
+    """Ootab sync_*_async poolt tagastatud Future'i. Timeout'i korral tagastab False."""
+    return _wait_future(future, timeout)
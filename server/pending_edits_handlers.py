@@ -8,7 +8,7 @@ import os
 import glob
 
 from .http_helpers import send_json_response, read_request_data, require_auth
-from .meilisearch_ops import sync_work_to_meilisearch_async
+from .meilisearch_ops import sync_page_to_meilisearch_async
 from .pending_edits import (
     load_pending_edits, create_pending_edit, get_pending_edit_by_id,
     get_pending_edits_for_page, get_user_pending_edit_for_page,
@@ -198,7 +198,7 @@ def handle_pending_edits_approve(handler):
         )
 
         # Uuenda Meilisearch (taustal)
-        sync_work_to_meilisearch_async(os.path.basename(dir_path))
+        sync_page_to_meilisearch_async(os.path.basename(dir_path), os.path.basename(txt_path))
 
         # Märgi muudatus kinnitatuks
         update_pending_edit_status(edit_id, "approved", user["username"], comment)
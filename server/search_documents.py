@@ -0,0 +1,813 @@
+"""
+Otsinguindeksi dokumentide koostamine ja indeksi seaded.
+
+Moodul ei impordi server paketist midagi peale doc_fingerprints'i (mis on
+samuti ainult standardteegil). Nii saavad seda kasutada ka skriptid
+(scripts/2-1_upload_to_meili.py) ja täisindekseerimise alamprotsessid
+ilma server/__init__.py käivitamata (logifailid, taustalõimed, olekufailid).
+
+Alamprotsessina käivitamine (vt search_reindex.py):
+  python3 server/search_documents.py --base-dir DATA --people-file P --collections-file C kaust1 kaust2 ...
+Väljund: üks JSON rida teose kohta, [kausta_nimi, dokumendid].
+"""
+import argparse
+import json
+import os
+import re
+import secrets
+import string
+import sys
+import unicodedata
+
+try:
+    from .doc_fingerprints import stamp_content_hash
+except ImportError:  # Laetud paketita (skript või alamprotsess)
+    from doc_fingerprints import stamp_content_hash
+
+# Indeksi seaded (kasutavad search_reindex.py ja scripts/2-1_upload_to_meili.py)
+INDEX_SETTINGS = {
+    'searchableAttributes': [
+        # V2/V3 väljad
+        'title',
+        'authors_text',
+        'year',
+        'location_search',
+        'publisher_search',
+        'genre_search',
+        'tags_search',
+        'series_title',
+        # Tagasiühilduvus
+        'pealkiri',
+        'autor',
+        'respondens',
+        'aasta',
+        'teose_id',
+        'originaal_kataloog',
+        'lehekylje_tekst',
+        'page_tags',
+        'page_tags_et',
+        'page_tags_en',
+        'comments.text'
+    ],
+    'filterableAttributes': [
+        # V2/V3 väljad
+        'work_id',
+        'year',
+        'title',
+        'location_id',
+        'publisher_id',
+        'publisher',
+        'genre_ids',
+        'tags_ids',
+        'creator_ids',
+        'creators',
+        'type',
+        'type_et', 'type_en',  # Keeltepõhised filtrid
+        'genre',
+        'genre_et', 'genre_en',
+        'collection',
+        'collections_hierarchy',
+        'authors_text',
+        'author_names',
+        'respondens_names',
+        'languages',
+        # Tagasiühilduvus
+        'aasta',
+        'autor',
+        'respondens',
+        'trükkal',
+        'teose_id',
+        'lehekylje_number',
+        'originaal_kataloog',
+        'page_tags',
+        'page_tags_et',
+        'page_tags_en',
+        'page_tags_suggest_et',
+        'page_tags_suggest_en',
+        'status',
+        'teose_staatus',
+        'tags',
+        'tags_et', 'tags_en'
+    ],
+    'sortableAttributes': [
+        'aasta',
+        'lehekylje_number',
+        'last_modified',
+        'pealkiri'
+    ],
+    'rankingRules': [
+        "exactness",
+        "words",
+        "typo",
+        "proximity",
+        "attribute",
+        "sort"
+    ],
+    'faceting': {
+        'maxValuesPerFacet': 5000
+    },
+    'pagination': {
+        'maxTotalHits': 10000
+    },
+    'typoTolerance': {
+        'minWordSizeForTypos': {
+            'oneTypo': 5,
+            'twoTypos': 9
+        }
+    }
+}
+
+
+# Nanoid seadistus
+NANOID_LENGTH = 6
+NANOID_ALPHABET = string.ascii_lowercase + string.digits  # a-z, 0-9
+
+
+def generate_nanoid(length=NANOID_LENGTH):
+    """Genereerib nanoid-stiilis lühikoodi."""
+    return ''.join(secrets.choice(NANOID_ALPHABET) for _ in range(length))
+
+
+def sanitize_id(text):
+    """Puhastab teksti, et see sobiks ID-ks (sama loogika mis 1-1 skriptis)."""
+    if not text:
+        return ""
+    # Eemalda diakriitikud
+    normalized = unicodedata.normalize('NFD', text)
+    ascii_text = ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
+    # Asenda kõik mitte-lubatud märgid alakriipsuga
+    sanitized = re.sub(r'[^a-zA-Z0-9_-]', '_', ascii_text)
+    # Eemalda mitu järjestikust alakriipsu
+    sanitized = re.sub(r'_+', '_', sanitized)
+    # Eemalda algus- ja lõpukriipsud
+    sanitized = sanitized.strip('_-')
+    return sanitized
+
+
+def capitalize_first(text):
+    """Teeb esimese tähe suureks, ülejäänud jätab samaks (toetab lühendeid)."""
+    if not text:
+        return ""
+    return text[0].upper() + text[1:]
+
+
+def get_label(value, lang='et'):
+    """Tagastab sildi LinkedEntity objektist või stringist eelistatud keeles."""
+    if not value:
+        return ""
+    if isinstance(value, str):
+        return capitalize_first(value)
+    if isinstance(value, dict):
+        # Proovi leida silti konkreetses keeles
+        labels = value.get('labels')
+        if labels and isinstance(labels, dict):
+            if labels.get(lang):
+                return capitalize_first(labels[lang])
+            # Fallback eesti keelele
+            if labels.get('et'):
+                return capitalize_first(labels['et'])
+        
+        # Fallback peamisele sildile
+        return capitalize_first(value.get('label', ''))
+    return capitalize_first(str(value))
+
+
+def get_id(value):
+    """Tagastab ID LinkedEntity objektist."""
+    if isinstance(value, dict):
+        return value.get('id')
+    return None
+
+
+def get_all_labels(value):
+    """Kogub kõik sildid (sh mitmekeelsed) LinkedEntity objektist või massiivist."""
+    if not value:
+        return []
+
+    values = value if isinstance(value, list) else [value]
+    labels = []
+
+    for val in values:
+        if isinstance(val, str):
+            labels.append(capitalize_first(val))
+        elif isinstance(val, dict):
+            # Peamine silt
+            if val.get('label'):
+                labels.append(capitalize_first(val['label']))
+            # Mitmekeelsed sildid
+            if val.get('labels') and isinstance(val['labels'], dict):
+                for l in val['labels'].values():
+                    if l:
+                        labels.append(capitalize_first(l))
+
+    return sorted(list(set(labels)))
+
+
+def get_primary_labels(value):
+    """Tagastab ainult peamised sildid LinkedEntity objektist või massiivist. Eelistab eesti keelt."""
+    if not value:
+        return []
+    
+    values = value if isinstance(value, list) else [value]
+    labels = []
+    
+    for val in values:
+        if isinstance(val, str):
+            labels.append(capitalize_first(val))
+        elif isinstance(val, dict):
+            # Eelisjärjekord: et > label > esimene väärtus labels dictist
+            label = None
+            if val.get('labels') and isinstance(val['labels'], dict):
+                label = val['labels'].get('et')
+            
+            if not label:
+                label = val.get('label')
+            
+            if label:
+                labels.append(capitalize_first(label))
+                
+    return labels
+
+
+def get_labels_by_lang(value, lang):
+    """Tagastab sildid konkreetses keeles (või fallback)."""
+    if not value:
+        return []
+    
+    values = value if isinstance(value, list) else [value]
+    labels = []
+    
+    for val in values:
+        if isinstance(val, str):
+            # Stringi puhul ei tea keelt, tagastame alati (eeldades et on primaarne)
+            labels.append(capitalize_first(val))
+        elif isinstance(val, dict):
+            label = None
+            # Otsi konkreetses keeles
+            if val.get('labels') and isinstance(val['labels'], dict):
+                label = val['labels'].get(lang)
+            
+            # Fallback: primaarne label
+            if not label:
+                label = val.get('label')
+            
+            if label:
+                labels.append(capitalize_first(label))
+                
+    return labels
+
+
+def get_all_ids(value):
+    """Kogub kõik ID-d LinkedEntity objektist või massiivist."""
+    if not value:
+        return []
+
+    values = value if isinstance(value, list) else [value]
+    ids = []
+
+    for val in values:
+        if isinstance(val, dict) and val.get('id'):
+            ids.append(val['id'])
+
+    return sorted(list(set(ids)))
+
+
+def generate_default_metadata(dir_name):
+    """Genereerib vaike-metaandmed kataloogi nime põhjal."""
+    slug = sanitize_id(dir_name)
+
+    # Pealkiri kataloogi nimest (eemaldame aastaarvu ja ID osa kui võimalik)
+    clean_title = re.sub(r'^\d{4}[-_]\d+[-_]?', '', dir_name)
+    if clean_title == dir_name:
+        clean_title = re.sub(r'^\d{4}[-_]?', '', dir_name)
+
+    title = clean_title.replace('-', ' ').replace('_', ' ').strip().capitalize() if clean_title else "Pealkiri puudub"
+
+    # Proovi leida aasta
+    year = 0
+    year_match = re.match(r'^(\d{4})', dir_name)
+    if year_match:
+        year = int(year_match.group(1))
+
+    return {
+        "id": generate_nanoid(),
+        "slug": slug,
+        "title": title,
+        "year": year,
+        "location": None,
+        "publisher": None,
+        "creators": [],
+        "tags": [],
+        "type": None,
+        "genre": None,
+        "languages": [],
+        "collection": None,
+        "ester_id": None,
+        "external_url": None
+    }
+
+
+def normalize_genre(tag):
+    """Normaliseerib žanri väärtuse 'disputatsioon'-iks, kui see on üks sünonüümidest."""
+    # Kui on objekt, võta sealt label
+    if isinstance(tag, dict):
+        label = tag.get('label', '')
+        # Võime tagastada objekti muutmata kujul, või normaliseerida labelit.
+        # Kuna normalize_genre eesmärk on ühtlustada stringe vanade andmete jaoks,
+        # siis objektide puhul (mis tulevad Wikidatast) on need ilmselt juba korras.
+        # Tagastame objekti endisena.
+        return tag
+    
+    if not isinstance(tag, str):
+        return tag
+
+    synonyms = ["dissertatsioon", "exercitatio", "teesid", "dissertatio", "theses", "disputatio"]
+    if tag and tag.strip().lower() in synonyms:
+        return "disputatsioon"
+    return tag.strip().lower() if tag else tag
+
+
+def calculate_work_status(page_statuses):
+    """Arvutab teose koondstaatuse lehekülgede staatuste põhjal.
+
+    Loogika: Kõik Valmis → Valmis, Kõik Toores/Leidmata → Toores, muidu → Töös
+    """
+    if not page_statuses:
+        return 'Toores'
+
+    # Valmis / Tehtud (Frontendis näib olevat DONE või Tehtud)
+    done_aliases = ['Valmis', 'Tehtud', 'DONE']
+    # Toores / Algne
+    raw_aliases = ['Toores', 'Algne', 'RAW', '']
+
+    is_all_done = all(s in done_aliases for s in page_statuses)
+    if is_all_done:
+        return 'Valmis'
+
+    is_all_raw = all(s in raw_aliases or s is None for s in page_statuses)
+    if is_all_raw:
+        return 'Toores'
+
+    return 'Töös'
+
+
+def clean_text_for_search(text):
+    """Puhastab teksti otsinguindeksi jaoks, eemaldades vormindusmärgid ja liites poolitused."""
+    if not text:
+        return ""
+    
+    # 0. Käitle reavahetuse poolituskriipse (nt "spen-\ner", "spen⸗\ner" või "spen¬ \ner" -> "spener")
+    # Toetab standardset kriipsu (-), topeltkriipsu (⸗) ja poolitusmärki (¬)
+    text = re.sub(r'[-⸗¬]\s*\n\s*', '', text)
+    
+    # Asenda erimärgid tühikuga, et vältida sõnade kokkukleepumist ja müra
+    
+    # 1. Bold/Italic (*) - asenda kõik tärnid tühikuga
+    text = text.replace('*', ' ')
+    
+    # 2. Koodivahetus (~)
+    text = text.replace('~', ' ')
+    
+    # 3. Ääremärkuse markerid [[m: ja ]]
+    text = text.replace('[[m:', ' ').replace(']]', ' ')
+    
+    # 4. Leheküljevahetus --lk--
+    text = text.replace('--lk--', ' ')
+    
+    # 5. Joonealused viited [^...] - eemaldame viite markeri
+    # Nt [^1] -> " "
+    text = re.sub(r'\[\^\d+\]', ' ', text)
+    
+    # 6. Eemalda üleliigsed tühikud (pole kriitiline Meilisearchile, aga viisakas)
+    text = re.sub(r'\s+', ' ', text).strip()
+    
+    return text
+
+
+def get_creator_aliases(creators, people_data):
+    """Leiab isikutele aliased (nimevariandid)."""
+    aliases = []
+    for creator in creators:
+        creator_id = creator.get('id')
+        # Otsi ID järgi (nt Q123)
+        if creator_id and people_data.get(creator_id):
+            person = people_data[creator_id]
+            if person.get('aliases'):
+                aliases.extend(person['aliases'])
+    return aliases
+
+
+def normalize_creator(creator, people_data):
+    """Normaliseerib isiku nime ja ID people.json kaudu.
+
+    Tagastab (kanooniline_nimi, eelistatud_id) tuple.
+    Eelistab Wikidata Q-koodi teiste ID-de üle.
+    """
+    cid = creator.get('id')
+    name = creator.get('name', '')
+
+    if not cid or not people_data or cid not in people_data:
+        return name, cid
+
+    person = people_data[cid]
+    canonical_name = person.get('primary_name', name)
+
+    # Eelistatavalt Wikidata Q-kood
+    ids = person.get('ids', {})
+    wikidata_id = ids.get('wikidata')
+    if wikidata_id:
+        # Veendu et Q-prefiks on olemas
+        best_id = wikidata_id if wikidata_id.startswith('Q') else f'Q{wikidata_id}'
+    else:
+        best_id = cid
+
+    return canonical_name, best_id
+
+
+def build_collection_index(collections):
+    """Eelarvutab iga kollektsiooni hierarhia (vanematest lapseni)."""
+    ancestors = {}
+    for collection_id in collections:
+        hierarchy = []
+        current_id = collection_id
+        # Kaitse vigase (tsüklilise) parent-viida vastu
+        while current_id and current_id not in hierarchy:
+            hierarchy.insert(0, current_id)
+            collection = collections.get(current_id)
+            current_id = collection.get('parent') if collection else None
+        ancestors[collection_id] = hierarchy
+    return {'collections': collections, 'ancestors': ancestors}
+
+
+def collection_ancestors(collections_index, collection_id):
+    """Tagastab kollektsiooni hierarhia eelarvutatud tabelist (vanematest lapseni).
+
+    Args:
+        collections_index: build_collection_index() tulemus
+    """
+    if not collection_id or not collections_index['collections']:
+        return []
+    # Tundmatu ID (pole collections.json-is) - hierarhia on ainult ID ise
+    return list(collections_index['ancestors'].get(collection_id, [collection_id]))
+
+
+def _list_page_images(dir_path):
+    """Tagastab teose lehekülgede pildid tähestikulises järjekorras (v.a thumbnailid).
+
+    NB: Lehekülje number (page_num) tuleneb pildi POSITSIOONIST tähestikuliselt
+    sorteeritud nimekirjas, MITTE failinimest. See võimaldab lehekülgi ümber
+    järjestada (nt kui avastatakse puuduv lk) ilma failinimesid muutmata.
+    Näide: 001.jpg=lk1, 002.jpg=lk2. Kui lisada 001a.jpg, siis: 001.jpg=lk1, 001a.jpg=lk2, 002.jpg=lk3
+    """
+    return sorted([f for f in os.listdir(dir_path) if f.lower().endswith(('.jpg', '.jpeg', '.png')) and not f.startswith('_thumb_')])
+
+
+def load_work_context(base_dir, dir_name, people_data, collections_index):
+    """Loeb teose tasandi andmed (_metadata.json, pildid).
+
+    Args:
+        base_dir: Andmekaust
+        dir_name: Teose kausta nimi
+        people_data: people.json sisu (inimeste aliased)
+        collections_index: build_collection_index() tulemus
+
+    Tagastab dict'i, mida kasutavad nii täis- kui lehekülje sünk,
+    või None kui teost ei saa indekseerida.
+    """
+    dir_path = os.path.join(base_dir, dir_name)
+    if not os.path.exists(dir_path):
+        print(f"SÜNK: Kausta ei leitud: {dir_path}")
+        return None
+
+    # 1. Lae teose metaandmed
+    meta_path = os.path.join(dir_path, '_metadata.json')
+    metadata = {}
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except Exception as e:
+            print(f"SÜNK: Viga metaandmete lugemisel: {e}")
+            return None
+
+    if not metadata:
+        metadata = generate_default_metadata(dir_name)
+
+    # Metaandmed (v3 formaat: LinkedEntity objektid)
+    work_id = metadata.get('id')  # Nanoid (püsiv lühikood)
+    slug = metadata.get('slug', sanitize_id(dir_name))
+
+    # Autor ja respondens creators massiivist
+    creators = metadata.get('creators', [])
+    autor = ''
+    respondens = ''
+    if creators:
+        # Prioriteet: auctor > praeses > esimene isik
+        praeses = next((c for c in creators if c.get('role') == 'praeses'), None)
+        auctor = next((c for c in creators if c.get('role') == 'auctor'), None)
+        resp = next((c for c in creators if c.get('role') == 'respondens'), None)
+        if auctor:
+            autor = auctor.get('name', '')
+        elif praeses:
+            autor = praeses.get('name', '')
+        elif creators:
+            first_creator = creators[0]
+            if first_creator.get('role') not in ['respondens', 'gratulator', 'dedicator']:
+                autor = first_creator.get('name', '')
+        if resp:
+            respondens = resp.get('name', '')
+
+    # Tags (LinkedEntity objektide massiiv või stringid)
+    tags = metadata.get('tags', [])
+    if isinstance(tags, list):
+        tags = [normalize_genre(t) for t in tags]
+
+    # Kollektsioon
+    collection = metadata.get('collection')
+
+    # 2. Leia leheküljed (pildid)
+    images = _list_page_images(dir_path)
+    if not images:
+        print(f"SÜNK: Pilte ei leitud kaustas: {dir_name}")
+        return None
+
+    # Dokumendi ID = nanoid + lehekülje number (nt "cymbv7-1")
+    if not work_id:
+        print(f"HOIATUS: Teosel {dir_name} puudub nanoid (_metadata.json 'id' väli)")
+        work_id = slug  # Fallback slugile
+
+    return {
+        'dir_name': dir_name,
+        'dir_path': dir_path,
+        'work_id': work_id,
+        'slug': slug,
+        'title': metadata.get('title', 'Pealkiri puudub'),
+        'year': metadata.get('year', 0),
+        'creators': creators,
+        'autor': autor,
+        'respondens': respondens,
+        'tags': tags,
+        'collection': collection,
+        'collections_hierarchy': collection_ancestors(collections_index, collection),
+        'ester_id': metadata.get('ester_id'),
+        'external_url': metadata.get('external_url'),
+        'location': metadata.get('location'),
+        'publisher': metadata.get('publisher'),
+        'work_type': metadata.get('type'),
+        'genre': metadata.get('genre'),
+        'languages': metadata.get('languages', []),
+        'images': images,
+        'people_data': people_data,
+    }
+
+
+def _read_page_files(dir_path, base_name):
+    """Loeb lehekülje teksti (.txt) ja meta (.json).
+
+    Returns:
+        (page_text, page_meta) tuple
+    """
+    # Tekst
+    txt_path = os.path.join(dir_path, base_name + '.txt')
+    page_text = ""
+    if os.path.exists(txt_path):
+        try:
+            with open(txt_path, 'r', encoding='utf-8') as f:
+                page_text = f.read()
+        except:
+            pass
+
+    # Lehekülje meta (status, tags, comments)
+    json_path = os.path.join(dir_path, base_name + '.json')
+    page_meta = {
+        'status': 'Toores',
+        'tags': [],
+        'comments': [],
+        'history': []
+    }
+    if os.path.exists(json_path):
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                p_data = json.load(f)
+                # Toeta nii vana kui uut formaati (meta_content wrapper)
+                source = p_data.get('meta_content', p_data)
+                page_meta['status'] = source.get('status', 'Toores')
+                # Eelistame uut nime 'page_tags'
+                page_meta['tags'] = source.get('page_tags', source.get('tags', []))
+                page_meta['comments'] = source.get('comments', [])
+                page_meta['history'] = source.get('history', [])
+                # Kui JSON-is on tekst ja failis pole, kasuta JSON-it
+                if not page_text and 'text_content' in p_data:
+                    page_text = p_data['text_content']
+        except:
+            pass
+
+    return page_text, page_meta
+
+
+def _build_work_fields(ctx):
+    """Koostab teose tasandi väljad, mis on teose kõigil lehekülgedel samad.
+
+    Kasutatakse nii lehekülgede dokumendimalli koostamisel kui ka metaandmete
+    osalisel uuendamisel (vt sync_work_metadata_to_meilisearch).
+    """
+    creators = ctx['creators']
+    tags = ctx['tags']
+    location = ctx['location']
+    publisher = ctx['publisher']
+    work_type = ctx['work_type']
+    genre = ctx['genre']
+    people_data = ctx['people_data']
+
+    aliases = get_creator_aliases(creators, people_data)
+
+    # authors_text sisaldab nüüd ka aliaseid, et otsing leiaks "Lorenz" kui nimi on "Laurentius"
+    authors_text = [c['name'] for c in creators if c.get('name')] + aliases
+
+    # Trükkali aliased (trükkalid on ka mitme nimega)
+    publisher_aliases = []
+    pub_id = get_id(publisher)
+    if pub_id and people_data.get(pub_id):
+        publisher_aliases = people_data[pub_id].get('aliases', [])
+
+    return {
+        "work_id": ctx['work_id'],  # Nanoid (püsiv lühikood)
+        "title": ctx['title'],
+        "autor": ctx['autor'],      # Filtreerimiseks (jääb)
+        "respondens": ctx['respondens'],  # Filtreerimiseks (jääb)
+        "aasta": ctx['year'],       # Filtreerimiseks ja sortimiseks (jääb)
+        "year": ctx['year'],
+        "teose_lehekylgede_arv": len(ctx['images']),
+        "originaal_kataloog": ctx['dir_name'],
+        "tags": get_primary_labels(tags),
+        "tags_et": get_labels_by_lang(tags, 'et'),
+        "tags_en": get_labels_by_lang(tags, 'en'),
+        "tags_object": tags,
+        "tags_search": get_all_labels(tags),
+        "tags_ids": get_all_ids(tags),
+        "collection": ctx['collection'],
+        "collections_hierarchy": ctx['collections_hierarchy'],
+        "location": get_label(location),
+        "location_object": location,
+        "location_id": get_id(location),
+        "location_search": get_all_labels(location),
+        "publisher": get_label(publisher),
+        "publisher_object": publisher,
+        "publisher_id": get_id(publisher),
+        "publisher_search": get_all_labels(publisher) + publisher_aliases,
+        "genre": get_label(genre),
+        "genre_et": get_labels_by_lang(genre, 'et'),
+        "genre_en": get_labels_by_lang(genre, 'en'),
+        "genre_object": genre,
+        "genre_search": get_all_labels(genre),
+        "genre_ids": get_all_ids(genre),
+        "type": get_label(work_type),
+        "type_et": get_labels_by_lang(work_type, 'et'),
+        "type_en": get_labels_by_lang(work_type, 'en'),
+        "type_object": work_type,
+        "type_ids": get_all_ids(work_type),
+        "languages": ctx['languages'],
+        "creators": creators,
+        "authors_text": authors_text,
+        "author_names": [normalize_creator(c, people_data)[0] for c in creators if c.get('name') and c.get('role') != 'respondens'],
+        "respondens_names": [normalize_creator(c, people_data)[0] for c in creators if c.get('name') and c.get('role') == 'respondens'],
+        "creator_ids": [normalize_creator(c, people_data)[1] for c in creators if c.get('id')],
+        # NB: pealkiri, koht, trükkal eemaldatud - kasuta title, location, publisher
+        # Osalisel uuendamisel peab eemaldatud väärtus minema null-ina
+        "ester_id": ctx['ester_id'] or None,
+        "external_url": ctx['external_url'] or None,
+    }
+
+
+def _build_work_template(ctx):
+    """Koostab lehekülje dokumentide ühise osa (teose väljad) üks kord sünki kohta.
+
+    Tühjad välised viited jäetakse täisdokumendist välja.
+    """
+    template = _build_work_fields(ctx)
+    if not template['ester_id']:
+        del template['ester_id']
+    if not template['external_url']:
+        del template['external_url']
+    return template
+
+
+def _build_page_document(ctx, template, page_num, img_name, page_text, page_meta):
+    """Koostab ühe lehekülje Meilisearchi dokumendi (ilma teose_staatus väljata).
+
+    Args:
+        template: _build_work_template(ctx) tulemus (teose väljad)
+    """
+    dir_name = ctx['dir_name']
+    dir_path = ctx['dir_path']
+
+    base_name = os.path.splitext(img_name)[0]
+    txt_path = os.path.join(dir_path, base_name + '.txt')
+
+    # NB: page_meta['tags'] sisaldab lehekülje märksõnu (loetud page_tags väljalt)
+    page_tags_data = page_meta.get('tags', [])
+
+    return {
+        "id": f"{ctx['work_id']}-{page_num}",
+        **template,
+        "lehekylje_number": page_num,
+        "lehekylje_tekst": clean_text_for_search(page_text), # OTSINGU JAOKS (puhastatud märkidest ja poolitustest)
+        "text_content": page_text,                          # REDAKTORI JAOKS (algne tekst koos kõigi märkidega)
+        "lehekylje_pilt": os.path.join(dir_name, img_name),
+        "status": page_meta['status'],
+        "page_tags": [l.lower() for l in get_primary_labels(page_tags_data)],
+        "page_tags_et": [l.lower() for l in get_labels_by_lang(page_tags_data, 'et')],
+        "page_tags_en": [l.lower() for l in get_labels_by_lang(page_tags_data, 'en')],
+        "page_tags_suggest_et": [
+            f"{get_label(t, 'et')}|||{t.get('id') if isinstance(t, dict) else ''}"
+            for t in page_tags_data
+        ],
+        "page_tags_suggest_en": [
+            f"{get_label(t, 'en')}|||{t.get('id') if isinstance(t, dict) else ''}"
+            for t in page_tags_data
+        ],
+        "page_tags_object": page_tags_data,
+        "comments": page_meta['comments'],
+        "history": page_meta['history'],
+        "last_modified": int(os.path.getmtime(txt_path if os.path.exists(txt_path) else os.path.join(dir_path, img_name)) * 1000),
+    }
+
+
+def build_documents(base_dir, dir_name, people_data, collections_index):
+    """Koostab teose kõigi lehekülgede dokumendid failisüsteemist.
+
+    Argumendid nagu load_work_context().
+
+    Returns:
+        (ctx, documents, statuses, teose_staatus) või None, kui teost ei saa indekseerida
+    """
+    ctx = load_work_context(base_dir, dir_name, people_data, collections_index)
+    if not ctx:
+        return None
+
+    documents = []
+    statuses = {}
+    template = _build_work_template(ctx)
+
+    for i, img_name in enumerate(ctx['images']):
+        base_name = os.path.splitext(img_name)[0]
+        page_text, page_meta = _read_page_files(ctx['dir_path'], base_name)
+        statuses[base_name] = page_meta['status']
+        documents.append(_build_page_document(ctx, template, i + 1, img_name, page_text, page_meta))
+
+    # Teose koondstaatus
+    teose_staatus = calculate_work_status(list(statuses.values()))
+    for doc in documents:
+        doc['teose_staatus'] = teose_staatus
+
+    # Räsi salvestatakse indeksisse (vt scripts/sync_meilisearch.py --content)
+    stamp_content_hash(documents)
+    return ctx, documents, statuses, teose_staatus
+
+
+def _load_json(path):
+    """Loeb JSON faili; puuduv või vigane fail -> {}."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        if os.path.exists(path):
+            print(f"JSON faili lugemine ebaõnnestus ({path}): {e}", file=sys.stderr)
+        return {}
+
+
+def build_works(base_dir, dir_names, people_file, collections_file):
+    """Koostab mitme teose dokumendid (täisindekseerimise alamprotsess).
+
+    Yields:
+        (dir_name, documents) - vigase teose korral tühi list
+    """
+    people_data = _load_json(people_file)
+    collections_index = build_collection_index(_load_json(collections_file))
+    for dir_name in dir_names:
+        try:
+            built = build_documents(base_dir, dir_name, people_data, collections_index)
+        except Exception as e:
+            print(f"REINDEX: {dir_name} koostamine ebaõnnestus: {e}", file=sys.stderr)
+            built = None
+        yield dir_name, built[1] if built else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Koosta teoste otsingudokumendid (JSON read stdout-i)')
+    parser.add_argument('--base-dir', required=True, help='Andmekaust')
+    parser.add_argument('--people-file', required=True, help='people.json tee')
+    parser.add_argument('--collections-file', required=True, help='collections.json tee')
+    parser.add_argument('dir_names', nargs='*', help='Teoste kaustade nimed')
+    args = parser.parse_args()
+
+    # stdout on andmekanal - diagnostika (nt SÜNK hoiatused) läheb stderr-i
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    for dir_name, documents in build_works(args.base_dir, args.dir_names, args.people_file, args.collections_file):
+        out.write(json.dumps([dir_name, documents], ensure_ascii=False) + '\n')
+    out.flush()
+
+
+if __name__ == '__main__':
+    main()
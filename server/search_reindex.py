@@ -0,0 +1,282 @@
+"""
+Otsinguindeksi täielik ümberehitus ilma katkestuseta (blue/green).
+
+Uus indeks ehitatakse versioonitud nimega (nt teosed_v3) kõrvale:
+1. Luuakse indeks ja rakendatakse seaded (enne dokumente, et Meilisearch
+   ei peaks kõike uuesti indekseerima)
+2. Dokumendid koostatakse paralleelselt eraldi protsessides
+   (search_documents.py, sama loogika mis serveri sünkil) ja saadetakse pakkidena
+3. Indeksid vahetatakse atomaarselt (POST /swap-indexes) - otsing töötab
+   kogu aja vana indeksiga
+4. Vana indeks (nüüd versioonitud nime all) kustutatakse
+
+Ümberehituse ajal muudetud teosed sünkroonitakse pärast vahetust uuesti.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .config import BASE_DIR, INDEX_NAME, PEOPLE_FILE, COLLECTIONS_FILE, get_logger
+from .meili_client import get_meili_client, MeiliError
+from .meili_tasks import wait_for_task_result
+from .doc_fingerprints import content_hash
+from .search_documents import INDEX_SETTINGS
+
+logger = get_logger(__name__)
+
+# Dokumente koostavate protsesside arv
+REINDEX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# Mitu teost üks alamprotsess koostab (iga pakk on eraldi Pythoni käivitus)
+REINDEX_WORKS_PER_TASK = 25
+
+# Dokumentide arv ühes Meilisearchi päringus
+REINDEX_BATCH_SIZE = 1000
+
+# Mitu dokumendipaki taski võib korraga ootel olla (tagasisurve)
+REINDEX_MAX_INFLIGHT_TASKS = 4
+
+# Kui kaua ühe taski lõppu oodatakse (sekundites)
+REINDEX_TASK_TIMEOUT = 600
+
+class ReindexError(Exception):
+    """Täisindekseerimine ebaõnnestus (vana indeks jääb kasutusse)."""
+
+
+_reindex_running = threading.Lock()
+_status_lock = threading.Lock()
+_reindex_status = {"state": "idle"}  # idle | running | done | error
+
+
+def get_reindex_status():
+    """Tagastab viimase täisindekseerimise staatuse (faas, edenemine)."""
+    with _status_lock:
+        status = dict(_reindex_status)
+    if status.get("state") == "running" and status.get("started_ts"):
+        status["elapsed_seconds"] = round(time.time() - status["started_ts"], 1)
+    return status
+
+
+def _set_status(**fields):
+    with _status_lock:
+        _reindex_status.update(fields)
+
+
+# Alamprotsessina käivitatav skript (ei impordi server paketti)
+_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_documents.py')
+
+
+def _build_works(dir_names):
+    """Koostab teoste dokumendid eraldi protsessis.
+
+    search_documents.py käivitatakse skriptina, mitte multiprocessing'uga:
+    spawn impordiks alamprotsessis uuesti serveri __main__ mooduli ja
+    server/__init__.py (logid, taustalõimed, olekufailid).
+
+    Returns:
+        list of (dir_name, documents)
+    """
+    command = [
+        sys.executable, _WORKER_SCRIPT,
+        '--base-dir', BASE_DIR,
+        '--people-file', PEOPLE_FILE,
+        '--collections-file', COLLECTIONS_FILE,
+        '--', *dir_names,
+    ]
+    proc = subprocess.run(command, stdout=subprocess.PIPE, text=True, encoding='utf-8')
+    if proc.returncode != 0:
+        raise ReindexError(f"Dokumentide koostamine ebaõnnestus (alamprotsessi kood {proc.returncode})")
+    return [tuple(json.loads(line)) for line in proc.stdout.splitlines() if line]
+
+
+def _list_work_dirs():
+    """Tagastab andmekausta teoste kaustad (v.a peidetud, nt .git)."""
+    if not os.path.isdir(BASE_DIR):
+        return []
+    return sorted(
+        entry.name for entry in os.scandir(BASE_DIR)
+        if entry.is_dir() and not entry.name.startswith('.')
+    )
+
+
+def _wait_task(task_uid, what):
+    """Ootab taski lõppu, ebaõnnestumisel viskab ReindexError."""
+    task = wait_for_task_result(task_uid, timeout=REINDEX_TASK_TIMEOUT)
+    if not task or task.get('status') != 'succeeded':
+        error = (task or {}).get('error') or (task or {}).get('status') or 'timeout'
+        raise ReindexError(f"{what} ebaõnnestus (task {task_uid}): {error}")
+    return task
+
+
+def _find_swap_task(client, new_index):
+    """Leiab indeksite vahetuse taski, mis puudutab new_index'it (None, kui pole)."""
+    result = client.request('GET', '/tasks', params={'types': 'indexSwap', 'limit': 20})
+    for task in result.get('results', []):
+        for swap in (task.get('details') or {}).get('swaps', []):
+            if new_index in swap.get('indexes', []):
+                return task.get('uid')
+    return None
+
+
+def _swap_indexes(client, new_index):
+    """Vahetab live-indeksi ja new_index'i.
+
+    Vahetust ei korrata: teine vahetus paneks indeksid tagasi. Kui vastus jäi
+    saamata (timeout, katkenud ühendus), kontrollitakse taskide nimekirjast,
+    kas vahetus siiski järjekorda pandi.
+    """
+    try:
+        task_uid = client.request('POST', '/swap-indexes', [{'indexes': [INDEX_NAME, new_index]}]).get('taskUid')
+    except MeiliError as e:
+        if e.status is not None:
+            raise
+        task_uid = _find_swap_task(client, new_index)
+        if task_uid is None:
+            raise
+        print(f"REINDEX: Vahetuse vastus jäi saamata, kuid task {task_uid} leiti")
+    _wait_task(task_uid, "Indeksite vahetamine")
+
+
+def _next_index_name(client):
+    """Leiab järgmise vaba versioonitud indeksi nime (teosed_v{n})."""
+    pattern = re.compile(rf'^{re.escape(INDEX_NAME)}_v(\d+)$')
+    result = client.request('GET', '/indexes', params={'limit': 1000})
+    existing = {idx.get('uid') for idx in result.get('results', [])}
+    versions = [int(m.group(1)) for uid in existing if uid and (m := pattern.match(uid))]
+    return f"{INDEX_NAME}_v{max(versions, default=0) + 1}", INDEX_NAME in existing
+
+
+def rebuild_search_index():
+    """Ehitab otsinguindeksi uuesti versioonitud indeksisse ja vahetab selle välja.
+
+    Returns:
+        dict: {"index", "works", "documents", "resynced"}
+
+    Raises:
+        ReindexError: kui mõni samm ebaõnnestus (live-indeks jääb puutumata)
+    """
+    from .meilisearch_ops import (
+        begin_sync_capture, end_sync_capture, get_fingerprint_store,
+        sync_work_to_meilisearch_async
+    )
+
+    client = get_meili_client()
+    new_index, live_exists = _next_index_name(client)
+    _set_status(phase="settings", index=new_index)
+    print(f"REINDEX: Ehitan uue indeksi {new_index}")
+
+    begin_sync_capture()
+    swapped = False
+    try:
+        # 1. Loo indeks ja rakenda seaded enne dokumente
+        _wait_task(client.request('POST', '/indexes', {'uid': new_index, 'primaryKey': 'id'}).get('taskUid'),
+                   f"Indeksi {new_index} loomine")
+        _wait_task(client.request('PATCH', f'/indexes/{new_index}/settings', INDEX_SETTINGS).get('taskUid'),
+                   "Seadete rakendamine")
+
+        # 2. Koosta dokumendid paralleelselt ja saada pakkidena
+        dir_names = _list_work_dirs()
+        chunks = [dir_names[i:i + REINDEX_WORKS_PER_TASK]
+                  for i in range(0, len(dir_names), REINDEX_WORKS_PER_TASK)]
+        _set_status(phase="documents", works_total=len(dir_names), works_done=0, documents=0)
+
+        hashes_by_work = {}
+        batch = []
+        inflight = []
+        documents_total = 0
+        works_done = 0
+
+        def flush():
+            if not batch:
+                return
+            inflight.append(client.add_documents(new_index, list(batch)))
+            batch.clear()
+            while len(inflight) > REINDEX_MAX_INFLIGHT_TASKS:
+                _wait_task(inflight.pop(0), "Dokumentide lisamine")
+
+        # Lõimed ainult ootavad alamprotsesse (vt _build_works)
+        with ThreadPoolExecutor(max_workers=REINDEX_WORKERS, thread_name_prefix="reindex") as pool:
+            for results in pool.map(_build_works, chunks):
+                for dir_name, documents in results:
+                    works_done += 1
+                    if not documents:
+                        continue
+                    hashes_by_work[dir_name] = {doc['id']: content_hash(doc) for doc in documents}
+                    documents_total += len(documents)
+                    batch.extend(documents)
+                    if len(batch) >= REINDEX_BATCH_SIZE:
+                        flush()
+                _set_status(works_done=works_done, documents=documents_total)
+
+        flush()
+        _set_status(phase="indexing")
+        for task_uid in inflight:
+            _wait_task(task_uid, "Dokumentide lisamine")
+
+        # 3. Vaheta indeksid (atomaarne - otsing ei näe vahepealset olekut)
+        _set_status(phase="swap")
+        if not live_exists:
+            _wait_task(client.request('POST', '/indexes', {'uid': INDEX_NAME, 'primaryKey': 'id'}).get('taskUid'),
+                       f"Indeksi {INDEX_NAME} loomine")
+        _swap_indexes(client, new_index)
+        swapped = True
+        print(f"REINDEX: {new_index} on nüüd {INDEX_NAME} ({documents_total} dokumenti)")
+
+        # Räsid vastavad nüüd uuele indeksile
+        store = get_fingerprint_store()
+        store.clear()
+        for dir_name, hashes in hashes_by_work.items():
+            store.commit(dir_name, hashes)
+    finally:
+        touched = end_sync_capture()
+        # 4. Kustuta vana indeks (vahetuse järel) või pooleli jäänud uus indeks
+        _set_status(phase="cleanup")
+        try:
+            client.request('DELETE', f'/indexes/{new_index}')
+        except MeiliError as e:
+            print(f"REINDEX: Indeksi {new_index} kustutamine ebaõnnestus: {e}")
+
+    # Ümberehituse ajal muudetud teosed - nende dokumendid võisid olla vanemad
+    if swapped:
+        for dir_name in touched:
+            sync_work_to_meilisearch_async(dir_name, immediate=True)
+        if touched:
+            print(f"REINDEX: {len(touched)} vahepeal muudetud teost uuesti järjekorras")
+
+    return {"index": new_index, "works": len(hashes_by_work), "documents": documents_total, "resynced": len(touched)}
+
+
+def rebuild_search_index_safe():
+    """Käivitab rebuild_search_index() kui teine ei jookse juba."""
+    if not _reindex_running.acquire(blocking=False):
+        print("REINDEX: Juba käimas, jätan vahele")
+        return None
+    try:
+        with _status_lock:
+            _reindex_status.clear()
+            _reindex_status.update({
+                "state": "running",
+                "phase": "starting",
+                "started_at": datetime.now().isoformat(),
+                "started_ts": time.time(),
+            })
+        result = rebuild_search_index()
+        _set_status(state="done", phase="done", finished_at=datetime.now().isoformat(), **result)
+        return result
+    except Exception as e:
+        print(f"REINDEX VIGA: {e}")
+        _set_status(state="error", message=str(e), finished_at=datetime.now().isoformat())
+        return None
+    finally:
+        _reindex_running.release()
+
+
+def is_reindex_running():
+    """Kas täisindekseerimine parasjagu käib."""
+    return _reindex_running.locked()
@@ -0,0 +1,201 @@
+"""
+Teosepõhine Meilisearch sünkroonimise järjekord.
+
+Koondab sama teose (dir_name) kohta lühikese aja jooksul tulnud
+sünkroonimispäringud üheks ja tagab, et ühe teose kohta jookseb korraga
+ainult üks sünk. Kui sünki ajal tuleb uus päring, käivitatakse pärast
+praeguse lõppu veel üks - nii lõpeb iga teos alati kõige uuema olekuga.
+
+Runner võib tagastada bool-i või Future[bool]-i. Future'i korral loetakse
+teos töös olevaks kuni Future lahendub (nt Meilisearchi task lõpeb), aga
+executor'i lõim vabaneb kohe.
+"""
+import heapq
+import threading
+import time
+from concurrent.futures import Future
+
+from .config import get_logger
+
+logger = get_logger(__name__)
+
+
+class SyncRequest:
+    """Ühe teose ootel sünkroonimispäring (koondatud)."""
+
+    def __init__(self, full=False, pages=None, metadata=False):
+        self.full = full
+        self.pages = set(pages or ())
+        self.metadata = metadata  # Ainult teose tasandi väljade osaline uuendus
+        self.waiters = []  # Future'id, mis lahendatakse selle päringu sünki lõppedes
+
+    def merge(self, other):
+        """Liidab teise päringu sellesse (täissünk katab lehekülgede ja metaandmete sünki)."""
+        self.full = self.full or other.full
+        if self.full:
+            self.pages.clear()
+            self.metadata = False
+        else:
+            self.pages.update(other.pages)
+            self.metadata = self.metadata or other.metadata
+        self.waiters.extend(other.waiters)
+
+    def __repr__(self):
+        if self.full:
+            return "SyncRequest(full)"
+        return f"SyncRequest(pages={sorted(self.pages)}, metadata={self.metadata})"
+
+
+class SyncScheduler:
+    """Debounce'iv ja koondav sünkroonimise planeerija.
+
+    Args:
+        executor: ThreadPoolExecutor, kus sünkid tegelikult jooksevad
+        runner: Funktsioon runner(key, SyncRequest), mis teeb sünki
+        debounce_seconds: Aken, mille jooksul sama võtme päringud koondatakse
+    """
+
+    def __init__(self, executor, runner, debounce_seconds=2.0):
+        self._executor = executor
+        self._runner = runner
+        self._debounce = debounce_seconds
+
+        self._lock = threading.Condition()
+        self._pending = {}      # key -> SyncRequest
+        self._due = {}          # key -> monotonic aeg, millal võib käivitada
+        self._heap = []         # (due, key) - võib sisaldada aegunud kirjeid
+        self._running = set()   # võtmed, mille sünk parasjagu jookseb
+        self._dispatcher = None
+
+        self._stats = {
+            "requested": 0,
+            "coalesced": 0,
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "max_queue_depth": 0,
+        }
+
+    def request(self, key, full=False, pages=None, metadata=False, immediate=False):
+        """Lisab teose sünkroonimispäringu järjekorda (ei blokeeru).
+
+        Args:
+            key: Teose võti (dir_name)
+            full: Täissünk (muidu ainult pages)
+            pages: Lehekülgede failinimed
+            metadata: Teose metaandmete osaline uuendus
+            immediate: Ära oota debounce-akent (nt kui kutsuja ootab tulemust)
+
+        Returns:
+            Future[bool], mis lahendub kui seda päringut kattev sünk lõpeb
+        """
+        new_request = SyncRequest(full=full, pages=pages, metadata=metadata)
+        waiter = Future()
+        new_request.waiters.append(waiter)
+
+        with self._lock:
+            self._ensure_dispatcher()
+            self._stats["requested"] += 1
+
+            now = time.monotonic()
+            due = now if immediate else now + self._debounce
+
+            existing = self._pending.get(key)
+            if existing is not None:
+                existing.merge(new_request)
+                self._stats["coalesced"] += 1
+                if due < self._due[key]:
+                    self._due[key] = due
+                    heapq.heappush(self._heap, (due, key))
+                    self._lock.notify()
+                return waiter
+
+            self._pending[key] = new_request
+            self._due[key] = due
+            heapq.heappush(self._heap, (due, key))
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._pending))
+            self._lock.notify()
+        return waiter
+
+    def is_busy(self, key):
+        """Kas võtmel on ootel päring või käimasolev sünk."""
+        with self._lock:
+            return key in self._pending or key in self._running
+
+    def get_stats(self):
+        """Tagastab järjekorra statistika."""
+        with self._lock:
+            return {
+                **self._stats,
+                "queue_depth": len(self._pending),
+                "running": len(self._running),
+                "debounce_seconds": self._debounce,
+            }
+
+    def _ensure_dispatcher(self):
+        """Käivitab dispetšerlõime esimesel kasutamisel (eeldab et lukk on võetud)."""
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop, daemon=True, name="meili_sync_dispatcher"
+            )
+            self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        """Käivitab päringud, mille debounce-aken on läbi ja mille teos pole töös."""
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                # Eemalda aegunud kirjed ja need, mille teos juba jookseb
+                # (need lisatakse uuesti _on_done käigus)
+                while self._heap:
+                    due, key = self._heap[0]
+                    if self._due.get(key) != due or key in self._running:
+                        heapq.heappop(self._heap)
+                        continue
+                    break
+
+                if not self._heap:
+                    self._lock.wait()
+                    continue
+
+                due, key = self._heap[0]
+                if due > now:
+                    self._lock.wait(due - now)
+                    continue
+
+                heapq.heappop(self._heap)
+                sync_request = self._pending.pop(key)
+                del self._due[key]
+                self._running.add(key)
+                self._stats["started"] += 1
+                self._executor.submit(self._run, key, sync_request)
+
+    def _run(self, key, sync_request):
+        """Jookseb executor'is: teeb sünki ja vabastab teose."""
+        try:
+            result = self._runner(key, sync_request)
+        except Exception as e:
+            logger.error(f"Sünk ebaõnnestus ({key}, {sync_request}): {e}")
+            result = False
+
+        if isinstance(result, Future):
+            result.add_done_callback(
+                lambda f: self._on_done(key, sync_request, not f.exception() and bool(f.result()))
+            )
+        else:
+            self._on_done(key, sync_request, bool(result))
+
+    def _on_done(self, key, sync_request, ok):
+        for waiter in sync_request.waiters:
+            if not waiter.done():
+                waiter.set_result(ok)
+
+        with self._lock:
+            self._running.discard(key)
+            self._stats["completed" if ok else "failed"] += 1
+            # Sünki ajal tulnud päring - planeeri kohe (debounce-aken on juba möödas)
+            if key in self._pending:
+                due = min(self._due[key], time.monotonic())
+                self._due[key] = due
+                heapq.heappush(self._heap, (due, key))
+            self._lock.notify()
@@ -2,14 +2,17 @@
 Abifunktsioonid ja utiliidid.
 """
 import os
-import re
 import json
-import secrets
-import string
 import tempfile
 import threading
-import unicodedata
+from collections import OrderedDict
 from .config import BASE_DIR
+# Otsingudokumentide abifunktsioonid (search_documents ei impordi paketist midagi)
+from .search_documents import (
+    sanitize_id,
+    get_label, get_id, get_all_labels, get_primary_labels, get_labels_by_lang, get_all_ids,
+    generate_default_metadata, normalize_genre, calculate_work_status
+)
 
 # Jagatud lukud failioperatsioonide jaoks (race condition'ide vältimine)
 metadata_lock = threading.RLock()  # _metadata.json operatsioonid
@@ -56,40 +59,197 @@ def atomic_write_json(filepath, data, indent=2):
                 pass
         raise
 
-# Nanoid seadistus
-NANOID_LENGTH = 6
-NANOID_ALPHABET = string.ascii_lowercase + string.digits  # a-z, 0-9
 
-# Cache: Work ID (nanoid) -> Directory path
-WORK_ID_CACHE = {}
+class JsonFileCache:
+    """JSON faili mälus hoitav koopia, mis loetakse uuesti ainult faili muutumisel.
+
+    Faili muutumist kontrollitakse stat() abil (mtime, suurus, inode), seega
+    parsitakse JSON üks kord muudatuse kohta, mitte iga kasutuse korral.
+    atomic_write_json() loob uue inode'i, nii et ka sama sekundi jooksul
+    tehtud muudatus avastatakse.
 
+    NB: get() tagastab jagatud objekti - kutsuja ei tohi seda muuta.
+
+    Args:
+        path: JSON faili tee
+        transform: Valikuline funktsioon transform(data), mille tulemus cache'itakse
+            (nt eelarvutatud otsingutabelid)
+        default: Väärtus, kui faili pole või see on vigane
+    """
 
-def generate_nanoid(length=NANOID_LENGTH):
-    """Genereerib nanoid-stiilis lühikoodi."""
-    return ''.join(secrets.choice(NANOID_ALPHABET) for _ in range(length))
+    def __init__(self, path, transform=None, default=None):
+        self.path = path
+        self._transform = transform
+        self._default = default if default is not None else {}
+        self._lock = threading.Lock()
+        self._key = None
+        self._value = None
+
+    def get(self):
+        try:
+            st = os.stat(self.path)
+            key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            key = None
+
+        with self._lock:
+            if self._value is not None and key == self._key:
+                return self._value
+
+            data = self._default
+            if key is not None:
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"JSON faili lugemine ebaõnnestus ({self.path}): {e}")
+            self._value = self._transform(data) if self._transform else data
+            self._key = key
+            return self._value
+
+    def invalidate(self):
+        """Sunnib järgmisel get() kutsel faili uuesti lugema."""
+        with self._lock:
+            self._key = None
+            self._value = None
+
+
+class MtimeLRUCache:
+    """Piiratud suurusega (LRU) võtme-väärtuse cache, mille kirjed kehtivad
+    seni, kuni nendega seotud fail või kaust pole muutunud.
+
+    Iga kirje juures hoitakse faili stat() võtit (mtime, suurus, inode) nagu
+    JsonFileCache'is. Kausta mtime muutub, kui sinna lisatakse, kustutatakse
+    või ümber nimetatakse faile (ka atomic_write_json() temp-fail), seega
+    sobib kaust piltide nimekirja valideerimiseks.
+
+    NB: get() tagastab jagatud objekti - kutsuja ei tohi seda muuta.
 
+    Args:
+        max_entries: Maksimaalne kirjete arv (vanimad kasutamata kirjed eemaldatakse)
+    """
 
-def sanitize_id(text):
-    """Puhastab teksti, et see sobiks ID-ks (sama loogika mis 1-1 skriptis)."""
-    if not text:
-        return ""
-    # Eemalda diakriitikud
-    normalized = unicodedata.normalize('NFD', text)
-    ascii_text = ''.join(c for c in normalized if unicodedata.category(c) != 'Mn')
-    # Asenda kõik mitte-lubatud märgid alakriipsuga
-    sanitized = re.sub(r'[^a-zA-Z0-9_-]', '_', ascii_text)
-    # Eemalda mitu järjestikust alakriipsu
-    sanitized = re.sub(r'_+', '_', sanitized)
-    # Eemalda algus- ja lõpukriipsud
-    sanitized = sanitized.strip('_-')
-    return sanitized
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # võti -> (stat võti, väärtus)
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def get(self, key, path, loader):
+        """Tagastab cache'itud väärtuse või laeb selle loader() abil.
+
+        Args:
+            key: Kirje võti (nt kausta nimi)
+            path: Fail või kaust, mille muutumisel kirje aegub
+            loader: Funktsioon loader(), mis arvutab väärtuse
+        """
+        try:
+            st = os.stat(path)
+            stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            stamp = None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+            if entry is not None:
+                self._stats["stale"] += 1
+
+        value = loader()
+
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return value
+
+    def invalidate(self, key=None):
+        """Eemaldab kirje (või kõik kirjed, kui võtit pole antud)."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def get_stats(self):
+        """Tagastab kirjete arvu ja tabamuste/möödalaskmiste loendurid."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+
+class SizedLRUCache:
+    """Mälumahu järgi piiratud LRU cache muutumatute väärtuste jaoks
+    (nt diffid kahe täispika commiti räsi vahel).
+
+    Iga kirje suurus antakse put() kutsel (ligikaudne baitide arv); kui
+    kirjete summa ületab max_bytes, eemaldatakse vanimad kasutamata kirjed.
+    Kirjet, mis on suurem kui veerand mahust, ei cache'ita.
+
+    NB: get() tagastab jagatud objekti - kutsuja ei tohi seda muuta.
 
+    Args:
+        max_bytes: Kirjete suuruste maksimaalne summa
+    """
 
-def capitalize_first(text):
-    """Teeb esimese tähe suureks, ülejäänud jätab samaks (toetab lühendeid)."""
-    if not text:
-        return ""
-    return text[0].upper() + text[1:]
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # võti -> (suurus, väärtus)
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "too_large": 0}
+
+    def get(self, key):
+        """Tagastab väärtuse või None, kui kirjet pole."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, value, size):
+        """Lisab kirje (size - väärtuse ligikaudne suurus baitides)."""
+        with self._lock:
+            if size > self.max_bytes // 4:
+                self._stats["too_large"] += 1
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0]
+            self._entries[key] = (size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+
+    def get_stats(self):
+        """Tagastab kirjete arvu, mälukasutuse ja tabamuste loendurid."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+        return stats
+
+
+# Cache: Work ID (nanoid) -> Directory path
+WORK_ID_CACHE = {}
 
 
 def build_work_id_cache():
@@ -177,203 +337,3 @@ def find_directory_by_id(target_id):
         pass
 
     return None
-
-
-def get_label(value, lang='et'):
-    """Tagastab sildi LinkedEntity objektist või stringist eelistatud keeles."""
-    if not value:
-        return ""
-    if isinstance(value, str):
-        return capitalize_first(value)
-    if isinstance(value, dict):
-        # Proovi leida silti konkreetses keeles
-        labels = value.get('labels')
-        if labels and isinstance(labels, dict):
-            if labels.get(lang):
-                return capitalize_first(labels[lang])
-            # Fallback eesti keelele
-            if labels.get('et'):
-                return capitalize_first(labels['et'])
-        
-        # Fallback peamisele sildile
-        return capitalize_first(value.get('label', ''))
-    return capitalize_first(str(value))
-
-
-def get_id(value):
-    """Tagastab ID LinkedEntity objektist."""
-    if isinstance(value, dict):
-        return value.get('id')
-    return None
-
-
-def get_all_labels(value):
-    """Kogub kõik sildid (sh mitmekeelsed) LinkedEntity objektist või massiivist."""
-    if not value:
-        return []
-
-    values = value if isinstance(value, list) else [value]
-    labels = []
-
-    for val in values:
-        if isinstance(val, str):
-            labels.append(capitalize_first(val))
-        elif isinstance(val, dict):
-            # Peamine silt
-            if val.get('label'):
-                labels.append(capitalize_first(val['label']))
-            # Mitmekeelsed sildid
-            if val.get('labels') and isinstance(val['labels'], dict):
-                for l in val['labels'].values():
-                    if l:
-                        labels.append(capitalize_first(l))
-
-    return sorted(list(set(labels)))
-
-
-def get_primary_labels(value):
-    """Tagastab ainult peamised sildid LinkedEntity objektist või massiivist. Eelistab eesti keelt."""
-    if not value:
-        return []
-    
-    values = value if isinstance(value, list) else [value]
-    labels = []
-    
-    for val in values:
-        if isinstance(val, str):
-            labels.append(capitalize_first(val))
-        elif isinstance(val, dict):
-            # Eelisjärjekord: et > label > esimene väärtus labels dictist
-            label = None
-            if val.get('labels') and isinstance(val['labels'], dict):
-                label = val['labels'].get('et')
-            
-            if not label:
-                label = val.get('label')
-            
-            if label:
-                labels.append(capitalize_first(label))
-                
-    return labels
-
-
-def get_labels_by_lang(value, lang):
-    """Tagastab sildid konkreetses keeles (või fallback)."""
-    if not value:
-        return []
-    
-    values = value if isinstance(value, list) else [value]
-    labels = []
-    
-    for val in values:
-        if isinstance(val, str):
-            # Stringi puhul ei tea keelt, tagastame alati (eeldades et on primaarne)
-            labels.append(capitalize_first(val))
-        elif isinstance(val, dict):
-            label = None
-            # Otsi konkreetses keeles
-            if val.get('labels') and isinstance(val['labels'], dict):
-                label = val['labels'].get(lang)
-            
-            # Fallback: primaarne label
-            if not label:
-                label = val.get('label')
-            
-            if label:
-                labels.append(capitalize_first(label))
-                
-    return labels
-
-
-def get_all_ids(value):
-    """Kogub kõik ID-d LinkedEntity objektist või massiivist."""
-    if not value:
-        return []
-
-    values = value if isinstance(value, list) else [value]
-    ids = []
-
-    for val in values:
-        if isinstance(val, dict) and val.get('id'):
-            ids.append(val['id'])
-
-    return sorted(list(set(ids)))
-
-
-def generate_default_metadata(dir_name):
-    """Genereerib vaike-metaandmed kataloogi nime põhjal."""
-    slug = sanitize_id(dir_name)
-
-    # Pealkiri kataloogi nimest (eemaldame aastaarvu ja ID osa kui võimalik)
-    clean_title = re.sub(r'^\d{4}[-_]\d+[-_]?', '', dir_name)
-    if clean_title == dir_name:
-        clean_title = re.sub(r'^\d{4}[-_]?', '', dir_name)
-
-    title = clean_title.replace('-', ' ').replace('_', ' ').strip().capitalize() if clean_title else "Pealkiri puudub"
-
-    # Proovi leida aasta
-    year = 0
-    year_match = re.match(r'^(\d{4})', dir_name)
-    if year_match:
-        year = int(year_match.group(1))
-
-    return {
-        "id": generate_nanoid(),
-        "slug": slug,
-        "title": title,
-        "year": year,
-        "location": None,
-        "publisher": None,
-        "creators": [],
-        "tags": [],
-        "type": None,
-        "genre": None,
-        "languages": [],
-        "collection": None,
-        "ester_id": None,
-        "external_url": None
-    }
-
-
-def normalize_genre(tag):
-    """Normaliseerib žanri väärtuse 'disputatsioon'-iks, kui see on üks sünonüümidest."""
-    # Kui on objekt, võta sealt label
-    if isinstance(tag, dict):
-        label = tag.get('label', '')
-        # Võime tagastada objekti muutmata kujul, või normaliseerida labelit.
-        # Kuna normalize_genre eesmärk on ühtlustada stringe vanade andmete jaoks,
-        # siis objektide puhul (mis tulevad Wikidatast) on need ilmselt juba korras.
-        # Tagastame objekti endisena.
-        return tag
-    
-    if not isinstance(tag, str):
-        return tag
-
-    synonyms = ["dissertatsioon", "exercitatio", "teesid", "dissertatio", "theses", "disputatio"]
-    if tag and tag.strip().lower() in synonyms:
-        return "disputatsioon"
-    return tag.strip().lower() if tag else tag
-
-
-def calculate_work_status(page_statuses):
-    """Arvutab teose koondstaatuse lehekülgede staatuste põhjal.
-
-    Loogika: Kõik Valmis → Valmis, Kõik Toores/Leidmata → Toores, muidu → Töös
-    """
-    if not page_statuses:
-        return 'Toores'
-
-    # Valmis / Tehtud (Frontendis näib olevat DONE või Tehtud)
-    done_aliases = ['Valmis', 'Tehtud', 'DONE']
-    # Toores / Algne
-    raw_aliases = ['Toores', 'Algne', 'RAW', '']
-
-    is_all_done = all(s in done_aliases for s in page_statuses)
-    if is_all_done:
-        return 'Valmis'
-
-    is_all_raw = all(s in raw_aliases or s is None for s in page_statuses)
-    if is_all_raw:
-        return 'Toores'
-
-    return 'Töös'
\ No newline at end of file
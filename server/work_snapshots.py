@@ -0,0 +1,124 @@
+"""
+Teoste kaustade failide hetktõmmised (state/work_snapshots.sqlite).
+
+Iga teose kohta hoitakse {faili nimi: (suurus, mtime_ns)} .txt, .json ja
+pildifailide kohta. Jälgija võrdleb muutunud kausta uut hetktõmmist
+salvestatuga ja leiab nii failid, mida muudeti serverist mööda (skriptid,
+käsitsi kopeerimine). Salvestatud on kettal, et ka serveri seisaku ajal
+tehtud muudatused stardil üles leitaks.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from .config import WORK_SNAPSHOTS_FILE, get_logger
+
+logger = get_logger(__name__)
+
+TRACKED_EXTENSIONS = ('.txt', '.json')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def scan_work_files(dir_path):
+    """Tagastab kausta jälgitavate failide {nimi: [suurus, mtime_ns]}.
+
+    Pisipildid (_thumb_*) ja varukoopiad (*.backup.*) jäetakse välja.
+    """
+    snapshot = {}
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            name = entry.name
+            if name.startswith('_thumb_') or '.backup.' in name:
+                continue
+            if not name.lower().endswith(TRACKED_EXTENSIONS + IMAGE_EXTENSIONS):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue  # Fail kadus vahepeal
+            if entry.is_file():
+                snapshot[name] = [st.st_size, st.st_mtime_ns]
+    return snapshot
+
+
+def diff_snapshots(old, new):
+    """Võrdleb kahte hetktõmmist.
+
+    Returns:
+        (changed, images_changed): changed - muutunud/lisatud/kustutatud .txt/.json
+        failide nimed; images_changed - kas piltide nimekiri muutus (lk numbrid nihkuvad)
+    """
+    changed = sorted(
+        name for name in set(old) | set(new)
+        if name.lower().endswith(TRACKED_EXTENSIONS) and old.get(name) != new.get(name)
+    )
+    old_images = {n for n in old if n.lower().endswith(IMAGE_EXTENSIONS)}
+    new_images = {n for n in new if n.lower().endswith(IMAGE_EXTENSIONS)}
+    return changed, old_images != new_images
+
+
+class WorkSnapshotStore:
+    """Püsiv dir_name -> hetktõmmis hoidla."""
+
+    def __init__(self, path=WORK_SNAPSHOTS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        """Avab ühenduse esimesel kasutamisel (eeldab et lukk on võetud)."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS work_snapshots ("
+                "dir_name TEXT PRIMARY KEY, files TEXT NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, dir_name):
+        """Tagastab salvestatud hetktõmmise või None (teost pole veel nähtud)."""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT files FROM work_snapshots WHERE dir_name = ?", (dir_name,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Hetktõmmise lugemine ebaõnnestus ({dir_name}): {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put(self, dir_name, snapshot):
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO work_snapshots (dir_name, files) VALUES (?, ?)",
+                        (dir_name, json.dumps(snapshot, separators=(',', ':')))
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Hetktõmmise salvestamine ebaõnnestus ({dir_name}): {e}")
+
+    def delete(self, dir_name):
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("DELETE FROM work_snapshots WHERE dir_name = ?", (dir_name,))
+        except sqlite3.Error as e:
+            logger.error(f"Hetktõmmise kustutamine ebaõnnestus ({dir_name}): {e}")
+
+    def dir_names(self):
+        try:
+            with self._lock:
+                rows = self._connect().execute("SELECT dir_name FROM work_snapshots").fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Hetktõmmiste lugemine ebaõnnestus: {e}")
+            return set()
+        return {row[0] for row in rows}
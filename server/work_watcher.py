@@ -0,0 +1,438 @@
+"""
+Teoste kaustade jälgija.
+
+1. Uued teosed: kui andmekausta kopeeritakse uus teos (pildid + OCR
+   tekstid), antakse see sisselugemise konveierile (server/ingest_pipeline.py),
+   mis loob vaikimisi _metadata.json, pisipildi, lisab tekstid Giti
+   originaal-OCR commitina ja indekseerib teose - mitu teost korraga.
+2. Välised muudatused: failid, mida muudeti serverist mööda (nt
+   scripts/replace_negation_sign.py, scripts/fix_printer_ids.py või
+   käsitsi kopeerimine), commititakse Giti ja indekseeritakse uuesti -
+   üks commit ja üks inkrementaalne indeksi uuendus teose kohta.
+
+Linuxis kasutatakse inotify'd (server/inotify.py): uus kaust märgatakse
+kohe ja jälgitakse kuni selle sisu on STABILITY_SECONDS jooksul muutumatu
+(aeglane kopeerimine peab lõpule jõudma). Olemasolevate teoste kaustade
+sündmuste järel võrreldakse ainult muutunud kausta failide hetktõmmist
+(nimi, suurus, mtime) salvestatuga (server/work_snapshots.py). Kogu
+andmekausta skannitakse ainult stardil ja inotify järjekorra ületäitumisel.
+
+Kui inotify pole saadaval, kasutatakse vana 60-sekundilist skannimist ja
+väliseid muudatusi otsitakse iga EDIT_SCAN_INTERVAL sekundi järel.
+"""
+import errno
+import os
+import threading
+import time
+
+from .config import BASE_DIR
+from .git_ops import commit_out_of_band_changes, get_dirty_work_dirs
+from .meilisearch_ops import sync_work_to_meilisearch_async, sync_pages_to_meilisearch_async
+from .ingest_pipeline import IngestPipeline
+from .work_snapshots import (
+    WorkSnapshotStore, scan_work_files, diff_snapshots, TRACKED_EXTENSIONS, IMAGE_EXTENSIONS
+)
+from .inotify import (
+    Inotify, InotifyUnavailable,
+    IN_CREATE, IN_MOVED_TO, IN_MOVED_FROM, IN_CLOSE_WRITE, IN_MODIFY, IN_DELETE,
+    IN_DELETE_SELF, IN_MOVE_SELF, IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR, IN_ONLYDIR
+)
+
+# Kaust loetakse valmis kopeerituks, kui see pole nii kaua muutunud (sekundites)
+STABILITY_SECONDS = 60
+
+# Polling-režiimi skannimise intervall (sekundites)
+POLL_INTERVAL = 60
+
+# Olemasoleva teose muudatused töödeldakse, kui kaust on nii kaua vaikne olnud
+# (skript jõuab kõik failid kirjutada, serveri enda salvestus jõuab commitida)
+EDIT_QUIET_SECONDS = 10
+
+# Väliste muudatuste otsimise intervall ilma inotify'ta (sekundites)
+EDIT_SCAN_INTERVAL = 300
+
+# Andmekausta enda sündmused: uued alamkaustad
+_ROOT_MASK = IN_CREATE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+# Uue teose kausta sündmused: failide lisamine/kirjutamine
+_CANDIDATE_MASK = IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE | IN_MODIFY | IN_ONLYDIR
+# Olemasoleva teose kausta sündmused: failide kirjutamine, ümbernimetamine, kustutamine
+_WORK_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_ONLYDIR
+
+_snapshots = WorkSnapshotStore()
+
+
+def _store_initial_snapshot(dir_name):
+    """Uue teose algne hetktõmmis - järgmised muudatused on juba välised."""
+    dir_path = os.path.join(BASE_DIR, dir_name)
+    if os.path.isdir(dir_path):
+        _snapshots.put(dir_name, scan_work_files(dir_path))
+
+
+_ingest = IngestPipeline(on_committed=_store_initial_snapshot)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "mode": None,
+    "watched_dirs": 0,
+    "unwatched_dirs": 0,
+    "works_checked": 0,
+    "works_changed": 0,
+    "out_of_band_commits": 0,
+    "out_of_band_files": 0,
+    "commit_errors": 0,
+    "index_updates": 0,
+    "last_sweep_at": None,
+}
+
+
+def _count(**amounts):
+    with _stats_lock:
+        for key, amount in amounts.items():
+            _stats[key] += amount
+
+
+def get_watcher_stats():
+    """Tagastab jälgija statistika (režiim, jälgitavad kaustad, välised muudatused)."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def get_ingest_stats():
+    """Tagastab uute teoste sisselugemise konveieri progressi."""
+    return _ingest.get_stats()
+
+
+def _has_images(dir_path):
+    for f in os.listdir(dir_path):
+        if f.lower().endswith(IMAGE_EXTENSIONS) and not f.startswith('_thumb_'):
+            return True
+    return False
+
+
+def _is_tracked_name(name):
+    lower = name.lower()
+    return lower.endswith(TRACKED_EXTENSIONS + IMAGE_EXTENSIONS) and not name.startswith('_thumb_')
+
+
+def create_metadata_for_new_work(dir_name):
+    """Annab uue teose sisselugemise konveierile (metaandmed, pisipilt, Git, indeks).
+
+    Blokeerub, kui konveieri esimene järjekord on täis.
+
+    Returns:
+        True, kui kaust on käsitletud (konveieris, metaandmed olid juba olemas,
+        kaust kadus); False, kui kaustas pole veel pilte
+    """
+    dir_path = os.path.join(BASE_DIR, dir_name)
+    meta_path = os.path.join(dir_path, '_metadata.json')
+    if not os.path.isdir(dir_path) or os.path.exists(meta_path):
+        return True
+    if not _has_images(dir_path):
+        return False
+
+    _ingest.submit(dir_name)
+    return True
+
+
+def process_work_changes(dir_name, baseline_only=False):
+    """Võrdleb teose kausta hetktõmmist salvestatuga ja käsitleb välised muudatused.
+
+    Muutunud .txt/.json failidest commititakse need, mis Giti järgi on
+    commitimata (serveri enda salvestused on juba commititud), ja need
+    indekseeritakse ühe päringuga. Piltide nimekirja muutus tähendab
+    täissünki (lehekülgede numbrid nihkuvad).
+
+    Args:
+        dir_name: Teose kausta nimi
+        baseline_only: Salvesta ainult hetktõmmis (teadaolevalt puhas kaust)
+
+    Returns:
+        dict muudatuste kohta või None, kui midagi polnud
+    """
+    dir_path = os.path.join(BASE_DIR, dir_name)
+    if not os.path.isdir(dir_path):
+        _snapshots.delete(dir_name)
+        return None
+    # Metaandmeteta kaust on uus teos - selle eest hoolitseb sisselugemise konveier
+    if not os.path.exists(os.path.join(dir_path, '_metadata.json')) or _ingest.is_active(dir_name):
+        return None
+
+    new = scan_work_files(dir_path)
+    old = _snapshots.get(dir_name)
+    _count(works_checked=1)
+
+    if old is None and baseline_only:
+        _snapshots.put(dir_name, new)
+        return None
+    if old == new:
+        return None
+
+    if old is None:
+        # Teost pole varem nähtud (nt kopeeriti koos _metadata.json failiga)
+        changed, images_changed = None, True
+    else:
+        changed, images_changed = diff_snapshots(old, new)
+
+    committed = commit_out_of_band_changes(dir_name, changed) if changed is None or changed else []
+    if committed is None:
+        # Hetktõmmist ei uuendata - järgmine sündmus (või stardi kontroll) proovib uuesti
+        _count(commit_errors=1)
+        print(f"Jälgija: {dir_name} välise muudatuse commit ebaõnnestus, proovitakse uuesti")
+        return None
+    out_of_band = [os.path.basename(path) for path in committed]
+
+    if images_changed:
+        sync_work_to_meilisearch_async(dir_name)
+    elif out_of_band:
+        pages = [name for name in out_of_band if name != '_metadata.json']
+        sync_pages_to_meilisearch_async(dir_name, pages, metadata='_metadata.json' in out_of_band)
+
+    _snapshots.put(dir_name, new)
+
+    if not out_of_band and not images_changed:
+        return None
+    _count(
+        works_changed=1,
+        out_of_band_commits=1 if committed else 0,
+        out_of_band_files=len(committed),
+        index_updates=1
+    )
+    print(
+        f"VÄLINE MUUDATUS: {dir_name} ({len(out_of_band)} faili commititud"
+        + (", piltide nimekiri muutus - täissünk" if images_changed else "") + ")"
+    )
+    return {"files": out_of_band, "images_changed": images_changed}
+
+
+def _list_work_dirs():
+    """Tagastab [(dir_name, has_metadata, dir_mtime)] andmekausta teoste kohta."""
+    result = []
+    for entry in os.scandir(BASE_DIR):
+        # Ignoreeri peidetud kaustu (nt .git)
+        if entry.is_dir() and not entry.name.startswith('.'):
+            has_metadata = os.path.exists(os.path.join(entry.path, '_metadata.json'))
+            result.append((entry.name, has_metadata, entry.stat().st_mtime))
+    return result
+
+
+def sweep_all_works(initial=False):
+    """Kontrollib kõiki teoseid (stardil ja polling-režiimis).
+
+    Stardil leitakse ühe git status'ega kaustad, kus on commitimata
+    muudatusi; ülejäänud teostele, mida pole varem nähtud, salvestatakse
+    ainult algne hetktõmmis.
+    """
+    dirty = get_dirty_work_dirs() if initial else set()
+    existing = set()
+    for dir_name, has_metadata, _ in _list_work_dirs():
+        if not has_metadata:
+            continue
+        existing.add(dir_name)
+        try:
+            process_work_changes(dir_name, baseline_only=initial and dir_name not in dirty)
+        except Exception as e:
+            print(f"Jälgija: {dir_name} kontroll ebaõnnestus: {e}")
+
+    for dir_name in _snapshots.dir_names() - existing:
+        _snapshots.delete(dir_name)
+
+    with _stats_lock:
+        _stats["last_sweep_at"] = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _poll_loop():
+    """Vana režiim: skannib andmekausta iga POLL_INTERVAL sekundi järel."""
+    with _stats_lock:
+        _stats["mode"] = "polling"
+    last_sweep = 0
+    while True:
+        try:
+            if not os.path.exists(BASE_DIR):
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            for dir_name, has_metadata, dir_mtime in _list_work_dirs():
+                if has_metadata:
+                    continue
+                # Kontrolli kas kaust on "stabiilne" (pole muutunud viimase 60 sek jooksul)
+                # See annab aega aeglasele kopeerimisele lõpule jõuda
+                if time.time() - dir_mtime < STABILITY_SECONDS:
+                    continue  # Kaust on liiga uus, oota veel
+                create_metadata_for_new_work(dir_name)
+
+            if time.monotonic() - last_sweep >= EDIT_SCAN_INTERVAL:
+                sweep_all_works(initial=last_sweep == 0)
+                last_sweep = time.monotonic()
+
+            time.sleep(POLL_INTERVAL)
+        except Exception as e:
+            print(f"Jälgija viga: {e}")
+            time.sleep(POLL_INTERVAL)
+
+
+class _InotifyWatcher:
+    """Sündmuspõhine jälgija: andmekaust, uued kaustad ja olemasolevad teosed."""
+
+    def __init__(self):
+        self.inotify = Inotify()
+        # Uued kaustad: dir_name -> viimase muudatuse aeg (time.time()); None = ootab sündmust
+        self.candidates = {}
+        # Muutunud teosed: dir_name -> viimase sündmuse aeg
+        self.dirty = {}
+        # Teosed, mida ei saanud jälgida (max_user_watches täis) - kontrollitakse perioodiliselt
+        self.unwatched = set()
+        self.last_unwatched_sweep = time.monotonic()
+
+    def _watch(self, dir_name, mask):
+        try:
+            self.inotify.add_watch(os.path.join(BASE_DIR, dir_name), mask)
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                if not self.unwatched:
+                    print("Jälgija: inotify jälgimiste limiit täis (fs.inotify.max_user_watches), "
+                          f"osa teoseid kontrollitakse iga {EDIT_SCAN_INTERVAL}s")
+                self.unwatched.add(dir_name)
+            elif e.errno != errno.ENOENT:
+                print(f"Jälgija: ei saa jälgida {dir_name}: {e}")
+            return False
+        self.unwatched.discard(dir_name)
+        return True
+
+    def _watch_candidate(self, dir_name, last_change):
+        self._watch(dir_name, _CANDIDATE_MASK)
+        self.candidates[dir_name] = last_change
+
+    def _promote(self, dir_name):
+        """Uuest kaustast sai teos - jälgi edaspidi väliseid muudatusi."""
+        self.candidates.pop(dir_name, None)
+        if os.path.isdir(os.path.join(BASE_DIR, dir_name)):
+            self._watch(dir_name, _WORK_MASK)
+            self.dirty[dir_name] = time.time()
+
+    def rescan(self):
+        """Täisskann (stardil ja pärast sündmuste kadumist)."""
+        for dir_name, has_metadata, dir_mtime in _list_work_dirs():
+            if has_metadata:
+                if dir_name not in self.candidates:
+                    self._watch(dir_name, _WORK_MASK)
+            elif dir_name not in self.candidates:
+                self._watch_candidate(dir_name, dir_mtime)
+        self._update_stats()
+
+    def _update_stats(self):
+        with _stats_lock:
+            _stats["watched_dirs"] = self.inotify.watch_count
+            _stats["unwatched_dirs"] = len(self.unwatched)
+
+    def _handle_event(self, path, mask, name, now):
+        if mask & IN_Q_OVERFLOW:
+            print("Jälgija: inotify sündmuste järjekord täitus, skannin uuesti")
+            self.rescan()
+            sweep_all_works()
+            return
+        if path is None:
+            return
+        if path == BASE_DIR:
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                raise InotifyUnavailable("Andmekaust kadus")
+            if mask & IN_ISDIR and not name.startswith('.'):
+                self._watch_candidate(name, now)
+            return
+
+        dir_name = os.path.basename(path)
+        if mask & IN_IGNORED:
+            self.candidates.pop(dir_name, None)
+            self.dirty.pop(dir_name, None)
+            if not os.path.isdir(path):
+                _snapshots.delete(dir_name)
+        elif dir_name in self.candidates:
+            self.candidates[dir_name] = now
+        elif _is_tracked_name(name):
+            self.dirty[dir_name] = now
+
+    def _next_timeout(self, now):
+        due_times = [t + STABILITY_SECONDS for t in self.candidates.values() if t is not None]
+        due_times += [t + EDIT_QUIET_SECONDS for t in self.dirty.values()]
+        if self.unwatched:
+            due_times.append(now + EDIT_SCAN_INTERVAL - (time.monotonic() - self.last_unwatched_sweep))
+        return max(0.0, min(due_times) - now) if due_times else None
+
+    def _process_candidates(self, now):
+        for dir_name, last_change in list(self.candidates.items()):
+            if last_change is None or now - last_change < STABILITY_SECONDS:
+                continue
+            # Kausta mtime on ka pärast sündmust uuem (nt sündmus jäi vahele)
+            try:
+                dir_mtime = os.stat(os.path.join(BASE_DIR, dir_name)).st_mtime
+            except OSError:
+                self.candidates.pop(dir_name, None)
+                self.inotify.remove_watch(os.path.join(BASE_DIR, dir_name))
+                continue
+            if now - dir_mtime < STABILITY_SECONDS:
+                self.candidates[dir_name] = dir_mtime
+                continue
+
+            if create_metadata_for_new_work(dir_name):
+                self._promote(dir_name)
+            else:
+                # Pilte veel pole - oota järgmist faili sündmust
+                self.candidates[dir_name] = None
+
+    def _process_dirty(self, now):
+        for dir_name, last_event in list(self.dirty.items()):
+            if now - last_event < EDIT_QUIET_SECONDS:
+                continue
+            del self.dirty[dir_name]
+            try:
+                process_work_changes(dir_name)
+            except Exception as e:
+                print(f"Jälgija: {dir_name} kontroll ebaõnnestus: {e}")
+
+        if self.unwatched and time.monotonic() - self.last_unwatched_sweep >= EDIT_SCAN_INTERVAL:
+            self.last_unwatched_sweep = time.monotonic()
+            for dir_name in sorted(self.unwatched):
+                try:
+                    process_work_changes(dir_name)
+                except Exception as e:
+                    print(f"Jälgija: {dir_name} kontroll ebaõnnestus: {e}")
+
+    def run(self):
+        with _stats_lock:
+            _stats["mode"] = "inotify"
+        self.inotify.add_watch(BASE_DIR, _ROOT_MASK)
+        self.rescan()
+        # Serveri seisaku ajal tehtud muudatused (sündmused kogunevad vahepeal kernelis)
+        sweep_all_works(initial=True)
+        while True:
+            for path, mask, name in self.inotify.read_events(self._next_timeout(time.time())):
+                self._handle_event(path, mask, name, time.time())
+
+            now = time.time()
+            self._process_candidates(now)
+            self._process_dirty(now)
+            self._update_stats()
+
+    def close(self):
+        self.inotify.close()
+
+
+def metadata_watcher_loop():
+    """Taustalõim, mis otsib uusi kaustu ja väliseid muudatusi."""
+    while not os.path.exists(BASE_DIR):
+        time.sleep(POLL_INTERVAL)
+
+    try:
+        watcher = _InotifyWatcher()
+    except InotifyUnavailable as e:
+        print(f"Metaandmete jälgija käivitatud (kataloog: {BASE_DIR}, skannimine iga {POLL_INTERVAL}s; {e})")
+        _poll_loop()
+        return
+
+    print(f"Metaandmete jälgija käivitatud (kataloog: {BASE_DIR}, inotify)")
+    try:
+        watcher.run()
+    except Exception as e:
+        print(f"Jälgija viga: {e} - jätkan skannimisega")
+    finally:
+        watcher.close()
+    _poll_loop()
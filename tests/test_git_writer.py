@@ -0,0 +1,87 @@
+"""GitCommitWriter: ebaõnnestuva commiti katsete ülempiir."""
+import json
+import threading
+
+import pytest
+from git import Repo
+
+from server import git_writer
+from server.git_writer import GitCommitWriter
+
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    (data_dir / "teos").mkdir(parents=True)
+    repo = Repo.init(data_dir)
+    monkeypatch.setattr(git_writer, "BASE_DIR", str(data_dir))
+    monkeypatch.setattr(git_writer, "GIT_COMMIT_RETRY_SECONDS", 0)
+    monkeypatch.setattr(git_writer, "GIT_COMMIT_MAX_ATTEMPTS", 3)
+
+    failures = []
+    writer = GitCommitWriter(
+        lambda: repo, threading.Lock(),
+        on_failure=lambda path, username, error: failures.append((path, username)),
+        path=str(tmp_path / "state" / "git_journal.jsonl"),
+    )
+    writer.repo = repo
+    writer.failures = failures
+    return writer
+
+
+def _journal(writer):
+    with open(writer.path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_failing_commit_is_marked_failed_after_max_attempts(writer, monkeypatch):
+    calls = []
+
+    def failing_write_commit(entries, author_name, message):
+        calls.append(author_name)
+        raise OSError("index.lock on lukus")
+
+    original = writer._write_commit
+    monkeypatch.setattr(writer, "_write_commit", failing_write_commit)
+    commit_id, future = writer.submit([("teos/001.txt", "esimene")], "mari", "Muuda: teos/001.txt")
+    result = future.result(timeout=10)
+
+    assert result == {"success": False, "error": "index.lock on lukus"}
+    assert len(calls) == 3
+    assert writer.failures == [("teos/001.txt", "mari")]
+    assert writer.status(commit_id)["state"] == "failed"
+    assert writer.pending_paths() == set()
+    assert writer.get_stats()["saves_failed"] == 1
+    # Päevik on tühjendatud - restart ei taasta vigast partiid
+    assert [entry["op"] for entry in _journal(writer)] == ["seq"]
+
+    # Järgmine salvestus commititakse tavapäraselt
+    monkeypatch.setattr(writer, "_write_commit", original)
+    commit_id, future = writer.submit([("teos/002.txt", "teine")], "jaan", "Muuda: teos/002.txt")
+    result = future.result(timeout=10)
+
+    assert result["success"] is True
+    assert writer.status(commit_id) == {"state": "committed", "commit_hash": result["commit_hash"]}
+    assert writer.repo.head.commit.hexsha == result["commit_hash"]
+    assert writer.repo.head.commit.author.name == "jaan"
+
+
+def test_commit_retries_until_success(writer, monkeypatch):
+    original = writer._write_commit
+    attempts = []
+
+    def flaky_write_commit(entries, author_name, message):
+        attempts.append(author_name)
+        if len(attempts) < 2:
+            raise OSError("ajutine viga")
+        return original(entries, author_name, message)
+
+    monkeypatch.setattr(writer, "_write_commit", flaky_write_commit)
+    commit_id, future = writer.submit([("teos/001.txt", "sisu")], "mari", "Muuda: teos/001.txt")
+    result = future.result(timeout=10)
+
+    assert result["success"] is True
+    assert len(attempts) == 2
+    assert writer.status(commit_id)["state"] == "committed"
+    assert writer.get_stats()["commit_retries"] == 1
+    assert writer.get_stats()["saves_failed"] == 0